@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px 
@@ -6,6 +7,9 @@ import plotly.express as px
 # Import des modules internes
 from src.sbert_engine import SBERTEngine
 from src.genai_manager import GenAIManager
+from src.scoring_client import ScoringClient
+from src.candidate_store import CandidateStore, index_audits, profile_id, search_job
+from src.segmentation import split_stack
 
 # Configuration de la page (Mode Large & Pro)
 st.set_page_config(
@@ -14,31 +18,46 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- CONFIGURATION : MAPPING DES NOMS DE BLOCS (HARDCODÉ POUR SÉCURITÉ) ---
-# C'est ici qu'on force l'affichage des vrais noms sur le graphique
-REFERENTIEL_NOMS = {
-    "bloc_1": "Architecture Data & Modélisation",
-    "bloc_2": "Ingénierie Big Data & DevOps",
-    "bloc_3": "Analyse BI & Visualisation",
-    "bloc_4": "Data Science & IA Avancée",
-    "bloc_5": "Gouvernance & Qualité Data"
-}
-
 # --- CHARGEMENT DES MOTEURS ---
 @st.cache_resource
 def load_engines():
-    engine_sbert = SBERTEngine()
-    engine_genai = GenAIManager() 
-    return engine_sbert, engine_genai
+    # Données et cache d'embeddings seulement : le modèle SBERT et le SDK IA
+    # se chargent en arrière-plan pendant que la page s'affiche.
+    # Avec AISCA_SCORING_URL, le scoring est délégué au service (micro-batching partagé)
+    scoring_url = os.getenv("AISCA_SCORING_URL")
+    engine_sbert = ScoringClient(scoring_url) if scoring_url else SBERTEngine()
+    # Cache sémantique des bios (AISCA_BIO_SIMILARITY) : encodeur local seulement.
+    # Le référentiel déjà lu par le moteur local est partagé (une seule lecture)
+    engine_genai = GenAIManager(embedder=getattr(engine_sbert, "encode", None),
+                                bundle=None if scoring_url else engine_sbert.state.bundle)
+    engine_sbert.warm_up()
+    engine_genai.warm_up()
+    # Référentiel rechargé à chaud quand les sources changent (sans redémarrage)
+    engine_sbert.start_watching(on_reload=engine_genai.reload_referential)
+    # Base des candidats audités (recherche recruteur) : AISCA_CANDIDATE_STORE, moteur local seulement
+    store_path = os.getenv("AISCA_CANDIDATE_STORE")
+    candidats = CandidateStore(store_path) if store_path and not scoring_url else None
+    return engine_sbert, engine_genai, candidats
 
 try:
     with st.spinner("Initialisation du système d'analyse..."):
-        sbert, genai_coach = load_engines()
+        sbert, genai_coach, candidats = load_engines()
     st.sidebar.success("Système opérationnel")
 except Exception as e:
     st.error(f"Erreur critique lors du chargement : {e}")
     st.stop()
 
+# --- RECHERCHE RECRUTEUR ---
+if candidats is not None:
+    with st.sidebar.expander("Recherche recruteur", expanded=False):
+        st.caption(f"{len(candidats)} candidats audités")
+        fiche = st.text_area("Fiche de poste", height=150, placeholder="Collez la description du poste...")
+        nb_candidats = st.number_input("Candidats", min_value=1, max_value=100, value=10)
+        if st.button("Rechercher", use_container_width=True) and fiche:
+            trouves = search_job(sbert, candidats, fiche, n=int(nb_candidats))
+            st.dataframe(pd.DataFrame(trouves, columns=["id", "score", "metier", "score_metier"]),
+                         hide_index=True, use_container_width=True)
+
 # --- EN-TÊTE ---
 st.title("AISCA : Assistant Intelligent de Carrière")
 st.markdown("### Plateforme d'analyse sémantique des compétences")
@@ -81,139 +100,151 @@ if analyze_btn:
         with st.spinner("Traitement analytique en cours..."):
             
             # 1. Enrichissement
-            raw_inputs = [s for s in [exp_text, tech_stack] if s]
+            # La stack est découpée en expressions courtes ("Python, Spark, dbt") :
+            # elles sont enrichies ensemble, par lots, en un seul aller-retour
+            raw_inputs = ([exp_text] if exp_text else []) + split_stack(tech_stack)
             final_inputs = []
             
+            enrichis = genai_coach.enrichir_phrases(raw_inputs)
+
             with st.expander("Voir le détail du traitement sémantique (Debug)", expanded=False):
-                for text in raw_inputs:
-                    enriched = genai_coach.enrichir_phrase_courte(text)
+                for enriched in enrichis:
                     final_inputs.append(enriched)
                     st.text(f"Input traité : {enriched[:100]}...")
 
-            # 2. Calcul
-            resultats = sbert.calculate_scores(final_inputs)
-            
-            top_job = resultats['recommandations_metiers'][0]
-            scores_blocs = resultats['scores_par_bloc'] 
-            top_details = resultats.get('top_competences_details', pd.DataFrame())
-
-            # --- RÉSULTATS ---
-            st.divider()
-            st.subheader("2. Résultats de l'Audit")
-            
-            # SECTION KPIs
-            score_val = float(top_job['score_percent'].strip('%'))
-            
-            k1, k2, k3 = st.columns(3)
-            k1.metric(label="Positionnement Métier", value=top_job['metier'], delta="Profil Dominant")
-            k2.metric(label="Indice de Correspondance", value=top_job['score_percent'])
-            k3.metric(label="Compétences Validées", value=f"{len(top_details)} Skills identifiés")
-
-            st.write("") 
-
-            # SECTION VISUALISATION
-            with st.container(border=True):
-                c_radar, c_bar = st.columns([1, 1])
-
-                with c_radar:
-                    st.markdown("#### Couverture par Domaine")
-                    
-                    # --- TRADUCTION DES NOMS POUR LE GRAPHIQUE ---
-                    # On utilise le dictionnaire REFERENTIEL_NOMS défini en haut
-                    radar_data_translated = {}
-                    for bloc_id, score in scores_blocs.items():
-                        # Si l'ID est dans notre dico, on prend le beau nom, sinon on garde l'ID
-                        nom_affiche = REFERENTIEL_NOMS.get(bloc_id, bloc_id)
-                        radar_data_translated[nom_affiche] = score
-                    
-                    # Création DataFrame
-                    df_radar = pd.DataFrame(dict(
-                        r=list(radar_data_translated.values()),
-                        theta=list(radar_data_translated.keys())
-                    ))
-                    
-                    # Graphique Radar
-                    fig_radar = px.line_polar(
-                        df_radar, r='r', theta='theta', line_close=True,
-                        range_r=[0, 1]
+            # 2. Calcul (CV découpés en phrases / puces : rien n'est tronqué)
+            resultats = sbert.calculate_scores(final_inputs, segment=True)
+            if candidats is not None:
+                index_audits(sbert, candidats, [profile_id(final_inputs)], [final_inputs], [resultats], segment=True)
+
+        # Saisie sans contenu exploitable (ex: "---") : aucun segment, donc aucun résultat
+        if not resultats['recommandations_metiers']:
+            st.warning("Veuillez renseigner au moins une section pour lancer l'audit.")
+            st.stop()
+
+        top_job = resultats['recommandations_metiers'][0]
+        scores_blocs = resultats['scores_par_bloc'] 
+        top_details = resultats.get('top_competences_details', pd.DataFrame())
+
+        # On récupère les noms lisibles pour le prompt IA aussi
+        top_comp_names = [genai_coach.referentiel_map.get(b, b) for b, s in scores_blocs.items() if s > 0.6]
+        # Bio et plan partent tout de suite, en parallèle : ils se génèrent pendant
+        # l'affichage des graphiques, puis le texte s'affiche au fil de l'eau
+        bio_stream = genai_coach.generer_bio_stream(final_inputs, top_job['metier'], top_comp_names)
+        plan_stream = genai_coach.generer_plan_progression_stream(top_job['metier'], scores_blocs)
+
+        # --- RÉSULTATS ---
+        st.divider()
+        st.subheader("2. Résultats de l'Audit")
+        
+        # SECTION KPIs
+        score_val = float(top_job['score_percent'].strip('%'))
+        
+        k1, k2, k3 = st.columns(3)
+        k1.metric(label="Positionnement Métier", value=top_job['metier'], delta="Profil Dominant")
+        k2.metric(label="Indice de Correspondance", value=top_job['score_percent'])
+        k3.metric(label="Compétences Validées", value=f"{len(top_details)} Skills identifiés")
+
+        st.write("") 
+
+        # SECTION VISUALISATION
+        with st.container(border=True):
+            c_radar, c_bar = st.columns([1, 1])
+
+            with c_radar:
+                st.markdown("#### Couverture par Domaine")
+                
+                # --- TRADUCTION DES NOMS POUR LE GRAPHIQUE ---
+                # Noms des blocs issus du référentiel compilé
+                radar_data_translated = {}
+                for bloc_id, score in scores_blocs.items():
+                    # Si l'ID est dans notre dico, on prend le beau nom, sinon on garde l'ID
+                    nom_affiche = genai_coach.referentiel_map.get(bloc_id, bloc_id)
+                    radar_data_translated[nom_affiche] = score
+                
+                # Création DataFrame
+                df_radar = pd.DataFrame(dict(
+                    r=list(radar_data_translated.values()),
+                    theta=list(radar_data_translated.keys())
+                ))
+                
+                # Graphique Radar
+                fig_radar = px.line_polar(
+                    df_radar, r='r', theta='theta', line_close=True,
+                    range_r=[0, 1]
+                )
+                
+                # --- COULEURS FONCÉES (BLEU NUIT) ---
+                fig_radar.update_traces(
+                    fill='toself', 
+                    line_color='#002244',  # Bleu très foncé
+                    fillcolor='rgba(0, 34, 68, 0.5)' # Même bleu avec transparence
+                )
+                
+                # Layout Pro & Dark Mode Compatible
+                fig_radar.update_layout(
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    margin=dict(t=30, b=30, l=40, r=40),
+                    polar=dict(
+                        radialaxis=dict(visible=True, tickfont=dict(size=10)),
+                        angularaxis=dict(
+                            tickfont=dict(size=11, color="#2c3e50"), # Texte gris foncé lisible
+                            rotation=90
+                        )
+                    )
+                )
+                st.plotly_chart(fig_radar, use_container_width=True)
+
+            with c_bar:
+                st.markdown("#### Détail Sémantique (Top 10)")
+                if not top_details.empty:
+                    # Graphique Barres
+                    fig_bar = px.bar(
+                        top_details.sort_values('score', ascending=True), 
+                        x='score', y='Competency', orientation='h',
+                        text_auto='.1%'
                     )
                     
-                    # --- COULEURS FONCÉES (BLEU NUIT) ---
-                    fig_radar.update_traces(
-                        fill='toself', 
-                        line_color='#002244',  # Bleu très foncé
-                        fillcolor='rgba(0, 34, 68, 0.5)' # Même bleu avec transparence
+                    # --- COULEURS FONCÉES (BLEU PÉTROLE) ---
+                    fig_bar.update_traces(
+                        marker_color='#003366', # Bleu foncé uniforme
+                        textfont_color='white'
                     )
                     
-                    # Layout Pro & Dark Mode Compatible
-                    fig_radar.update_layout(
+                    fig_bar.update_layout(
                         paper_bgcolor="rgba(0,0,0,0)",
                         plot_bgcolor="rgba(0,0,0,0)",
-                        margin=dict(t=30, b=30, l=40, r=40),
-                        polar=dict(
-                            radialaxis=dict(visible=True, tickfont=dict(size=10)),
-                            angularaxis=dict(
-                                tickfont=dict(size=11, color="#2c3e50"), # Texte gris foncé lisible
-                                rotation=90
-                            )
-                        )
+                        xaxis_range=[0, 1], 
+                        xaxis_title="Taux de similarité", 
+                        yaxis_title=None,
+                        height=400,
+                        margin=dict(l=0, r=0, t=30, b=0),
                     )
-                    st.plotly_chart(fig_radar, use_container_width=True)
-
-                with c_bar:
-                    st.markdown("#### Détail Sémantique (Top 10)")
-                    if not top_details.empty:
-                        # Graphique Barres
-                        fig_bar = px.bar(
-                            top_details.sort_values('score', ascending=True), 
-                            x='score', y='Competency', orientation='h',
-                            text_auto='.1%'
-                        )
-                        
-                        # --- COULEURS FONCÉES (BLEU PÉTROLE) ---
-                        fig_bar.update_traces(
-                            marker_color='#003366', # Bleu foncé uniforme
-                            textfont_color='white'
-                        )
-                        
-                        fig_bar.update_layout(
-                            paper_bgcolor="rgba(0,0,0,0)",
-                            plot_bgcolor="rgba(0,0,0,0)",
-                            xaxis_range=[0, 1], 
-                            xaxis_title="Taux de similarité", 
-                            yaxis_title=None,
-                            height=400,
-                            margin=dict(l=0, r=0, t=30, b=0),
-                        )
-                        st.plotly_chart(fig_bar, use_container_width=True)
-                    else:
-                        st.info("Aucune donnée détaillée disponible.")
+                    st.plotly_chart(fig_bar, use_container_width=True)
+                else:
+                    st.info("Aucune donnée détaillée disponible.")
+
+        # --- COACHING IA ---
+        st.divider()
+        st.subheader("3. Recommandations Stratégiques")
+        
+        c_bio, c_plan = st.columns(2)
+
+        with c_bio:
+            st.markdown("##### Résumé Exécutif")
+            with st.container(border=True):
+                st.write_stream(bio_stream)
 
-            # --- COACHING IA ---
-            st.divider()
-            st.subheader("3. Recommandations Stratégiques")
-            
-            c_bio, c_plan = st.columns(2)
-            # On récupère les noms lisibles pour le prompt IA aussi
-            top_comp_names = [REFERENTIEL_NOMS.get(b, b) for b, s in scores_blocs.items() if s > 0.6]
-
-            with c_bio:
-                st.markdown("##### Résumé Exécutif")
-                with st.spinner("Génération du profil..."):
-                    bio = genai_coach.generer_bio(final_inputs, top_job['metier'], top_comp_names)
-                st.info(bio)
-
-            with c_plan:
-                st.markdown("##### Plan d'Accélération")
-                with st.spinner("Analyse des axes de progression..."):
-                    plan = genai_coach.generer_plan_progression(top_job['metier'], scores_blocs)
-                
-                with st.container(border=True):
-                    st.markdown(plan)
-
-            # --- FOOTER ---
-            st.divider()
-            st.caption("Autres opportunités identifiées :")
-            cols_footer = st.columns(3)
-            for i, job in enumerate(resultats['recommandations_metiers'][1:4]):
-                cols_footer[i].metric(label=job['metier'], value=job['score_percent'])
+        # Le plan a continué de se générer pendant la bio : la partie déjà reçue s'affiche d'un coup
+        with c_plan:
+            st.markdown("##### Plan d'Accélération")
+            with st.container(border=True):
+                st.write_stream(plan_stream)
+
+        # --- FOOTER ---
+        st.divider()
+        st.caption("Autres opportunités identifiées :")
+        cols_footer = st.columns(3)
+        for i, job in enumerate(resultats['recommandations_metiers'][1:4]):
+            cols_footer[i].metric(label=job['metier'], value=job['score_percent'])
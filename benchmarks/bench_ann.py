@@ -0,0 +1,124 @@
+"""
+Benchmark rappel / latence des index de compétences (src/ann_index.py)
+contre le chemin exact (matrice de similarité dense).
+
+Embeddings synthétiques normalisés, regroupés en thèmes comme ceux d'un
+vrai référentiel ; les saisies sont des variations de compétences tirées
+au hasard. Mesures :
+- recall@N : part des N plus proches exactes retrouvées par saisie,
+- rappel Top-K par bloc et écart max des scores de blocs (Top-K Mean)
+  pour un candidat de plusieurs saisies,
+- latence médiane par saisie (search) et par candidat (max_scores).
+
+Usage :
+    python -m benchmarks.bench_ann --competences 200000 --probes 8 16 32
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.ann_index import FlatIndex, IVFIndex
+from src.scoring import ScoreIndex, normalize_rows
+from tests.support import make_referential
+
+
+def make_embeddings(n, dim=384, n_topics=None, noise=0.6, seed=0):
+    """Vecteurs normalisés regroupés autour de n_topics centres."""
+    rng = np.random.default_rng(seed)
+    n_topics = n_topics or max(1, n // 200)
+    centers = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    topic = rng.integers(0, n_topics, size=n)
+    vectors = centers[topic] + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def make_queries(vectors, n, noise=0.08, seed=1):
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.integers(0, len(vectors), size=n)]
+    return normalize_rows(base + noise * rng.normal(size=base.shape).astype(np.float32))
+
+
+def median_ms(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1e3
+
+
+def dense_search(vectors, queries, n):
+    scores = queries @ vectors.T
+    ids = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    return ids
+
+
+def run(n_competences=50000, n_blocks=40, dim=384, probes=(4, 8, 16, 32), n_queries=200,
+        inputs_per_candidate=8, top_n=10, top_k=5):
+    df_competences, df_metiers = make_referential(n_competences, n_blocks, 10)
+    score_index = ScoreIndex(df_competences, df_metiers, top_k=top_k)
+    vectors = make_embeddings(n_competences, dim=dim)
+    queries = make_queries(vectors, n_queries)
+    candidates = queries.reshape(-1, inputs_per_candidate, dim)
+
+    # Référence exacte
+    exact_ids = dense_search(vectors, queries, top_n)
+    flat = FlatIndex(vectors)
+    exact_max = [flat.max_scores(c) for c in candidates]
+    exact_blocks = [flat.block_top_k(c, score_index.block_members, k=top_k)[1] for c in candidates]
+    exact_block_scores = score_index.block_scores(np.stack(exact_max).astype(np.float64))
+
+    print(f"Référentiel : {n_competences} compétences x {dim}, {n_blocks} blocs, "
+          f"{n_queries} saisies ({len(candidates)} candidats de {inputs_per_candidate})")
+    header = (f"{'index':<14} | {'recall@' + str(top_n):>9} | {'rappel blocs':>12} | {'écart blocs':>11} | "
+              f"{'ms / saisie':>11} | {'ms / candidat':>13}")
+    print(header)
+    print("-" * len(header))
+
+    def report(label, index, build_s=None):
+        _, ids = index.search(queries, n=top_n)
+        recall = np.mean([len(set(a) & set(b)) / top_n for a, b in zip(ids, exact_ids)])
+
+        approx_max = np.stack([index.max_scores(c) for c in candidates]).astype(np.float64)
+        block_error = np.abs(score_index.block_scores(approx_max) - exact_block_scores).max()
+        block_recall = []
+        for c, reference in zip(candidates, exact_blocks):
+            found = index.block_top_k(c, score_index.block_members, k=top_k)[1]
+            for a, b in zip(found, reference):
+                b = set(b[b >= 0])
+                block_recall.append(len(set(a[a >= 0]) & b) / len(b) if b else 1.0)
+
+        search_ms = median_ms(lambda q: index.search(q[None, :], n=top_n), queries[:50])
+        candidate_ms = median_ms(index.max_scores, candidates)
+        suffix = f"  (construction {build_s:.1f}s)" if build_s is not None else ""
+        print(f"{label:<14} | {recall:>9.3f} | {np.mean(block_recall):>12.3f} | {block_error:>11.4f} | "
+              f"{search_ms:>11.2f} | {candidate_ms:>13.2f}{suffix}")
+
+    dense_ms = median_ms(lambda q: dense_search(vectors, q[None, :], top_n), queries[:50])
+    dense_candidate_ms = median_ms(lambda c: (c @ vectors.T).max(axis=0), candidates)
+    print(f"{'dense':<14} | {1.0:>9.3f} | {1.0:>12.3f} | {0.0:>11.4f} | {dense_ms:>11.2f} | {dense_candidate_ms:>13.2f}")
+    report("flat", flat)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors)
+    build_s = time.perf_counter() - start
+    for n_probe in probes:
+        ivf.n_probe = min(n_probe, len(ivf.centroids))
+        report(f"ivf probe={n_probe}", ivf, build_s)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rappel et latence des index de compétences.")
+    parser.add_argument("--competences", type=int, default=50000)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+    run(n_competences=args.competences, n_blocks=args.blocks, dim=args.dim,
+        probes=args.probes, n_queries=args.queries)
+
+
+if __name__ == "__main__":
+    main()
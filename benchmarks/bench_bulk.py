@@ -0,0 +1,68 @@
+"""
+Débit du scoring en masse multi-processus selon le nombre de workers.
+
+Génère des fichiers JSONL de candidats synthétiques, puis lance
+src.bulk_scoring.bulk_score avec 1, 2, 4... workers sur le même référentiel
+(exporté en mémoire mappée). Le temps inclut le démarrage des workers et le
+chargement de leur encodeur.
+
+Usage :
+    python -m benchmarks.bench_bulk --candidates 20000 --files 4 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from src.sbert_engine import SBERTEngine
+from src.bulk_scoring import bulk_score
+from benchmarks.bench_service import PHRASES
+
+
+def write_candidates(directory, n_candidates, n_files, seed=0):
+    """Répartit n_candidates candidats synthétiques dans n_files fichiers JSONL."""
+    rng = random.Random(seed)
+    paths = [os.path.join(directory, f"candidats_{i}.jsonl") for i in range(n_files)]
+    files = [open(p, "w", encoding="utf-8") for p in paths]
+    try:
+        for i in range(n_candidates):
+            inputs = [f"{p} (projet {rng.randint(1, 10**6)})" for p in rng.sample(PHRASES, 3)]
+            files[i % n_files].write(json.dumps({"id": f"c{i}", "inputs": inputs}, ensure_ascii=False) + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def run(n_candidates=20000, n_files=4, worker_counts=(1, 2, 4), data_path="data", unit_size=1000):
+    engine = SBERTEngine(data_path=data_path, index="dense")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_candidates(tmp, n_candidates, n_files)
+        print(f"\n{n_candidates} candidats, {n_files} fichiers, lots de {unit_size}")
+        print(f"{'workers':>7} | {'durée':>8} | {'cand./s':>8} | {'accélération':>12} | {'pic RSS/worker':>14}")
+
+        baseline = None
+        for workers in worker_counts:
+            report = bulk_score(paths, os.path.join(tmp, f"out_{workers}"), workers=workers,
+                                data_path=data_path, unit_size=unit_size, engine=engine)
+            rate = report["candidates_per_s"]
+            baseline = baseline or rate
+            rss = max((w.get("peak_rss_mb") or 0) for w in report["per_worker"].values())
+            print(f"{workers:>7} | {report['seconds']:>7.1f}s | {rate:>8.0f} | {rate / baseline:>11.2f}x | "
+                  f"{rss:>11.0f} Mo")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Débit du scoring en masse par nombre de workers.")
+    parser.add_argument("--candidates", type=int, default=20000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--unit-size", type=int, default=1000)
+    parser.add_argument("--data-path", default="data")
+    args = parser.parse_args(argv)
+    run(args.candidates, args.files, args.workers, args.data_path, args.unit_size)
+
+
+if __name__ == "__main__":
+    main()
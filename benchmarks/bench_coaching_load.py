@@ -0,0 +1,103 @@
+"""
+Test de charge du parcours coaching (enrichissement + bio + plan) contre le
+backend local, derrière le limiteur de débit.
+
+Chaque utilisateur simulé rejoue le parcours de app.py : deux enrichissements
+en parallèle puis bio + plan en parallèle. Une partie des profils est répétée
+pour mesurer l'effet du cache et du single-flight ; les répétitions varient
+la casse, les espaces et l'ordre des blocs (clés de cache canoniques).
+
+Usage :
+    python -m benchmarks.bench_coaching_load --users 50 --latency 0.4 --rate 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.genai_manager import GenAIManager
+from src.llm_backends import LocalBackend, RateLimitedBackend
+
+
+def audit(manager, user_id, distinct_profiles):
+    """Parcours coaching d'un audit ; retourne sa latence en secondes."""
+    profile = user_id % distinct_profiles
+    start = time.perf_counter()
+
+    variant = user_id // distinct_profiles
+    enrichis = manager.generer_en_parallele({
+        "exp": (manager.enrichir_phrase_courte, f"Experience {profile}" + " " * variant),
+        "stack": (manager.enrichir_phrase_courte, f"stack  {profile}" if variant % 2 else f"Stack {profile}"),
+    })
+    final_inputs = list(enrichis.values())
+    blocs = [f"bloc_{b}" for b in range(1, 6)]
+    blocs = blocs[variant % 5:] + blocs[:variant % 5]
+    scores_blocs = {bloc: ((profile + int(bloc[-1])) % 10) / 10 for bloc in blocs}
+
+    manager.generer_en_parallele({
+        "bio": (manager.generer_bio, final_inputs, "Data Engineer", ["Ingénierie Big Data & DevOps"]),
+        "plan": (manager.generer_plan_progression, "Data Engineer", scores_blocs),
+    })
+    return time.perf_counter() - start
+
+
+def run(users=50, concurrency=10, distinct_profiles=20, latency=0.4, jitter=0.2,
+        error_rate=0.0, rate=20.0, burst=20.0, max_concurrency=8):
+    local = LocalBackend(latency=latency, jitter=jitter, error_rate=error_rate, seed=42)
+    backend = RateLimitedBackend(local, rate=rate, burst=burst, max_concurrency=max_concurrency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = GenAIManager(
+            cache_file=os.path.join(tmp, "bench_cache.db"),
+            backend=backend,
+            backoff=0.05
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(lambda u: audit(manager, u, distinct_profiles), range(users)))
+        elapsed = time.perf_counter() - start
+        cache_stats = manager.cache_stats()
+
+    latencies = np.array(latencies)
+    report = {
+        "users": users,
+        "concurrency": concurrency,
+        "throughput_audits_s": users / elapsed,
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "p99_s": float(np.percentile(latencies, 99)),
+        "upstream_calls": local.calls,
+        "calls_per_audit": local.calls / users,
+    }
+    for kind, stats in cache_stats.items():
+        report[f"hit_rate_{kind.lower()}"] = stats["hit_rate"]
+    for name, value in report.items():
+        print(f"{name:<22}: {value:.3f}" if isinstance(value, float) else f"{name:<22}: {value}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Charge du parcours coaching sur backend local.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--distinct-profiles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=20.0, help="Requêtes/s autorisées vers le modèle")
+    parser.add_argument("--burst", type=float, default=20.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+    run(
+        users=args.users, concurrency=args.concurrency, distinct_profiles=args.distinct_profiles,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate=args.rate, burst=args.burst, max_concurrency=args.max_concurrency
+    )
+
+
+if __name__ == "__main__":
+    main()
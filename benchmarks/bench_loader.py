@@ -0,0 +1,78 @@
+"""
+Benchmark de l'ingestion du référentiel (src/data_loader.py).
+
+Génère un export de compétences brut (espaces parasites, lignes malformées,
+compétences vides) de taille croissante, puis mesure get_or_create_clean_data :
+- raw      : premier chargement (lecture par blocs, nettoyage, copie propre),
+- clean    : rechargement de la copie propre (source inchangée),
+- touched  : source ré-enregistrée à l'identique (date modifiée, contenu vérifié),
+- modified : source modifiée (une ligne ajoutée), nouveau nettoyage.
+
+Usage :
+    python -m benchmarks.bench_loader --rows 10000 100000 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from src.data_loader import get_or_create_clean_data, read_clean_data
+
+
+def write_export(path, n_rows, seed=0):
+    """Export CSV brut de n_rows compétences, avec environ 0,1 % de lignes invalides."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("CompetencyID,Competency,BlockID,BlockName\n")
+        for i in range(n_rows):
+            kind = rng.random()
+            if kind < 0.0005:
+                f.write(f"C{i},ligne,malformée,avec,trop,de,champs\n")
+            elif kind < 0.001:
+                f.write(f"C{i},,bloc_{i % 50},Bloc {i % 50}\n")
+            else:
+                f.write(f'C{i},"  [Sous-bloc {i % 300}]  compétence   n°{i}\tavec  ""outil"" ",'
+                        f"bloc_{i % 50},Bloc {i % 50}\n")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(sizes):
+    logging.getLogger("DataCleaner").setLevel(logging.ERROR)
+    print(f"{'lignes':>9} | {'Mo':>6} | {'raw':>7} | {'clean':>7} | {'touched':>7} | {'modified':>8} | écartées")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            raw = os.path.join(tmp, f"competences_{n_rows}.csv")
+            clean = os.path.join(tmp, f"competences_{n_rows}_clean.csv")
+            write_export(raw, n_rows)
+            load = lambda: get_or_create_clean_data(raw, clean)
+
+            _, t_raw = timed(load)
+            _, t_clean = timed(load)
+            os.utime(raw)
+            _, t_touched = timed(load)
+            with open(raw, "a", encoding="utf-8") as f:
+                f.write("CX,nouvelle compétence,bloc_1,Bloc 1\n")
+            df, t_modified = timed(load)
+            assert df["CompetencyID"].iloc[-1] == "CX", "copie propre périmée servie"
+
+            dropped = read_clean_data(raw)[1]["dropped"]
+            print(f"{n_rows:>9} | {os.path.getsize(raw) / 2**20:>6.1f} | {t_raw:>6.2f}s | {t_clean:>6.2f}s | "
+                  f"{t_touched:>6.2f}s | {t_modified:>7.2f}s | {dropped}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion du référentiel brut.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args(argv)
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
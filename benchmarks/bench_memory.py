@@ -0,0 +1,179 @@
+"""
+Benchmark mémoire du scoring : calcul des similarités puis chemin complet du moteur.
+
+1. Similarités seules. Pour un CV de n saisies et un référentiel de N
+   compétences, on mesure avec tracemalloc (NumPy y déclare ses allocations)
+   le pic de mémoire de travail de :
+   - dense : embeddings de toutes les saisies puis matrice (saisies x N) et max,
+   - tuiles : accumulate_max_scores, saisies encodées par lots de input_tile et
+     compétences parcourues par tuiles de vector_tile.
+   Borne vérifiée pour le mode tuiles, indépendante de n :
+       sortie (N) + lot d'embeddings + 2 tuiles (input_tile x vector_tile) + marge.
+
+2. Moteur : pic de SBERTEngine.calculate_scores_batch (découpage, encodage
+   hors ligne HashEncoder, similarités, Top-K par bloc, métiers, résultats)
+   pour c candidats de n lignes. Borne vérifiée, indépendante de n :
+       max courant float32 (c x N) + tuiles de similarités + tuiles du Top-K
+       par bloc (ScoreIndex.block_scores) + résultats (c x Top 10) + marge.
+
+Le référentiel est alloué avant la mesure (il est partagé par toutes les
+requêtes).
+
+Usage :
+    python -m benchmarks.bench_memory --inputs 100 1000 10000 --competences 120 20000 100000
+    python -m benchmarks.bench_memory --candidates 1 32 256 --lines 10 200
+Code de sortie 1 si une borne est dépassée.
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from src.sbert_engine import SBERTEngine
+from src.scoring import accumulate_max_scores, normalize_rows
+from tests.support import HashEncoder, make_cv, write_raw_referential
+
+DIM = 384
+FLOAT = 4
+
+
+def fake_encode(n, start=0):
+    """Embeddings déterministes pour les saisies start..start+n (tient lieu de modèle)."""
+    rng = np.random.default_rng(start)
+    return rng.standard_normal((n, DIM), dtype=np.float32)
+
+
+def dense_peak(vectors, n_inputs, input_tile):
+    tracemalloc.start()
+    # Mêmes embeddings que le mode tuiles, encodés d'un bloc
+    queries = normalize_rows(np.concatenate([
+        fake_encode(min(input_tile, n_inputs - start), start) for start in range(0, n_inputs, input_tile)
+    ]))
+    max_scores = (queries @ vectors.T).max(axis=0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, max_scores
+
+
+def tiled_peak(vectors, n_inputs, input_tile, vector_tile):
+    tracemalloc.start()
+    max_scores = np.full((1, len(vectors)), -np.inf, dtype=np.float32)
+    for start in range(0, n_inputs, input_tile):
+        size = min(input_tile, n_inputs - start)
+        queries = normalize_rows(fake_encode(size, start))
+        accumulate_max_scores(max_scores, queries, np.zeros(size, dtype=np.int64), vectors, vector_tile)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, max_scores[0]
+
+
+def bound(n_competences, input_tile, vector_tile):
+    output = n_competences * FLOAT
+    embeddings = 2 * input_tile * DIM * FLOAT
+    tiles = 2 * input_tile * min(vector_tile, n_competences) * FLOAT
+    return output * 2 + embeddings + tiles + 1024 * 1024
+
+
+def engine_bound(engine, n_candidates, block_elements=1 << 20, per_result=64 * 1024):
+    n_competences = len(engine.competence_unit)
+    accumulator = n_candidates * n_competences * FLOAT
+    similarities = bound(n_competences, engine.input_tile, engine.vector_tile)
+    # Tuile du Top-K : sélection, négation, partition (float32) puis K meilleurs en float64
+    blocks = 4 * min(block_elements, n_candidates * engine.score_index.block_members.size) * FLOAT * 2
+    return accumulator * 2 + similarities + blocks + n_candidates * per_result
+
+
+def engine_peak(engine, n_candidates, n_lines):
+    candidates = [[make_cv(n_lines, seed=c)] for c in range(n_candidates)]
+    # Imports paresseux et premières allocations hors mesure
+    engine.calculate_scores_batch(candidates[:1], segment=True)
+    tracemalloc.start()
+    engine.calculate_scores_batch(candidates, segment=True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_similarities(inputs, competences, input_tile, vector_tile, skip_dense_above=2e9):
+    ok = True
+    header = f"{'compétences':>11} | {'saisies':>8} | {'dense':>10} | {'tuiles':>10} | {'borne':>10} | écart max"
+    print(header)
+    print("-" * len(header))
+
+    for n_competences in competences:
+        vectors = normalize_rows(np.random.default_rng(0).standard_normal((n_competences, DIM), dtype=np.float32))
+        limit = bound(n_competences, input_tile, vector_tile)
+
+        for n_inputs in inputs:
+            tiled, tiled_scores = tiled_peak(vectors, n_inputs, input_tile, vector_tile)
+            if n_inputs * n_competences * FLOAT <= skip_dense_above:
+                dense, dense_scores = dense_peak(vectors, n_inputs, input_tile)
+                dense_label = f"{dense / 2**20:8.1f}Mo"
+                diff = f"{np.abs(dense_scores - tiled_scores).max():.1e}"
+            else:
+                dense_label, diff = "(ignoré)", "-"
+
+            ok = ok and tiled <= limit
+            print(f"{n_competences:>11} | {n_inputs:>8} | {dense_label:>10} | {tiled / 2**20:8.1f}Mo | "
+                  f"{limit / 2**20:8.1f}Mo | {diff}")
+    return ok
+
+
+def run_engine(competences, candidates, lines, input_tile, vector_tile):
+    ok = True
+    header = f"{'compétences':>11} | {'candidats':>9} | {'lignes':>7} | {'pic':>10} | {'borne':>10}"
+    print(header)
+    print("-" * len(header))
+
+    work_dir = tempfile.mkdtemp(prefix="aisca_mem_")
+    try:
+        for n_competences in competences:
+            directory = f"{work_dir}/ref_{n_competences}"
+            write_raw_referential(directory, n_competences)
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = SBERTEngine(data_path=directory, encoder=HashEncoder(), index="dense", query_cache_size=0,
+                                     input_tile=input_tile, vector_tile=vector_tile)
+            for n_candidates in candidates:
+                limit = engine_bound(engine, n_candidates)
+                for n_lines in lines:
+                    peak = engine_peak(engine, n_candidates, n_lines)
+                    ok = ok and peak <= limit
+                    print(f"{n_competences:>11} | {n_candidates:>9} | {n_lines:>7} | {peak / 2**20:8.1f}Mo | "
+                          f"{limit / 2**20:8.1f}Mo")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ok
+
+
+def run(inputs=(100, 1000, 10000), competences=(120, 20000, 100000), candidates=(1, 32, 256), lines=(10, 200),
+        input_tile=256, vector_tile=4096):
+    ok = run_similarities(inputs, competences, input_tile, vector_tile)
+    print()
+    ok = run_engine(competences, candidates, lines, input_tile, vector_tile) and ok
+    if not ok:
+        print("[ERREUR] Pic mémoire au-dessus de la borne.")
+        return False
+    print("[SUCCES] Pic mémoire borné, indépendant du nombre de saisies.")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pic mémoire du calcul des similarités et du moteur.")
+    parser.add_argument("--inputs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--competences", type=int, nargs="+", default=[120, 20000, 100000])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 200], help="Lignes par CV (moteur)")
+    parser.add_argument("--input-tile", type=int, default=256)
+    parser.add_argument("--vector-tile", type=int, default=4096)
+    args = parser.parse_args(argv)
+    if not run(args.inputs, args.competences, args.candidates, args.lines, args.input_tile, args.vector_tile):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
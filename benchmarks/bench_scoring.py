@@ -0,0 +1,56 @@
+"""
+Benchmark + test d'équivalence du scoring vectorisé (ScoreIndex) contre
+l'ancienne implémentation pandas (groupby/apply + iterrows).
+
+Aucun modèle n'est chargé : on génère des référentiels synthétiques et des
+scores de similarité aléatoires, seule l'agrégation est mesurée. L'implémentation
+de référence est dans tests/support.py ; le test d'équivalence tourne aussi
+avec pytest (tests/test_scoring.py).
+
+Usage :
+    python -m benchmarks.bench_scoring
+"""
+import time
+
+from src.scoring import ScoreIndex
+from tests.support import check_equivalence, make_referential, random_max_scores, reference_scores
+
+
+def run(sizes=((120, 5, 4), (1_000, 10, 20), (10_000, 20, 50)), n_candidates=50):
+    for n_competences, n_blocks, n_jobs in sizes:
+        df_competences, df_metiers = make_referential(n_competences, n_blocks, n_jobs)
+        max_scores = random_max_scores(n_candidates, n_competences)
+
+        start = time.perf_counter()
+        index = ScoreIndex(df_competences, df_metiers)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [reference_scores(df_competences, df_metiers, row) for row in max_scores]
+        pandas_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [index.score(row[None, :])[0] for row in max_scores]
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = index.score(max_scores)
+        batch_s = time.perf_counter() - start
+
+        for e, a, b in zip(expected, actual, batched):
+            check_equivalence(e, a)
+            check_equivalence(e, b)
+
+        print(
+            f"{n_competences:>7} compétences / {n_jobs:>3} métiers | "
+            f"pandas {pandas_s / n_candidates * 1e3:8.2f} ms/cand | "
+            f"vectorisé {single_s / n_candidates * 1e3:7.2f} ms/cand "
+            f"(x{pandas_s / single_s:5.1f}) | "
+            f"lot {batch_s / n_candidates * 1e3:7.2f} ms/cand "
+            f"(x{pandas_s / batch_s:5.1f}) | index {build_s * 1e3:.0f} ms"
+        )
+    print("[SUCCES] Résultats identiques à l'implémentation pandas.")
+
+
+if __name__ == "__main__":
+    run()
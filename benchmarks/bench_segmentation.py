@@ -0,0 +1,73 @@
+"""
+Benchmark du découpage des CV et du scoring segmenté.
+
+1. Découpage seul (src/segmentation.py) sur des CV synthétiques de taille
+   croissante : segments produits et débit en Ko/s, lus depuis un fichier.
+2. Avec --encode : scoring complet (SBERTEngine.calculate_scores_batch,
+   segment=True) pour chaque taille de CV et chaque taille de lot d'encodage ;
+   le débit en segments/s doit rester stable quand le document grossit.
+   Nécessite le modèle ; le cache des requêtes est désactivé.
+
+Usage :
+    python -m benchmarks.bench_segmentation
+    python -m benchmarks.bench_segmentation --encode --batch-sizes 32 64 128 256
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.segmentation import iter_segments, dedupe
+from tests.support import make_cv
+
+def bench_segmentation(sizes):
+    print(f"{'lignes':>8} | {'Ko':>8} | {'segments':>9} | {'uniques':>8} | {'Ko/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_lines in sizes:
+            path = os.path.join(tmp, f"cv_{n_lines}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(make_cv(n_lines))
+            size_kb = os.path.getsize(path) / 1024
+
+            start = time.perf_counter()
+            with open(path, "r", encoding="utf-8") as f:
+                total = sum(1 for _ in iter_segments(f))
+            with open(path, "r", encoding="utf-8") as f:
+                unique = sum(1 for _ in dedupe(iter_segments(f)))
+            elapsed = (time.perf_counter() - start) / 2
+            print(f"{n_lines:>8} | {size_kb:>8.0f} | {total:>9} | {unique:>8} | {size_kb / elapsed:>9.0f}")
+
+
+def bench_encoding(sizes, batch_sizes, data_path):
+    from src.sbert_engine import SBERTEngine
+
+    engine = SBERTEngine(data_path=data_path, query_cache_size=0)
+    engine.warm_up(background=False)
+
+    print(f"\n{'lignes':>8} | {'segments':>9} | " + " | ".join(f"{'lot ' + str(b):>10}" for b in batch_sizes))
+    for n_lines in sizes:
+        cv = make_cv(n_lines, seed=n_lines)
+        n_segments = sum(1 for _ in dedupe(iter_segments(cv)))
+        rates = []
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            engine.calculate_scores_batch([[cv]], batch_size=batch_size, segment=True)
+            rates.append(n_segments / (time.perf_counter() - start))
+        print(f"{n_lines:>8} | {n_segments:>9} | " + " | ".join(f"{r:>8.0f}/s" for r in rates))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Découpage des CV et scoring segmenté.")
+    parser.add_argument("--lines", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--encode", action="store_true", help="Mesurer aussi l'encodage (modèle requis)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--data-path", default="data")
+    args = parser.parse_args(argv)
+
+    bench_segmentation(args.lines)
+    if args.encode:
+        bench_encoding([n for n in args.lines if n <= 5000], args.batch_sizes, args.data_path)
+
+
+if __name__ == "__main__":
+    main()
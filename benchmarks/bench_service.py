@@ -0,0 +1,84 @@
+"""
+Test de charge du service de scoring : débit avec et sans micro-batching.
+
+Le service (src/scoring_service.py) tourne dans ce processus sur un port
+local ; des clients HTTP simultanés envoient chacun des candidats différents
+(cache des requêtes désactivé). Chaque configuration (max_batch, max_wait)
+est mesurée sur le même moteur ; max_batch=1 équivaut à un encodage par
+requête, comme dans l'application Streamlit seule.
+
+Usage :
+    python -m benchmarks.bench_service --clients 32 --requests 20
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.sbert_engine import SBERTEngine
+from src.scoring_client import ScoringClient
+from src.scoring_service import ScoringService
+
+PHRASES = [
+    "Nettoyage de données avec pandas", "Modèles de classification scikit-learn", "Pipelines Spark sur Databricks",
+    "Tableaux de bord Power BI", "API REST en Python", "Orchestration Airflow", "Requêtes SQL analytiques",
+    "Déploiement Docker et Kubernetes", "Deep learning PyTorch", "Qualité et gouvernance des données",
+]
+
+
+def make_candidate(rng):
+    return [f"{p} (projet {rng.randint(1, 10**6)})" for p in rng.sample(PHRASES, 3)]
+
+
+def load(port, clients, requests_per_client, seed=0):
+    """Lance clients threads qui enchaînent chacun requests_per_client requêtes."""
+    client = ScoringClient(f"http://127.0.0.1:{port}", timeout=120)
+
+    def worker(position):
+        rng = random.Random(seed * 1000 + position)
+        latencies = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            client.calculate_scores(make_candidate(rng))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        latencies = [l for result in pool.map(worker, range(clients)) for l in result]
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.array(latencies) * 1e3, client.latency()
+
+
+def run(data_path="data", clients=32, requests_per_client=20, configs=((1, 0.0), (32, 0.005), (32, 0.010))):
+    engine = SBERTEngine(data_path=data_path, query_cache_size=0)
+    engine.warm_up(background=False)
+
+    print(f"{clients} clients x {requests_per_client} requêtes")
+    print(f"{'max_batch':>9} | {'attente':>8} | {'req/s':>8} | {'p50':>8} | {'p95':>8} | {'lot moyen':>9}")
+    for port, (max_batch, max_wait) in enumerate(configs, start=8790):
+        service = ScoringService(engine, max_batch=max_batch, max_wait=max_wait)
+        ready = threading.Event()
+        threading.Thread(target=lambda: asyncio.run(service.serve("127.0.0.1", port, ready)), daemon=True).start()
+        ready.wait()
+
+        throughput, latencies, report = load(port, clients, requests_per_client, seed=port)
+        print(f"{max_batch:>9} | {max_wait * 1e3:>6.0f}ms | {throughput:>8.1f} | {np.percentile(latencies, 50):>6.0f}ms | "
+              f"{np.percentile(latencies, 95):>6.0f}ms | {report['mean_batch_size']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Débit du service de scoring avec micro-batching.")
+    parser.add_argument("--data-path", default="data")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20, help="Requêtes par client")
+    args = parser.parse_args(argv)
+    run(data_path=args.data_path, clients=args.clients, requests_per_client=args.requests)
+
+
+if __name__ == "__main__":
+    main()
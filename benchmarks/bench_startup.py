@@ -0,0 +1,71 @@
+"""
+Benchmark du démarrage à froid, étape par étape.
+
+Chaque mesure tourne dans un processus Python neuf (imports réellement à froid) :
+- import_s : import de src.sbert_engine et src.genai_manager,
+- data_load_s : SBERTEngine() (CSV, index de scoring, cache d'embeddings),
+- genai_init_s : GenAIManager() (cache SQLite, configuration du backend),
+- ui_ready_s : somme des trois, temps avant que la page puisse s'afficher,
+- model_load_s : warm_up() synchrone (torch, sentence-transformers, modèle).
+
+Usage :
+    python -m benchmarks.bench_startup --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, os, sys, tempfile, time
+t0 = time.perf_counter()
+from src.sbert_engine import SBERTEngine
+from src.genai_manager import GenAIManager
+t1 = time.perf_counter()
+engine = SBERTEngine(data_path=sys.argv[1])
+t2 = time.perf_counter()
+coach = GenAIManager(cache_file=os.path.join(tempfile.mkdtemp(), "startup.db"), bundle=engine.state.bundle)
+t3 = time.perf_counter()
+engine.warm_up(background=False)
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "data_load_s": t2 - t1,
+    "genai_init_s": t3 - t2,
+    "ui_ready_s": t3 - t0,
+    "model_load_s": t4 - t3,
+}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(data_path):
+    """Lance un processus neuf et retourne ses temps par étape."""
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, data_path],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs=3, data_path="data"):
+    samples = [measure_once(data_path) for _ in range(runs)]
+    report = {stage: statistics.median(s[stage] for s in samples) for stage in samples[0]}
+    for stage, seconds in report.items():
+        print(f"{stage:<14}: {seconds * 1e3:8.1f} ms (médiane sur {runs})")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid par étape.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--data-path", default="data")
+    args = parser.parse_args(argv)
+    run(runs=args.runs, data_path=args.data_path)
+
+
+if __name__ == "__main__":
+    main()
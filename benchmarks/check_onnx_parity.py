@@ -0,0 +1,131 @@
+"""
+Contrôle de parité + benchmark de l'encodeur ONNX int8 contre PyTorch fp32.
+
+1. Parité : les deux encodeurs encodent le référentiel et des saisies types ;
+   l'écart maximal entre leurs similarités cosinus doit rester sous
+   ONNX_TOLERANCE (src/encoders.py). On vérifie aussi que le classement des
+   métiers (Top 1) est identique.
+2. Performance : latence d'encodage d'une requête (1 phrase et lot de 8)
+   et mémoire résidente (pic RSS), chaque encodeur dans un processus neuf.
+
+Usage :
+    python -m benchmarks.check_onnx_parity --threads 4
+Code de sortie 1 si la tolérance est dépassée.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from src.encoders import ONNX_TOLERANCE, create_encoder
+from src.scoring import normalize_rows
+
+QUERIES = [
+    "Je nettoie des données avec pandas et je fais des graphiques",
+    "J'ai entraîné des modèles de classification avec scikit-learn",
+    "Mise en production d'API REST avec Docker et Kubernetes",
+    "Requêtes SQL complexes et modélisation de bases de données",
+    "Deep learning avec PyTorch pour la vision par ordinateur",
+    "Tableaux de bord Power BI pour le suivi commercial",
+    "NLP",
+    "Gestion de projet agile et communication avec les métiers",
+]
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from src.encoders import create_encoder
+encoder = create_encoder(sys.argv[1], sys.argv[2], data_path=sys.argv[3], num_threads=int(sys.argv[4]) or None)
+encoder.encode(["warm-up"], convert_to_numpy=True)
+load_s = time.perf_counter() - t0
+queries = json.loads(sys.argv[5])
+
+def timed(texts, repeats=20):
+    samples = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        encoder.encode(texts, convert_to_numpy=True)
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+def peak_rss_mb():
+    # VmHWM (et non ru_maxrss, hérité du processus parent au fork)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+print(json.dumps({
+    "load_s": load_s,
+    "query_1_ms": timed(queries[:1]) * 1e3,
+    "query_8_ms": timed(queries) * 1e3,
+    "peak_rss_mb": peak_rss_mb(),
+}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def check_parity(model_name, data_path, threads):
+    """Écart max des similarités cosinus et accord des métiers Top 1."""
+    from src.sbert_engine import SBERTEngine
+
+    engine = SBERTEngine(data_path=data_path, encoder="torch")
+    competences = engine.df_competences['Competency'].astype(str).tolist()
+
+    sims = {}
+    for name in ("torch", "onnx-int8"):
+        encoder = create_encoder(name, model_name, data_path=data_path, num_threads=threads)
+        ref = normalize_rows(encoder.encode(competences, convert_to_numpy=True))
+        query = normalize_rows(encoder.encode(QUERIES, convert_to_numpy=True))
+        sims[name] = query @ ref.T
+
+    max_diff = float(np.abs(sims["torch"] - sims["onnx-int8"]).max())
+
+    top_jobs = {}
+    for name, cosine in sims.items():
+        results = engine.score_index.score(cosine.astype(np.float64))
+        top_jobs[name] = [r["recommandations_metiers"][0]["metier"] for r in results]
+    agreement = np.mean([a == b for a, b in zip(top_jobs["torch"], top_jobs["onnx-int8"])])
+
+    return max_diff, float(agreement)
+
+
+def measure(name, model_name, data_path, threads):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, name, model_name, data_path, str(threads or 0), json.dumps(QUERIES)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parité et performance de l'encodeur ONNX int8.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--data-path", default="data")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    max_diff, agreement = check_parity(args.model, args.data_path, args.threads)
+    print(f"Écart max des similarités : {max_diff:.4f} (tolérance {ONNX_TOLERANCE})")
+    print(f"Accord du métier Top 1    : {agreement:.0%}")
+
+    print(f"\n{'encodeur':<10} | {'chargement':>10} | {'1 requête':>10} | {'lot de 8':>10} | {'pic RSS':>9}")
+    for name in ("torch", "onnx-int8"):
+        m = measure(name, args.model, args.data_path, args.threads)
+        print(f"{name:<10} | {m['load_s']:>9.2f}s | {m['query_1_ms']:>8.1f}ms | "
+              f"{m['query_8_ms']:>8.1f}ms | {m['peak_rss_mb']:>6.0f} Mo")
+
+    if max_diff > ONNX_TOLERANCE:
+        print("[ERREUR] Tolérance dépassée : ne pas activer l'encodeur ONNX.")
+        sys.exit(1)
+    print("[SUCCES] Encodeur ONNX int8 dans la tolérance.")
+
+
+if __name__ == "__main__":
+    main()
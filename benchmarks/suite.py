@@ -0,0 +1,304 @@
+"""
+Suite de benchmarks des chemins critiques, avec seuils de régression.
+
+Référentiels synthétiques de taille croissante (120 -> 100 000 compétences,
+CSV bruts écrits dans un dossier temporaire) et CV de longueur croissante.
+Couvre :
+- loader    : get_or_create_clean_data, fichier brut (nettoyage) puis fichier propre,
+- startup   : SBERTEngine() sans référentiel compilé ni cache d'embeddings
+              (compilation + encodage complet) puis avec,
+- scoring   : calculate_scores par étape (découpage, encodage, similarités,
+              blocs, métiers, mise en forme) et de bout en bout,
+- genai     : GenAIManager._generate sur un défaut de cache puis un hit,
+              avec le backend local (aucune clé API).
+
+Par défaut l'encodeur "hash" (déterministe, sans modèle) isole le coût du
+code de l'application ; --encoder torch ou onnx-int8 mesure le vrai modèle.
+
+Les résultats (secondes, médiane de --repeats mesures) sont écrits en JSON.
+Les seuils de benchmarks/thresholds.json sont relatifs : chaque métrique est
+comparée à un multiple de "calibration", une charge fixe (NumPy + Python)
+mesurée dans le même run, pour que les seuils suivent la vitesse de la
+machine. --update-thresholds les recalcule (mesure x --margin). Avec
+--baseline, chaque métrique est aussi comparée à un run précédent
+(--max-slowdown). Les métriques sous 10 ms (bruit) n'ont pas de seuil et
+ne sont pas vérifiées.
+Code de sortie 1 en cas de régression.
+
+Usage :
+    python -m benchmarks.suite                        # tailles 120, 1 000, 10 000
+    python -m benchmarks.suite --full                 # jusqu'à 100 000 compétences
+    python -m benchmarks.suite --baseline ancien.json --output nouveau.json
+    python -m benchmarks.suite --full --update-thresholds
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_loader import get_or_create_clean_data
+from src.sbert_engine import SBERTEngine
+from src.genai_manager import GenAIManager
+from src.llm_backends import LocalBackend
+from src.scoring import accumulate_max_scores, normalize_rows
+from tests.support import HashEncoder, make_cv, write_raw_referential
+
+QUICK_SIZES = (120, 1000, 10000)
+FULL_SIZES = QUICK_SIZES + (100000,)
+INPUT_LENGTHS = (1, 10, 100, 1000)
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+# Métriques dominées par une attente simulée (latence du backend local) : pas de seuil relatif
+NOT_CALIBRATED = {"genai.generate.miss"}
+# Sous ce temps, une mesure est du bruit : ni seuil écrit, ni vérification
+MIN_SECONDS = 0.01
+
+
+def median_time(fn, repeats, setup=None):
+    """Médiane du temps d'exécution de fn (setup, non mesuré, est rejoué avant chaque mesure)."""
+    samples = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def calibrate(repeats):
+    """
+    Charge de référence, indépendante du code de l'application : produit
+    matriciel et tri (NumPy) puis dictionnaire de chaînes (Python).
+    Sa durée sert d'unité aux seuils de régression.
+    """
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((256, 384), dtype=np.float32)
+    vectors = rng.standard_normal((4096, 384), dtype=np.float32)
+    words = [f"competence {i}" for i in range(50000)]
+
+    def workload():
+        np.sort(queries @ vectors.T, axis=1)
+        {word: word.upper().split() for word in words}
+
+    return median_time(workload, max(repeats, 5))
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def bench_loader(directory, n, repeats):
+    raw = os.path.join(directory, "competences.csv")
+    clean = os.path.join(directory, "competences_clean.csv")
+    return {
+        f"loader.raw.n={n}": median_time(lambda: get_or_create_clean_data(raw, clean), repeats,
+                                         setup=lambda: _remove(clean)),
+        f"loader.clean.n={n}": median_time(lambda: get_or_create_clean_data(raw, clean), repeats),
+    }
+
+
+def engine_encoder(name):
+    """"hash" : encodeur hors ligne des benchmarks ; sinon le nom, résolu par le moteur."""
+    return HashEncoder() if name == "hash" else name
+
+
+def bench_startup(directory, n, encoder, repeats):
+    cache = [os.path.join(directory, name) for name in ("embeddings_cache.npy", "embeddings_cache.json",
+                                                        "referentiel.bundle")]
+    make = lambda: SBERTEngine(data_path=directory, encoder=engine_encoder(encoder), index="dense")
+    # Sans cache : un seul run au-delà de 10 000 compétences (encodage complet)
+    cold_repeats = repeats if n <= 10000 else 1
+    return {
+        f"startup.cold.n={n}": median_time(make, cold_repeats, setup=lambda: _remove(*cache)),
+        f"startup.warm.n={n}": median_time(make, repeats),
+    }
+
+
+def bench_scoring(engine, n, lengths, repeats):
+    """Étapes de calculate_scores pour un CV de `length` phrases, puis le bout en bout."""
+    results = {}
+    index = engine.score_index
+    for length in lengths:
+        document = make_cv(length, seed=length)
+        prefix = f"scoring.n={n}.len={length}"
+        state = {}
+
+        def prepare():
+            state["texts"] = [text for _, text in engine._iter_inputs([[document]], segment=True)]
+
+        def encode():
+            state["queries"] = normalize_rows(engine._encode_inputs(state["texts"]))
+
+        def similarity():
+            max_scores = np.full((1, len(engine.competence_unit)), -np.inf, dtype=np.float32)
+            for start in range(0, len(state["queries"]), engine.input_tile):
+                tile = state["queries"][start:start + engine.input_tile]
+                accumulate_max_scores(max_scores, tile, np.zeros(len(tile), dtype=np.int64),
+                                      engine.competence_unit, engine.vector_tile)
+            state["max_scores"] = max_scores
+
+        def blocks():
+            state["blocks"] = index.block_scores(state["max_scores"])
+
+        def jobs():
+            state["jobs"] = index.job_scores(state["blocks"])
+
+        def result():
+            index.build_result(state["max_scores"][0], state["blocks"][0], state["jobs"][0])
+
+        for stage, fn in (("prepare", prepare), ("encode", encode), ("similarity", similarity),
+                          ("blocks", blocks), ("jobs", jobs), ("result", result)):
+            results[f"{prefix}.{stage}"] = median_time(fn, repeats)
+        results[f"{prefix}.total"] = median_time(
+            lambda: engine.calculate_scores_batch([[document]], segment=True), repeats
+        )
+    return results
+
+
+def bench_genai(directory, repeats, latency=0.05):
+    coach = GenAIManager(
+        cache_file=os.path.join(directory, "genai_bench.db"),
+        backend=LocalBackend(latency=latency)
+    )
+    counter = iter(range(10 ** 9))
+    misses = median_time(lambda: coach._generate(f"prompt de benchmark {next(counter)}", "BENCH"), repeats)
+    coach._generate("prompt en cache", "BENCH")
+    hits = median_time(lambda: coach._generate("prompt en cache", "BENCH"), repeats * 10)
+    return {
+        "genai.generate.miss": misses,
+        "genai.generate.miss_overhead": max(0.0, misses - latency),
+        "genai.generate.hit": hits,
+    }
+
+
+def run_suite(sizes, lengths, encoder="hash", repeats=3, verbose=False):
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="aisca_bench_")
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        results["calibration"] = calibrate(repeats)
+        with quiet:
+            for n in sizes:
+                directory = os.path.join(work_dir, f"ref_{n}")
+                write_raw_referential(directory, n)
+                results.update(bench_loader(directory, n, repeats))
+                results.update(bench_startup(directory, n, encoder, repeats))
+
+                engine = SBERTEngine(data_path=directory, encoder=engine_encoder(encoder), index="dense",
+                                     query_cache_size=0)
+                engine.warm_up(background=False)
+                results.update(bench_scoring(engine, n, lengths, repeats))
+                print(f"[INFO] Référentiel de {n} compétences mesuré.", file=sys.stderr)
+            results.update(bench_genai(work_dir, repeats))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def check_regressions(results, thresholds, baseline=None, max_slowdown=2.0, min_seconds=MIN_SECONDS):
+    """
+    Liste des régressions : métrique au-dessus de son seuil (multiple de la
+    calibration du même run), ou plus de max_slowdown fois plus lente que dans
+    baseline. Les métriques sous min_seconds (bruit) sont ignorées.
+    """
+    unit = results.get("calibration")
+    failures = []
+    for name, seconds in results.items():
+        if name == "calibration" or seconds <= min_seconds:
+            continue
+        ratio = thresholds.get(name)
+        if ratio is not None and unit and seconds > ratio * unit:
+            failures.append(f"{name} : {seconds * 1e3:.1f} ms > seuil {ratio} x calibration "
+                            f"({ratio * unit * 1e3:.1f} ms)")
+        previous = (baseline or {}).get(name)
+        if previous and seconds > previous * max_slowdown:
+            failures.append(f"{name} : {seconds * 1e3:.1f} ms, x{seconds / previous:.2f} vs référence")
+    return failures
+
+
+def relative_thresholds(results, margin=3.0, min_seconds=MIN_SECONDS):
+    """
+    Seuils relatifs (multiples de la calibration) : mesure du run x margin.
+    Les métriques sous min_seconds, que check_regressions ignore, n'en ont pas.
+    """
+    unit = results["calibration"]
+    return {name: float(f"{seconds / unit * margin:.3g}") for name, seconds in results.items()
+            if name != "calibration" and name not in NOT_CALIBRATED and seconds > min_seconds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques avec seuils de régression.")
+    parser.add_argument("--full", action="store_true", help="Inclure le référentiel de 100 000 compétences")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(INPUT_LENGTHS))
+    parser.add_argument("--encoder", default="hash", help="hash (défaut), torch ou onnx-int8")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    parser.add_argument("--baseline", default=None, help="Résultats JSON d'un run précédent")
+    parser.add_argument("--max-slowdown", type=float, default=2.0)
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help="Réécrire --thresholds depuis ce run (encodeur hash)")
+    parser.add_argument("--margin", type=float, default=3.0, help="Marge des seuils recalculés")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else QUICK_SIZES)
+    results = run_suite(sizes, args.lengths, encoder=args.encoder, repeats=args.repeats, verbose=args.verbose)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "encoder": args.encoder,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, seconds in results.items():
+        print(f"{name:<45} {seconds * 1e3:10.2f} ms")
+
+    if args.update_thresholds and args.encoder == "hash":
+        with open(args.thresholds, "w", encoding="utf-8") as f:
+            json.dump(relative_thresholds(results, args.margin), f, indent=2)
+        print(f"[SUCCES] Seuils relatifs écrits dans {args.thresholds} (marge x{args.margin})")
+
+    # Les seuils sont calibrés pour l'encodeur "hash"
+    thresholds = {}
+    if args.encoder == "hash" and os.path.exists(args.thresholds):
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    failures = check_regressions(results, thresholds, baseline, args.max_slowdown)
+    if failures:
+        print("[ERREUR] Régressions détectées :")
+        for failure in failures:
+            print(f" - {failure}")
+        sys.exit(1)
+    print(f"[SUCCES] Aucune régression ({len(results)} métriques) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Index de recherche des plus proches compétences (similarité cosinus).
+
+- FlatIndex : recherche exacte, par tuiles de compétences : la matrice
+  complète (saisies x compétences) n'est jamais construite.
+- IVFIndex : recherche approchée par listes inversées. Les compétences sont
+  réparties en n_lists groupes (k-means sphérique) ; une saisie n'est comparée
+  qu'aux compétences des n_probe groupes les plus proches. L'index est
+  persisté à côté du cache d'embeddings et reconstruit si les vecteurs changent.
+
+Les deux index répondent aux mêmes requêtes : top-N par saisie (search),
+score max par compétence (max_scores) et top-K par bloc (block_top_k).
+Les vecteurs attendus sont normalisés (normalize_rows).
+"""
+import os
+import hashlib
+import numpy as np
+
+from src.scoring import accumulate_max_scores
+
+INDEX_TYPES = ("dense", "flat", "ivf", "auto")
+
+# En mode "auto", l'IVF n'est utilisé qu'au-delà de cette taille de référentiel
+AUTO_IVF_THRESHOLD = 20000
+
+
+def _merge_top_n(best_scores, best_ids, scores, ids, n):
+    """Fusionne deux listes (saisies x m) de candidats et garde les n meilleurs par ligne."""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    ids = np.concatenate([best_ids, ids], axis=1)
+    if scores.shape[1] > n:
+        keep = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        scores = np.take_along_axis(scores, keep, axis=1)
+        ids = np.take_along_axis(ids, keep, axis=1)
+    return scores, ids
+
+
+def _pad(scores, ids, n):
+    """Complète à n colonnes (-inf / -1) quand le référentiel compte moins de n lignes."""
+    missing = n - scores.shape[1]
+    if missing <= 0:
+        return scores, ids
+    return (np.pad(scores, ((0, 0), (0, missing)), constant_values=-np.inf),
+            np.pad(ids, ((0, 0), (0, missing)), constant_values=-1))
+
+
+def _sort_top_n(scores, ids):
+    """Tri décroissant ; les ex-aequo sont départagés par position dans le référentiel."""
+    order = np.lexsort((ids, -scores), axis=1)
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class CompetencyIndex:
+    """Interface commune des index ; les sous-classes fournissent search() et max_scores()."""
+
+    kind = "base"
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, n=10):
+        """
+        Top-N compétences de chaque saisie.
+        Retourne (scores, ids), deux tableaux (saisies x n) triés par score
+        décroissant ; les cases vides valent -inf / -1.
+        """
+        raise NotImplementedError
+
+    def max_scores(self, queries):
+        """
+        Score max de chaque compétence sur l'ensemble des saisies (vecteur de
+        taille len(index)). Les compétences non visitées valent -inf.
+        """
+        raise NotImplementedError
+
+    def block_top_k(self, queries, block_members, k=5):
+        """
+        Top-K compétences de chaque bloc pour un ensemble de saisies.
+        block_members : matrice (blocs x membres) de ScoreIndex, -1 = padding.
+        Retourne (scores, ids), deux tableaux (blocs x k), -inf / -1 si vide.
+        """
+        scores = self.max_scores(queries)
+        grouped = np.where(block_members >= 0, scores[block_members], -np.inf)
+        order = np.argsort(-grouped, axis=1, kind="stable")[:, :k]
+        top_scores = np.take_along_axis(grouped, order, axis=1)
+        top_ids = np.where(np.isfinite(top_scores), np.take_along_axis(block_members, order, axis=1), -1)
+        return top_scores, top_ids
+
+
+class FlatIndex(CompetencyIndex):
+    """Recherche exacte par tuiles de tile_size compétences."""
+
+    kind = "flat"
+
+    def __init__(self, vectors, tile_size=8192):
+        super().__init__(vectors)
+        self.tile_size = tile_size
+
+    def _tiles(self):
+        for start in range(0, len(self.vectors), self.tile_size):
+            yield start, self.vectors[start:start + self.tile_size]
+
+    def search(self, queries, n=10):
+        queries = np.asarray(queries, dtype=np.float32)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.full((len(queries), 0), -1, dtype=np.int64)
+
+        for start, tile in self._tiles():
+            scores = queries @ tile.T
+            ids = np.broadcast_to(np.arange(start, start + len(tile)), scores.shape)
+            best_scores, best_ids = _merge_top_n(best_scores, best_ids, scores, ids, n)
+
+        return _sort_top_n(*_pad(best_scores, best_ids, n))
+
+    def max_scores(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        result = np.full((1, len(self.vectors)), -np.inf, dtype=np.float32)
+        accumulate_max_scores(result, queries, np.zeros(len(queries), dtype=np.int64), self.vectors, self.tile_size)
+        return result[0]
+
+
+class IVFIndex(CompetencyIndex):
+    """
+    Listes inversées : centroids (n_lists x dim), order (positions des
+    compétences triées par liste) et offsets (début de chaque liste dans order).
+    """
+
+    kind = "ivf"
+
+    def __init__(self, vectors, centroids, order, offsets, n_probe=16):
+        super().__init__(vectors)
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.n_probe = min(n_probe, len(centroids))
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_probe=16, iterations=10, sample_size=None, seed=0):
+        """K-means sphérique sur un échantillon, puis affectation de toutes les compétences."""
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        sample_size = sample_size or min(len(vectors), 64 * n_lists)
+
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            # Un groupe vide garde son ancien centre
+            filled = counts > 0
+            centroids[filled] = sums[filled] / np.maximum(np.linalg.norm(sums[filled], axis=1, keepdims=True), 1e-12)
+
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 8192):
+            assign[start:start + 8192] = (np.asarray(vectors[start:start + 8192]) @ centroids.T).argmax(axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=n_lists))
+        return cls(vectors, centroids.astype(np.float32), order, offsets, n_probe=n_probe)
+
+    def _probe(self, queries):
+        """Listes visitées par chaque saisie (saisies x n_probe)."""
+        sims = queries @ self.centroids.T
+        if self.n_probe >= sims.shape[1]:
+            return np.broadcast_to(np.arange(sims.shape[1]), sims.shape)
+        return np.argpartition(-sims, self.n_probe - 1, axis=1)[:, :self.n_probe]
+
+    def _candidates(self, lists):
+        """Positions des compétences des listes données."""
+        if len(lists) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+    def search(self, queries, n=10):
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.full((len(queries), n), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), n), -1, dtype=np.int64)
+
+        for q, lists in enumerate(self._probe(queries)):
+            candidates = self._candidates(lists)
+            sims = self.vectors[candidates] @ queries[q]
+            keep = np.argpartition(-sims, n - 1)[:n] if len(sims) > n else np.arange(len(sims))
+            scores[q, :len(keep)] = sims[keep]
+            ids[q, :len(keep)] = candidates[keep]
+
+        return _sort_top_n(scores, ids)
+
+    def max_scores(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        result = np.full(len(self.vectors), -np.inf, dtype=np.float32)
+
+        # Chaque liste n'est lue qu'une fois, contre les seules saisies qui la visitent
+        probes = self._probe(queries)
+        for l in np.unique(probes):
+            members = self.order[self.offsets[l]:self.offsets[l + 1]]
+            if len(members) == 0:
+                continue
+            visitors = queries[(probes == l).any(axis=1)]
+            result[members] = (visitors @ self.vectors[members].T).max(axis=0)
+        return result
+
+    def save(self, path, fingerprint):
+        """Écriture atomique (fichier temporaire puis os.replace)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                     fingerprint=np.array(fingerprint))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, vectors, fingerprint, n_probe=16):
+        """Recharge l'index s'il correspond aux vecteurs courants, sinon None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                return cls(vectors, data["centroids"], data["order"], data["offsets"], n_probe=n_probe)
+        except Exception as e:
+            print(f"[ATTENTION] Index IVF illisible ({e}), il sera reconstruit.")
+            return None
+
+
+def fingerprint(vectors, n_lists):
+    """Empreinte du contenu des vecteurs et des paramètres de construction."""
+    digest = hashlib.sha256(np.ascontiguousarray(vectors).data)
+    digest.update(f"{vectors.shape}|{n_lists}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_or_build_index(kind, vectors, path, n_lists=None, n_probe=16):
+    """
+    Retourne l'index demandé pour des vecteurs normalisés, ou None pour
+    "dense" (matrice de similarité complète, comportement historique).
+    L'index IVF est relu depuis path s'il correspond aux vecteurs, sinon
+    reconstruit et sauvegardé.
+    """
+    if kind == "auto":
+        kind = "ivf" if len(vectors) >= AUTO_IVF_THRESHOLD else "dense"
+        if kind == "ivf":
+            print(f"[ATTENTION] {len(vectors)} compétences (>= {AUTO_IVF_THRESHOLD}) : index IVF, scores approchés "
+                  f"(n_probe={n_probe}). AISCA_INDEX=flat pour des scores exacts.")
+    if kind == "dense":
+        return None
+    if kind == "flat":
+        return FlatIndex(vectors)
+    if kind != "ivf":
+        raise ValueError(f"Index inconnu : {kind} (attendu : {', '.join(INDEX_TYPES)})")
+
+    key = fingerprint(vectors, n_lists)
+    index = IVFIndex.load(path, vectors, key, n_probe=n_probe)
+    if index is not None:
+        print(f"[SUCCES] Index IVF chargé depuis le disque ({len(index.centroids)} listes).")
+        return index
+
+    print(f"[INFO] Construction de l'index IVF sur {len(vectors)} compétences...")
+    index = IVFIndex.build(vectors, n_lists=n_lists, n_probe=n_probe)
+    index.save(path, key)
+    print(f"[INFO] Index IVF sauvegardé -> {path}")
+    return index
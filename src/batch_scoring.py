@@ -0,0 +1,153 @@
+"""
+Scoring en masse de profils candidats.
+
+Lit les candidats en flux depuis un fichier JSONL ou CSV, les score par lots
+avec SBERTEngine.calculate_scores_batch et écrit un résultat JSONL par candidat.
+
+Usage :
+    python -m src.batch_scoring candidats.jsonl -o resultats.jsonl
+    python -m src.batch_scoring candidats.csv -o resultats.jsonl --text-columns experience stack
+    python -m src.batch_scoring mots_cles.jsonl -o resultats.jsonl --enrich
+    python -m src.batch_scoring cv_complets.jsonl -o resultats.jsonl --segment
+    python -m src.batch_scoring candidats.jsonl -o resultats.jsonl --store data/candidates
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from src.sbert_engine import SBERTEngine
+from src.genai_manager import GenAIManager
+from src.candidate_store import CandidateStore, index_audits
+
+
+def _inputs_from_record(record, id_field, text_fields):
+    """Extrait les textes d'un enregistrement (dict JSON ou ligne CSV)."""
+    if text_fields:
+        return [record.get(field) or "" for field in text_fields]
+    if isinstance(record.get("inputs"), list):
+        return record["inputs"]
+    return [v for k, v in record.items() if k != id_field and isinstance(v, str)]
+
+
+def _read_lines(f, end=None):
+    """Lignes (bytes) d'un fichier binaire depuis la position courante jusqu'à l'octet end."""
+    while end is None or f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line
+
+
+def iter_candidates(path, id_field="id", text_fields=None, start=0, end=None, first_position=0):
+    """
+    Générateur (id, entrées) sur un fichier JSONL ou CSV, ligne par ligne.
+    Sans colonne d'identifiant, le numéro de ligne sert d'id.
+    start / end : plage d'octets à lire (JSONL seulement, découpage en lots de
+    travail) ; first_position est alors le numéro du premier candidat de la plage.
+    """
+    is_csv = os.path.splitext(path)[1].lower() == ".csv"
+
+    with (open(path, "r", encoding="utf-8") if is_csv else open(path, "rb")) as f:
+        if is_csv:
+            rows = csv.DictReader(f)
+        else:
+            f.seek(start)
+            rows = (json.loads(line) for line in _read_lines(f, end) if line.strip())
+
+        for position, record in enumerate(rows, start=first_position):
+            if isinstance(record, str):
+                record = {"inputs": [record]}
+            elif isinstance(record, list):
+                record = {"inputs": record}
+            yield record.get(id_field, position), _inputs_from_record(record, id_field, text_fields)
+
+
+def result_to_dict(result):
+    """Résultat de calculate_scores en dictionnaire sérialisable (DataFrame -> liste d'enregistrements)."""
+    return {
+        "scores_par_bloc": result["scores_par_bloc"],
+        "recommandations_metiers": result["recommandations_metiers"],
+        "top_competences_details": result["top_competences_details"].to_dict(orient="records"),
+    }
+
+
+def serialize_result(candidate_id, result):
+    """Convertit un résultat de calculate_scores en ligne JSON."""
+    return json.dumps({"id": candidate_id, **result_to_dict(result)}, ensure_ascii=False)
+
+
+def enrich_chunk(coach, chunk_inputs):
+    """Enrichit toutes les expressions courtes d'un paquet de candidats en appels groupés."""
+    flat = [str(i) for inputs in chunk_inputs for i in inputs]
+    enriched = iter(coach.enrichir_phrases(flat))
+    return [[next(enriched) for _ in inputs] for inputs in chunk_inputs]
+
+
+def score_file(engine, input_path, output_path, chunk_size=None, id_field="id", text_fields=None, coach=None,
+               segment=False, store=None):
+    """
+    Score tout un fichier par paquets de chunk_size candidats. Retourne le nombre traité.
+    chunk_size : par défaut, ce que le budget mémoire du moteur permet (max_batch_candidates).
+    coach : GenAIManager optionnel pour enrichir les CV sous forme de mots-clés avant scoring.
+    segment : découpe les CV complets en phrases / puces avant encodage.
+    store : CandidateStore optionnel, alimenté au fil des paquets (recherche recruteur).
+    """
+    candidates = iter_candidates(input_path, id_field=id_field, text_fields=text_fields)
+    chunk_size = chunk_size or engine.max_batch_candidates()
+    total = 0
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        while True:
+            chunk = list(islice(candidates, chunk_size))
+            if not chunk:
+                break
+
+            ids = [cid for cid, _ in chunk]
+            chunk_inputs = [inputs for _, inputs in chunk]
+            if coach is not None:
+                chunk_inputs = enrich_chunk(coach, chunk_inputs)
+            results = engine.calculate_scores_batch(chunk_inputs, segment=segment)
+            for cid, result in zip(ids, results):
+                out.write(serialize_result(cid, result) + "\n")
+            if store is not None:
+                index_audits(engine, store, ids, chunk_inputs, results, segment=segment)
+
+            total += len(chunk)
+            print(f"[INFO] {total} candidats scorés...", file=sys.stderr)
+
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring SBERT en masse (JSONL/CSV -> JSONL).")
+    parser.add_argument("input", help="Fichier de candidats (.jsonl ou .csv)")
+    parser.add_argument("-o", "--output", required=True, help="Fichier JSONL de sortie")
+    parser.add_argument("--data-path", default="data", help="Dossier du référentiel")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Candidats par lot (défaut : budget mémoire AISCA_SCORING_MEMORY_MB)")
+    parser.add_argument("--id-field", default="id", help="Champ identifiant du candidat")
+    parser.add_argument("--text-columns", nargs="*", default=None, help="Champs texte à scorer")
+    parser.add_argument("--enrich", action="store_true", help="Enrichir les mots-clés via GenAI avant scoring")
+    parser.add_argument("--segment", action="store_true", help="Découper les CV complets en phrases / puces")
+    parser.add_argument("--store", default=None, help="Base de candidats à alimenter (ex: data/candidates)")
+    args = parser.parse_args(argv)
+
+    engine = SBERTEngine(data_path=args.data_path)
+    coach = GenAIManager(bundle=engine.state.bundle) if args.enrich else None
+
+    start = time.perf_counter()
+    total = score_file(
+        engine, args.input, args.output,
+        chunk_size=args.chunk_size, id_field=args.id_field, text_fields=args.text_columns,
+        coach=coach, segment=args.segment, store=CandidateStore(args.store) if args.store else None
+    )
+    elapsed = time.perf_counter() - start
+    print(f"[SUCCES] {total} candidats en {elapsed:.1f}s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Scoring en masse multi-processus (re-scoring nocturne de la base candidats).
+
+Le processus parent charge le référentiel une fois et l'exporte en mémoire
+mappée (src/shared_referential.py) ; chaque worker s'y attache sans copie et
+ne charge que son propre encodeur. Les fichiers d'entrée sont découpés en
+lots de travail (plages d'octets des JSONL, fichier entier pour un CSV)
+placés dans une file commune : un worker libre prend le lot suivant, les
+workers rapides absorbent donc le travail des plus lents.
+
+Chaque fichier d'entrée produit <nom>.scores.jsonl dans le dossier de sortie,
+dans l'ordre des candidats.
+
+Usage :
+    python -m src.bulk_scoring candidats_*.jsonl -o resultats/ --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from src.sbert_engine import SBERTEngine
+from src.shared_referential import SharedReferential, export_referential
+from src.batch_scoring import iter_candidates, serialize_result
+
+_ENGINE = None
+
+
+def plan_units(paths, unit_size=2000):
+    """
+    Découpe les fichiers en lots de travail d'environ unit_size candidats :
+    dicts (file, part, path, start, end, first_position). Un CSV forme un seul lot.
+    """
+    units = []
+    for file_index, path in enumerate(paths):
+        if os.path.splitext(path)[1].lower() == ".csv":
+            units.append({"file": file_index, "part": 0, "path": path, "start": 0, "end": None, "first_position": 0})
+            continue
+
+        start, count, first_position, part = 0, 0, 0, 0
+        with open(path, "rb") as f:
+            for line in iter(f.readline, b""):
+                if line.strip():
+                    count += 1
+                if count == unit_size:
+                    end = f.tell()
+                    units.append({"file": file_index, "part": part, "path": path, "start": start, "end": end,
+                                  "first_position": first_position})
+                    start, first_position, count, part = end, first_position + count, 0, part + 1
+            if count:
+                units.append({"file": file_index, "part": part, "path": path, "start": start, "end": None,
+                              "first_position": first_position})
+    return units
+
+
+def _init_worker(shared_dir, data_path, encoder, encoder_threads):
+    """Initialisation d'un worker : attache le référentiel partagé, encodeur chargé au premier lot."""
+    global _ENGINE
+    _ENGINE = SBERTEngine.from_shared(
+        SharedReferential(shared_dir), data_path=data_path, encoder=encoder, encoder_threads=encoder_threads
+    )
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _score_unit(args):
+    """Score un lot de travail dans un fichier partiel. Retourne ses statistiques."""
+    unit, parts_dir, options = args
+    start = time.perf_counter()
+    candidates = iter_candidates(
+        unit["path"], id_field=options["id_field"], text_fields=options["text_fields"],
+        start=unit["start"], end=unit["end"], first_position=unit["first_position"]
+    )
+
+    part_path = os.path.join(parts_dir, f"{unit['file']:05d}.{unit['part']:06d}.jsonl")
+    count = 0
+    with open(part_path, "w", encoding="utf-8") as out:
+        while True:
+            chunk = list(islice(candidates, options["batch_size"] or _ENGINE.max_batch_candidates()))
+            if not chunk:
+                break
+            results = _ENGINE.calculate_scores_batch([inputs for _, inputs in chunk], segment=options["segment"])
+            for (cid, _), result in zip(chunk, results):
+                out.write(serialize_result(cid, result) + "\n")
+            count += len(chunk)
+
+    return {"worker": os.getpid(), "candidates": count, "seconds": time.perf_counter() - start,
+            "peak_rss_mb": _peak_rss_mb()}
+
+
+def _merge_parts(paths, parts_dir, output_dir):
+    """Concatène les fichiers partiels de chaque entrée, dans l'ordre des lots."""
+    outputs = []
+    parts = sorted(os.listdir(parts_dir))
+    for file_index, path in enumerate(paths):
+        name = os.path.splitext(os.path.basename(path))[0]
+        output_path = os.path.join(output_dir, f"{name}.scores.jsonl")
+        with open(output_path, "wb") as out:
+            for part in parts:
+                if part.startswith(f"{file_index:05d}."):
+                    with open(os.path.join(parts_dir, part), "rb") as f:
+                        shutil.copyfileobj(f, out)
+        outputs.append(output_path)
+    return outputs
+
+
+def bulk_score(paths, output_dir, workers=None, data_path="data", unit_size=2000, batch_size=None,
+               id_field="id", text_fields=None, segment=False, encoder=None, encoder_threads=None, engine=None):
+    """
+    Score des fichiers de candidats avec un pool de workers.
+    Retourne un rapport : candidats, durée, débit global et détail par worker.
+    engine : SBERTEngine déjà chargé à réutiliser pour l'export du référentiel (optionnel).
+    """
+    workers = workers or os.cpu_count() or 1
+    # Par défaut, les threads d'inférence sont répartis entre les workers
+    encoder_threads = encoder_threads or max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(output_dir, exist_ok=True)
+
+    engine = engine or SBERTEngine(data_path=data_path, encoder=encoder, index="dense")
+    work_dir = tempfile.mkdtemp(prefix="aisca_bulk_")
+    try:
+        shared_dir = export_referential(engine, os.path.join(work_dir, "referential"))
+        parts_dir = os.path.join(work_dir, "parts")
+        os.makedirs(parts_dir)
+
+        units = plan_units(paths, unit_size=unit_size)
+        options = {"id_field": id_field, "text_fields": text_fields, "segment": segment, "batch_size": batch_size}
+
+        start = time.perf_counter()
+        per_worker = {}
+        # spawn : aucun état torch / OpenMP hérité du parent
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(shared_dir, data_path, engine.encoder, encoder_threads)) as pool:
+            done = 0
+            for stats in pool.imap_unordered(_score_unit, [(u, parts_dir, options) for u in units], chunksize=1):
+                worker = per_worker.setdefault(stats["worker"], {"units": 0, "candidates": 0, "seconds": 0.0})
+                worker["units"] += 1
+                worker["candidates"] += stats["candidates"]
+                worker["seconds"] += stats["seconds"]
+                worker["peak_rss_mb"] = stats["peak_rss_mb"]
+                done += stats["candidates"]
+                print(f"[INFO] {done} candidats scorés...", file=sys.stderr)
+        elapsed = time.perf_counter() - start
+
+        outputs = _merge_parts(paths, parts_dir, output_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    total = sum(w["candidates"] for w in per_worker.values())
+    return {
+        "workers": workers,
+        "candidates": total,
+        "seconds": elapsed,
+        "candidates_per_s": total / elapsed if elapsed else 0.0,
+        "per_worker": per_worker,
+        "outputs": outputs,
+    }
+
+
+def print_report(report):
+    print(f"[SUCCES] {report['candidates']} candidats en {report['seconds']:.1f}s "
+          f"({report['candidates_per_s']:.0f}/s, {report['workers']} workers)", file=sys.stderr)
+    for pid, worker in sorted(report["per_worker"].items()):
+        rate = worker["candidates"] / worker["seconds"] if worker["seconds"] else 0.0
+        rss = f", pic RSS {worker['peak_rss_mb']:.0f} Mo" if worker.get("peak_rss_mb") else ""
+        print(f"  worker {pid} : {worker['units']} lots, {worker['candidates']} candidats, {rate:.0f}/s{rss}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring SBERT en masse sur plusieurs processus.")
+    parser.add_argument("inputs", nargs="+", help="Fichiers de candidats (.jsonl ou .csv)")
+    parser.add_argument("-o", "--output-dir", required=True, help="Dossier des fichiers <nom>.scores.jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : nombre de cœurs)")
+    parser.add_argument("--data-path", default="data", help="Dossier du référentiel")
+    parser.add_argument("--unit-size", type=int, default=2000, help="Candidats par lot de travail")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Candidats par appel au moteur (défaut : budget mémoire AISCA_SCORING_MEMORY_MB)")
+    parser.add_argument("--id-field", default="id", help="Champ identifiant du candidat")
+    parser.add_argument("--text-columns", nargs="*", default=None, help="Champs texte à scorer")
+    parser.add_argument("--segment", action="store_true", help="Découper les CV complets en phrases / puces")
+    args = parser.parse_args(argv)
+
+    report = bulk_score(
+        args.inputs, args.output_dir, workers=args.workers, data_path=args.data_path,
+        unit_size=args.unit_size, batch_size=args.batch_size, id_field=args.id_field,
+        text_fields=args.text_columns, segment=args.segment
+    )
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
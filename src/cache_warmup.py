@@ -0,0 +1,146 @@
+"""
+Pré-remplissage du cache IA (genai_cache.db) avant la mise en production.
+
+Le plan de progression ne dépend que du métier visé et de l'ensemble des blocs
+sous 60 % (clé PLAN_ canonique, voir GenAIManager._requete_plan) : pour 7
+métiers et 5 blocs, 7 x 2^5 = 224 plans couvrent toutes les demandes possibles.
+Les mots-clés de stack les plus fréquents du référentiel (outils cités entre
+parenthèses, après "avec" ou "apache") sont enrichis par lots (clés ENRICH_),
+découpés par split_stack comme la stack saisie dans l'application : les clés
+pré-remplies sont celles que l'application lit.
+
+Les générations tournent en parallèle derrière le limiteur de débit du backend
+(AISCA_LLM_RATE, ou --rate) ; les entrées déjà en cache ne sont pas régénérées.
+
+Usage :
+    python -m src.cache_warmup
+    python -m src.cache_warmup --keywords 200 --concurrency 8 --rate 10
+    python -m src.cache_warmup --dry-run
+"""
+import argparse
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+from src.genai_manager import API_KEY, GenAIManager
+from src.llm_backends import create_backend
+from src.referential_bundle import SUB_BLOCK, load_or_build_bundle
+from src.segmentation import split_stack
+
+_TOKEN = re.compile(r"\w[\w+#.-]*\w|\w")
+_TOOL_CONTEXTS = (
+    re.compile(r"\(([^)]*)\)"),
+    re.compile(r"\b(?:avec|apache) (?:l'|le |la |les |des |apache )?([\w+#.-]+)"),
+)
+# Mots outils et termes génériques qui apparaissent aussi dans ces contextes
+_STOPWORDS = {
+    "et", "ou", "de", "des", "du", "en", "la", "le", "les", "vs", "pour", "dans", "avec", "type",
+    "data", "gestion", "architecture", "tests", "optimisation",
+}
+
+
+def stack_keywords(bundle, top_n=100):
+    """
+    Mots-clés de stack du référentiel, du plus fréquent au moins fréquent :
+    termes cités comme outils (parenthèses, "avec X", "apache X"), classés par
+    nombre d'occurrences dans l'ensemble des libellés.
+    """
+    counts = Counter()
+    outils = set()
+    for label in bundle.meta["competence_labels"]:
+        label = SUB_BLOCK.sub("", label).strip().lower()
+        counts.update(_TOKEN.findall(label))
+        for context in _TOOL_CONTEXTS:
+            for group in context.findall(label):
+                outils.update(_TOKEN.findall(group))
+
+    outils = [t for t in outils if t not in _STOPWORDS and not t.isdigit() and len(t) > 1]
+    return sorted(outils, key=lambda t: (-counts[t], t))[:top_n]
+
+
+def plan_requests(bundle):
+    """(métier, scores_blocs) pour chaque métier et chaque sous-ensemble de blocs faibles."""
+    block_ids = bundle.meta["block_ids"]
+    requests = []
+    for metier in bundle.meta["job_titles"]:
+        for size in range(len(block_ids) + 1):
+            for faibles in combinations(block_ids, size):
+                requests.append((metier, {b: 0.0 if b in faibles else 1.0 for b in block_ids}))
+    return requests
+
+
+def prewarm(manager, bundle, keywords=100, concurrency=8, dry_run=False):
+    """
+    Génère et met en cache les plans et enrichissements absents du cache.
+    Retourne un rapport par type : total, déjà en cache, générés, échecs.
+    """
+    # Plusieurs combinaisons de scores donnent la même clé (blocs au nom identique)
+    plans = {}
+    for metier, scores in plan_requests(bundle):
+        plans.setdefault(manager._requete_plan(metier, scores)[2], (metier, scores))
+    # Même découpage et même clé que la stack saisie dans app.py
+    mots = [p for m in stack_keywords(bundle, keywords) for p in split_stack(m)]
+    cles_mots = {manager._cle_enrichissement(m): m for m in mots}
+
+    report = {}
+    for kind, keys in (("PLAN", plans), ("ENRICH", cles_mots)):
+        missing = [k for k in keys if manager.cache.get(k) is None]
+        report[kind] = {"total": len(keys), "deja_en_cache": len(keys) - len(missing), "a_generer": missing}
+    if dry_run:
+        for r in report.values():
+            r["a_generer"] = len(r["a_generer"])
+        return report
+
+    start = time.perf_counter()
+    missing_plans = [plans[k] for k in report["PLAN"]["a_generer"]]
+    print(f"[INFO] {len(missing_plans)} plan(s) à générer ({concurrency} en parallèle)...")
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, _ in enumerate(pool.map(lambda r: manager.generer_plan_progression(*r), missing_plans), 1):
+            if i % 50 == 0:
+                print(f"[INFO] {i}/{len(missing_plans)} plans ({time.perf_counter() - start:.1f}s)")
+
+    missing_mots = [cles_mots[k] for k in report["ENRICH"]["a_generer"]]
+    print(f"[INFO] {len(missing_mots)} mot(s)-clé(s) à enrichir...")
+    if missing_mots:
+        manager.enrichir_phrases(missing_mots)
+
+    for kind, r in report.items():
+        failed = sum(1 for k in r["a_generer"] if manager.cache.get(k) is None)
+        r["generes"] = len(r["a_generer"]) - failed
+        r["echecs"] = failed
+        r["a_generer"] = len(r["a_generer"])
+    report["duree_s"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-remplissage du cache IA (plans, enrichissements).")
+    parser.add_argument("--data-path", default="data", help="Dossier du référentiel")
+    parser.add_argument("--cache-file", default="genai_cache.db")
+    parser.add_argument("--keywords", type=int, default=100, help="Nombre de mots-clés de stack à enrichir")
+    parser.add_argument("--concurrency", type=int, default=8, help="Générations simultanées")
+    parser.add_argument("--rate", type=float, default=None, help="Requêtes/s vers le modèle (défaut AISCA_LLM_RATE)")
+    parser.add_argument("--burst", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Compter les entrées manquantes sans rien générer")
+    args = parser.parse_args(argv)
+
+    backend = create_backend(api_key=API_KEY, rate=args.rate, burst=args.burst, max_concurrency=args.concurrency)
+    if backend is None and not args.dry_run:
+        return 1
+    bundle = load_or_build_bundle(args.data_path)
+    if bundle is None:
+        print(f"[ERREUR] Référentiel introuvable dans {args.data_path}")
+        return 1
+    manager = GenAIManager(cache_file=args.cache_file, backend=backend, max_workers=args.concurrency,
+                           data_path=args.data_path, bundle=bundle)
+
+    report = prewarm(manager, bundle, keywords=args.keywords, concurrency=args.concurrency, dry_run=args.dry_run)
+    for kind, r in report.items():
+        print(f"[SUCCES] {kind} : {r}" if kind != "duree_s" else f"[SUCCES] Terminé en {r}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
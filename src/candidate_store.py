@@ -0,0 +1,351 @@
+"""
+Base persistante des candidats audités, pour la recherche inverse recruteur :
+une fiche de poste -> les N candidats les plus proches.
+
+Chaque candidat garde les embeddings normalisés de ses entrées (telles que
+scorées : segmentées, dédoublonnées) et son vecteur scores_par_bloc. Fichiers
+du dossier (data/candidates par défaut) :
+- vectors.f32 : embeddings des entrées, bout à bout (entrées x dim),
+- offsets.i64 : fin des entrées de chaque candidat dans vectors.f32,
+- blocks.f32 : scores par bloc (candidats x blocs, ordre de block_ids),
+- candidates.jsonl : id et résumé de l'audit (métier, score, date),
+- meta.json : modèle, dimension, blocs, nombres de lignes validées et taille
+  validée de candidates.jsonl (octets).
+
+Les fichiers binaires sont lus en mémoire mappée et ne font que grandir : un
+ajout écrit les nouvelles lignes à la fin puis remplace meta.json (écriture
+atomique). Ce dernier fait foi : des lignes écrites par un ajout interrompu
+sont ignorées puis tronquées au prochain ajout, sans relire les fichiers.
+Un seul processus écrit ; d'autres peuvent lire (refresh() relit meta.json
+s'il a changé). Dans un processus, search travaille sur un instantané pris
+sous le verrou des ajouts.
+
+Score d'un candidat pour une fiche de poste découpée en segments :
+- similarite : moyenne, sur les segments de la fiche, de la meilleure
+  similarité avec une entrée du candidat,
+- adequation_blocs : part du profil de blocs de la fiche (scoré par le moteur
+  sur le référentiel) couverte par celui du candidat,
+- score = (1 - block_weight) * similarite + block_weight * adequation_blocs.
+Le calcul est vectorisé par tuiles de candidats contigus (max par candidat via
+np.maximum.reduceat) ; les filtres min_blocks écartent les candidats avant.
+
+Usage :
+    python -m src.batch_scoring candidats.jsonl -o resultats.jsonl --segment --store data/candidates
+    python -m src.candidate_store search --file fiche_de_poste.txt -n 20 --min-bloc bloc_2=0.6
+    python -m src.candidate_store info
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.metrics import METRICS
+
+DEFAULT_DIRECTORY = os.path.join("data", "candidates")
+
+
+class CandidateStore:
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, input_tile=262144):
+        """
+        directory : dossier de la base (créé au premier ajout).
+        input_tile : nombre max d'entrées comparées à la fiche en une fois
+        (mémoire de travail de search).
+        """
+        self.directory = directory
+        self.input_tile = input_tile
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.paths = {name: os.path.join(directory, name)
+                      for name in ("vectors.f32", "offsets.i64", "blocks.f32", "candidates.jsonl")}
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self.meta = None
+        self.refresh()
+
+    def __len__(self):
+        return self.meta["candidates"] if self.meta else 0
+
+    def __contains__(self, candidate_id):
+        return str(candidate_id) in self._positions
+
+    def refresh(self):
+        """(Re)lit meta.json et les fichiers mappés si la base a changé sur disque."""
+        if not os.path.exists(self.meta_path):
+            self.meta, self.infos, self._positions = None, [], {}
+            self._views = None
+            return
+        mtime = os.stat(self.meta_path).st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != self.FORMAT_VERSION:
+            raise ValueError(f"Base de candidats {self.directory} : format {meta.get('format')} non supporté")
+
+        infos = []
+        with open(self.paths["candidates.jsonl"], "r", encoding="utf-8") as f:
+            for line in f:
+                if len(infos) == meta["candidates"]:
+                    break
+                infos.append(json.loads(line))
+        self.meta, self.infos = meta, infos
+        self._positions = {info["id"]: i for i, info in enumerate(infos)}
+        self._views = None
+        self._meta_mtime = mtime
+
+    def _map(self):
+        """Vues mappées (vectors, offsets, blocks) limitées aux lignes validées."""
+        if self._views is None:
+            n, m = self.meta["candidates"], self.meta["inputs"]
+            dim, n_blocks = self.meta["dim"], len(self.meta["block_ids"])
+
+            def view(name, dtype, shape):
+                if not shape[0]:
+                    return np.zeros(shape, dtype=dtype)
+                return np.memmap(self.paths[name], dtype=dtype, mode="r", shape=shape)
+
+            self._views = (view("vectors.f32", np.float32, (m, dim)), view("offsets.i64", np.int64, (n,)),
+                           view("blocks.f32", np.float32, (n, n_blocks)))
+        return self._views
+
+    def _truncate(self):
+        """Supprime les lignes d'un ajout interrompu (au-delà des tailles de meta.json)."""
+        n, m = self.meta["candidates"], self.meta["inputs"]
+        if "infos_bytes" not in self.meta:
+            # Base écrite avant l'enregistrement de la taille : un seul parcours
+            with open(self.paths["candidates.jsonl"], "rb") as f:
+                self.meta["infos_bytes"] = sum(len(f.readline()) for _ in range(n))
+        sizes = {"vectors.f32": m * self.meta["dim"] * 4, "offsets.i64": n * 8,
+                 "blocks.f32": n * len(self.meta["block_ids"]) * 4,
+                 "candidates.jsonl": self.meta["infos_bytes"]}
+        for name, size in sizes.items():
+            if os.path.getsize(self.paths[name]) > size:
+                os.truncate(self.paths[name], size)
+
+    def add_batch(self, records, model, block_ids):
+        """
+        Ajoute des candidats audités. records : itérable de (id, vecteurs, scores_par_bloc, infos)
+        où vecteurs est la matrice normalisée (entrées x dim) et infos un dict sérialisable.
+        Les ids déjà présents et les candidats sans entrée sont ignorés.
+        model : identifiant de l'encodeur (modèle + version) ; block_ids : ordre des blocs
+        à la création de la base. Retourne le nombre de candidats ajoutés.
+        """
+        with self._lock:
+            self.refresh()
+            records = [(str(cid), np.asarray(vectors, dtype=np.float32), scores, infos or {})
+                       for cid, vectors, scores, infos in records]
+            seen = set(self._positions)
+            kept = []
+            for record in records:
+                if record[0] not in seen and len(record[1]):
+                    seen.add(record[0])
+                    kept.append(record)
+            if not kept:
+                return 0
+
+            if self.meta is None:
+                os.makedirs(self.directory, exist_ok=True)
+                for path in self.paths.values():
+                    open(path, "wb").close()
+                self.meta = {"format": self.FORMAT_VERSION, "model": model, "dim": int(kept[0][1].shape[1]),
+                             "block_ids": list(block_ids), "candidates": 0, "inputs": 0, "infos_bytes": 0}
+            elif self.meta["model"] != model:
+                raise ValueError(f"Base de candidats encodée avec {self.meta['model']}, pas {model}")
+            else:
+                self._truncate()
+
+            dim, store_blocks = self.meta["dim"], self.meta["block_ids"]
+            vectors = np.concatenate([r[1] for r in kept]).reshape(-1, dim)
+            offsets = self.meta["inputs"] + np.cumsum([len(r[1]) for r in kept], dtype=np.int64)
+            # Blocs absents du référentiel courant (renommés, supprimés) : score 0
+            blocks = np.array([[float(r[2].get(b, 0.0)) for b in store_blocks] for r in kept], dtype=np.float32)
+            now = time.strftime("%Y-%m-%dT%H:%M:%S")
+            lines = "".join(json.dumps({"id": r[0], "ajoute_le": now, **r[3]}, ensure_ascii=False) + "\n"
+                            for r in kept)
+            payload = lines.encode("utf-8")
+
+            for name, payload in (("vectors.f32", vectors.tobytes()), ("offsets.i64", offsets.tobytes()),
+                                  ("blocks.f32", blocks.tobytes()), ("candidates.jsonl", payload)):
+                with open(self.paths[name], "ab") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            # Validation : meta.json remplacé en dernier
+            meta = dict(self.meta, candidates=self.meta["candidates"] + len(kept), inputs=int(offsets[-1]),
+                        infos_bytes=self.meta["infos_bytes"] + len(payload))
+            tmp = self.meta_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp, self.meta_path)
+            for record, line in zip(kept, lines.splitlines()):
+                self._positions[record[0]] = len(self.infos)
+                self.infos.append(json.loads(line))
+            self.meta = meta
+            self._views = None
+            self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+            return len(kept)
+
+    def add(self, candidate_id, vectors, scores_par_bloc, infos=None, model=None, block_ids=None):
+        """Ajoute un candidat (voir add_batch) ; True s'il a été ajouté."""
+        block_ids = block_ids or list(scores_par_bloc)
+        return self.add_batch([(candidate_id, vectors, scores_par_bloc, infos)], model, block_ids) == 1
+
+    def search(self, queries, n=10, block_profile=None, block_weight=0.3, min_blocks=None):
+        """
+        Top-N candidats pour une fiche de poste.
+        queries : embeddings normalisés des segments de la fiche (segments x dim).
+        block_profile : scores_par_bloc de la fiche (optionnel, voir adequation_blocs).
+        min_blocks : dict bloc -> score minimal du candidat sur ce bloc.
+        Retourne une liste de dicts (infos du candidat, score, similarite,
+        adequation_blocs, scores_par_bloc), du meilleur au moins bon.
+        """
+        # Instantané cohérent (meta, infos, vues) : un ajout concurrent ne le modifie pas
+        with self._lock:
+            self.refresh()
+            if not len(self):
+                return []
+            snapshot = (self.meta, self.infos, self._map())
+        with METRICS.span("aisca_candidate_search_seconds"):
+            return self._search(snapshot, np.asarray(queries, dtype=np.float32), n, block_profile, block_weight,
+                                min_blocks)
+
+    def _search(self, snapshot, queries, n, block_profile, block_weight, min_blocks):
+        meta, infos, (vectors, ends, blocks) = snapshot
+        block_ids = meta["block_ids"]
+        starts = np.r_[0, ends[:-1]]
+
+        # 1. Filtres sur les blocs (sans toucher aux embeddings)
+        keep = np.ones(len(ends), dtype=bool)
+        for bloc, threshold in (min_blocks or {}).items():
+            if bloc not in block_ids:
+                raise ValueError(f"Bloc inconnu : {bloc} (blocs : {', '.join(block_ids)})")
+            keep &= blocks[:, block_ids.index(bloc)] >= threshold
+
+        # 2. Similarité : tuiles de candidats contigus d'au plus input_tile entrées
+        similarite = np.full(len(ends), -np.inf, dtype=np.float32)
+        first = 0
+        while first < len(ends):
+            last = max(first + 1, int(np.searchsorted(ends, starts[first] + self.input_tile, side="right")))
+            if keep[first:last].any():
+                sims = vectors[starts[first]:ends[last - 1]] @ queries.T
+                best = np.maximum.reduceat(sims, starts[first:last] - starts[first], axis=0)
+                similarite[first:last] = best.mean(axis=1)
+            first = last
+
+        # 3. Couverture du profil de blocs de la fiche
+        adequation = np.zeros(len(ends), dtype=np.float32)
+        if block_profile:
+            profile = np.array([max(float(block_profile.get(b, 0.0)), 0.0) for b in block_ids], dtype=np.float32)
+            if profile.sum() > 0:
+                adequation = np.minimum(np.clip(blocks, 0, None), profile).sum(axis=1) / profile.sum()
+        else:
+            block_weight = 0.0
+        scores = np.where(keep, (1 - block_weight) * similarite + block_weight * adequation, -np.inf)
+
+        n = min(n, int(keep.sum()))
+        if n <= 0:
+            return []
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [{
+            **infos[c],
+            "score": round(float(scores[c]), 4),
+            "similarite": round(float(similarite[c]), 4),
+            "adequation_blocs": round(float(adequation[c]), 4),
+            "scores_par_bloc": {b: round(float(s), 4) for b, s in zip(block_ids, blocks[c])},
+        } for c in top]
+
+
+def engine_model(engine):
+    """Identifiant de l'encodeur d'un SBERTEngine (les vecteurs de deux encodeurs ne se comparent pas)."""
+    return f"{engine.embedding_store.model_name} {engine.embedding_store.model_version}"
+
+
+def profile_id(user_inputs):
+    """Id stable d'un profil saisi sans identifiant (empreinte du texte normalisé)."""
+    text = "\n".join(" ".join(str(i).split()) for i in user_inputs)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def index_audits(engine, store, ids, candidates, results, segment=False):
+    """
+    Ajoute des candidats déjà scorés par engine (mêmes entrées, même segment) :
+    les embeddings des entrées sortent du cache de requêtes du moteur.
+    Retourne le nombre de candidats ajoutés.
+    """
+    records = []
+    for cid, user_inputs, result in zip(ids, candidates, results):
+        if str(cid) in store or not result["scores_par_bloc"]:
+            continue
+        top = result["recommandations_metiers"][0] if result["recommandations_metiers"] else {}
+        infos = {"metier": top.get("metier"), "score_metier": top.get("score_percent")}
+        records.append((cid, engine.input_vectors(user_inputs, segment=segment), result["scores_par_bloc"], infos))
+    if not records:
+        return 0
+    return store.add_batch(records, engine_model(engine), list(records[0][2]))
+
+
+def search_job(engine, store, description, n=10, min_blocks=None, block_weight=0.3):
+    """Top-N candidats de store pour une fiche de poste (texte libre, découpé en segments)."""
+    if store.meta and store.meta["model"] != engine_model(engine):
+        raise ValueError(f"Base de candidats encodée avec {store.meta['model']}, pas {engine_model(engine)}")
+    queries = engine.input_vectors([description], segment=True)
+    if not len(queries):
+        return []
+    profile = engine.calculate_scores([description], segment=True)["scores_par_bloc"]
+    return store.search(queries, n=n, block_profile=profile, block_weight=block_weight, min_blocks=min_blocks)
+
+
+def _parse_min_blocks(values):
+    """["bloc_2=0.6", ...] -> {"bloc_2": 0.6}"""
+    min_blocks = {}
+    for value in values or []:
+        bloc, _, threshold = value.partition("=")
+        min_blocks[bloc] = float(threshold)
+    return min_blocks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Base des candidats audités et recherche par fiche de poste.")
+    parser.add_argument("command", choices=["search", "info"])
+    parser.add_argument("description", nargs="?", help="Texte de la fiche de poste")
+    parser.add_argument("--store", default=DEFAULT_DIRECTORY, help="Dossier de la base")
+    parser.add_argument("--data-path", default="data", help="Dossier du référentiel")
+    parser.add_argument("--file", help="Fichier texte de la fiche de poste")
+    parser.add_argument("-n", type=int, default=10, help="Nombre de candidats retournés")
+    parser.add_argument("--min-bloc", nargs="*", default=None, help="Filtres bloc=score_min (ex: bloc_2=0.6)")
+    parser.add_argument("--block-weight", type=float, default=0.3, help="Poids de l'adéquation des blocs")
+    args = parser.parse_args(argv)
+
+    store = CandidateStore(args.store)
+    if args.command == "info":
+        print(f"[INFO] {args.store} : {len(store)} candidats"
+              + (f", {store.meta['inputs']} entrées, modèle {store.meta['model']}" if store.meta else ""))
+        return 0
+
+    description = args.description
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            description = f.read()
+    if not description:
+        parser.error("texte de la fiche ou --file requis")
+
+    from src.sbert_engine import SBERTEngine
+    engine = SBERTEngine(data_path=args.data_path)
+    for rank, found in enumerate(search_job(engine, store, description, n=args.n,
+                                            min_blocks=_parse_min_blocks(args.min_bloc),
+                                            block_weight=args.block_weight), 1):
+        print(f"{rank:>3}. {found['id']:<24} score {found['score']:.3f} "
+              f"(similarité {found['similarite']:.3f}, blocs {found['adequation_blocs']:.3f}) "
+              f"{found.get('metier') or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from src.metrics import METRICS
+
+
+class EmbeddingStore:
+    """
+    Cache d'embeddings adressé par contenu.
+
+    Chaque ligne est identifiée par un hash SHA-256 de (modèle, version, texte) :
+    une compétence reformulée change de clé et est recalculée, une ligne ajoutée
+    est la seule à passer dans le modèle. Les vecteurs sont stockés en .npy brut
+    (chargé en mémoire mappée, sans dé-sérialisation pickle) et l'index des clés
+    dans un JSON à côté.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory, model_name, model_version, basename="embeddings_cache"):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.vectors_path = os.path.join(directory, f"{basename}.npy")
+        self.index_path = os.path.join(directory, f"{basename}.json")
+
+    def key(self, text):
+        """Clé de contenu d'un texte pour le modèle courant."""
+        payload = f"{self.model_name}\x00{self.model_version}\x00{text}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load(self):
+        """
+        Retourne (clés, vecteurs) du cache disque, ou ([], None) s'il est absent,
+        corrompu ou incohérent. Les vecteurs sont mappés en copie-sur-écriture.
+        """
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.index_path)):
+            return [], None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode='c', allow_pickle=False)
+        except Exception as e:
+            print(f"[ATTENTION] Cache d'embeddings illisible ({e}), il sera reconstruit.")
+            return [], None
+
+        keys = index.get("keys", [])
+        if index.get("format") != self.FORMAT_VERSION or vectors.ndim != 2 or len(keys) != len(vectors):
+            print("[ATTENTION] Cache d'embeddings incohérent, il sera reconstruit.")
+            return [], None
+        return keys, vectors
+
+    def save(self, keys, vectors):
+        """Écriture atomique (fichier temporaire puis os.replace) des vecteurs puis de l'index."""
+        tmp_vectors = self.vectors_path + ".tmp"
+        with open(tmp_vectors, 'wb') as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32), allow_pickle=False)
+
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": self.FORMAT_VERSION,
+                "model": self.model_name,
+                "version": self.model_version,
+                "dim": int(vectors.shape[1]),
+                "keys": keys,
+            }, f)
+
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_index, self.index_path)
+
+    def get_or_encode(self, texts, encode_fn):
+        """
+        Retourne (vecteurs, nb_en_cache, nb_recalculés), où vecteurs est la
+        matrice (len(texts) x dim) des embeddings de texts.
+        Seuls les textes absents du cache sont passés à encode_fn (liste -> ndarray).
+        Le cache est réécrit uniquement si le référentiel a changé ; il ne garde
+        que les lignes courantes, dans l'ordre du référentiel.
+        """
+        keys = [self.key(t) for t in texts]
+        stored_keys, stored = self.load()
+
+        # Cas nominal : référentiel inchangé, on sert directement le fichier mappé
+        if stored is not None and stored_keys == keys:
+            return stored, len(keys), 0
+
+        stored_pos = {k: i for i, k in enumerate(stored_keys)}
+        missing = {}
+        for k, text in zip(keys, texts):
+            if k not in stored_pos and k not in missing:
+                missing[k] = text
+
+        fresh = {}
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+
+        dim = stored.shape[1] if stored is not None else next(iter(fresh.values())).shape[0]
+        vectors = np.empty((len(keys), dim), dtype=np.float32)
+        for row, k in enumerate(keys):
+            vectors[row] = stored[stored_pos[k]] if k in stored_pos else fresh[k]
+
+        self.save(keys, vectors)
+        return vectors, len(keys) - len(missing), len(missing)
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU borné (en nombre d'entrées et en octets) des embeddings des
+    textes saisis par les utilisateurs, partagé par toutes les sessions qui
+    utilisent le même moteur. Les textes sont normalisés (espaces) avant d'être
+    utilisés comme clé. Persistance optionnelle dans un .npz.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=64 * 1024 * 1024, persist_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def normalize(text):
+        """Clé canonique : espaces multiples et bords supprimés."""
+        return " ".join(str(text).split())
+
+    def get(self, text):
+        """Vecteur en cache pour text (déjà normalisé), ou None. Met à jour l'ordre LRU."""
+        with self._lock:
+            vector = self._entries.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(text)
+            self.hits += 1
+            return vector
+
+    def put(self, text, vector):
+        """Ajoute un vecteur et évince les plus anciens au-delà des limites."""
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.nbytes > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(text, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[text] = vector
+            self._bytes += vector.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def encode(self, texts, encode_fn):
+        """
+        Retourne la matrice (len(texts) x dim) des embeddings de texts.
+        Seuls les textes (normalisés) absents du cache passent par encode_fn,
+        en un seul appel.
+        """
+        keys = [self.normalize(t) for t in texts]
+        found = {}
+        for k in keys:
+            if k not in found:
+                vector = self.get(k)
+                if vector is not None:
+                    found[k] = vector
+
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        METRICS.inc("aisca_cache_requests_total", len(found), cache="query", result="hit")
+        METRICS.inc("aisca_cache_requests_total", len(missing), cache="query", result="miss")
+        if missing:
+            encoded = np.asarray(encode_fn(missing), dtype=np.float32)
+            for k, vector in zip(missing, encoded):
+                found[k] = vector
+                self.put(k, vector)
+
+        return np.stack([found[k] for k in keys])
+
+    def stats(self):
+        """Compteurs pour le suivi : hits, misses, taille et mémoire occupée."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def save(self):
+        """Sauvegarde le contenu du cache (ordre LRU conservé) dans persist_path."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            keys = list(self._entries.keys())
+            vectors = list(self._entries.values())
+        if not keys:
+            return
+        try:
+            tmp_path = self.persist_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=np.array(keys), vectors=np.stack(vectors))
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"[ERREUR] Impossible de sauvegarder le cache des requêtes : {e}")
+
+    def load(self):
+        """Recharge le cache persistant s'il existe."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                for k, vector in zip(data["keys"].tolist(), data["vectors"]):
+                    self.put(k, vector)
+        except Exception as e:
+            print(f"[ATTENTION] Cache des requêtes illisible ({e}), ignoré.")
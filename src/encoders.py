@@ -0,0 +1,186 @@
+"""
+Encodeurs de phrases utilisables par SBERTEngine.
+
+- "torch" : SentenceTransformer PyTorch fp32 (comportement historique).
+- "onnx-int8" : le même MiniLM exporté en ONNX puis quantifié en int8 dynamique,
+  exécuté par onnxruntime sur CPU avec un nombre de threads maîtrisé. torch
+  n'est alors chargé que pour l'export initial, pas au service des requêtes.
+
+SBERTEngine accepte aussi un encodeur déjà construit (objet avec encode()),
+par exemple l'encodeur hors ligne des tests et benchmarks (tests/support.py).
+
+L'export est fait une fois (python -m src.encoders export) et rangé dans
+data/onnx/<modèle>/ : model_int8.onnx, tokenizer et encoder.json.
+"""
+import os
+import json
+import argparse
+import importlib
+import numpy as np
+
+# Écart maximal toléré entre les similarités cosinus des deux encodeurs
+# (vérifié par benchmarks/check_onnx_parity.py)
+ONNX_TOLERANCE = 0.02
+
+ENCODERS = ("torch", "onnx-int8")
+
+
+def _require(*modules):
+    """Import explicite des dépendances onnx-int8, avec un message clair si elles manquent."""
+    try:
+        for module in modules:
+            importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(
+            f"L'encodeur onnx-int8 nécessite {', '.join(modules)} ({e}) : pip install -r requirements.txt"
+        ) from e
+
+
+def export_onnx_int8(model_name, out_dir, opset=17):
+    """
+    Exporte le Transformer d'un SentenceTransformer en ONNX (axes dynamiques
+    batch / séquence) puis le quantifie en int8 dynamique (poids des MatMul).
+    Nécessite torch, sentence-transformers, onnx et onnxruntime.
+    """
+    _require("onnx", "onnxruntime")
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(out_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    dummy = tokenizer(["exemple de phrase"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Wrapper(torch.nn.Module):
+        """Appel par mots-clés du Transformer HF, sortie last_hidden_state seule."""
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = os.path.join(out_dir, "model_fp32.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(transformer),
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    int8_path = os.path.join(out_dir, "model_int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    tokenizer.save_pretrained(out_dir)
+    normalize = any(type(module).__name__ == "Normalize" for module in st_model)
+    with open(os.path.join(out_dir, "encoder.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "input_names": input_names,
+            "pad_id": tokenizer.pad_token_id,
+            "pad_token": tokenizer.pad_token,
+            "normalize": normalize,
+        }, f, indent=2)
+
+    print(f"[SUCCES] Modèle ONNX int8 exporté : {int8_path}")
+    return int8_path
+
+
+class OnnxInt8Encoder:
+    """
+    Encodeur onnxruntime (CPU) compatible avec l'appel encode() de SentenceTransformer
+    tel qu'utilisé par SBERTEngine : tokenisation, Transformer int8, mean pooling
+    masqué puis normalisation L2 (pipeline de all-MiniLM-L6-v2).
+    """
+
+    def __init__(self, model_name, model_dir, num_threads=None):
+        # onnxruntime + tokenizers seulement : ni torch ni transformers au service
+        _require("onnxruntime")
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if not os.path.exists(os.path.join(model_dir, "model_int8.onnx")):
+            print(f"[INFO] Export ONNX int8 de {model_name} (première utilisation)...")
+            export_onnx_int8(model_name, model_dir)
+
+        with open(os.path.join(model_dir, "encoder.json"), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model_int8.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.max_seq_length = self.config["max_seq_length"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+    def get_sentence_embedding_dimension(self):
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        """Retourne un ndarray float32 (len(sentences) x dim)."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Tri par longueur : moins de padding dans chaque lot (comme SentenceTransformer)
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        for start in range(0, len(sentences), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in batch_idx])
+            tokens = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feeds = {name: tokens[name] for name in self.config["input_names"]}
+            hidden = self.session.run(None, feeds)[0]
+
+            # Mean pooling sur les tokens réels
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.config["normalize"]:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings[batch_idx] = pooled
+
+        return embeddings[0] if single else embeddings
+
+
+def create_encoder(name, model_name, data_path="data", device="cpu", num_threads=None):
+    """Instancie l'encodeur demandé ("torch" ou "onnx-int8")."""
+    if name == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device)
+    if name == "onnx-int8":
+        return OnnxInt8Encoder(model_name, os.path.join(data_path, "onnx", model_name), num_threads=num_threads)
+    raise ValueError(f"Encodeur inconnu : {name} (attendu : {', '.join(ENCODERS)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export ONNX int8 de l'encodeur SBERT.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--data-path", default="data")
+    args = parser.parse_args()
+    export_onnx_int8(args.model, os.path.join(args.data_path, "onnx", args.model))
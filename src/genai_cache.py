@@ -0,0 +1,138 @@
+import time
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class GenAICacheStore:
+    """
+    Cache persistant des réponses IA sur SQLite en mode WAL.
+
+    - Une écriture = un INSERT (coût constant, indépendant de la taille du cache).
+    - Plusieurs processus / sessions Streamlit lisent et écrivent le même fichier
+      sans s'écraser : chaque entrée est une ligne, pas un dict en mémoire.
+    - Eviction optionnelle : TTL (secondes) et/ou nombre max d'entrées (LRU).
+    - Index optionnel de vecteurs (table vectors) pour retrouver une réponse
+      par similarité, au sein d'une portée (ex: bios d'un même métier).
+
+    S'utilise comme un dict : `key in store`, `store[key]`, `store[key] = value`.
+    """
+
+    def __init__(self, db_path="genai_cache.db", ttl_seconds=None, max_entries=None, evict_every=256):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON entries(accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                " key TEXT PRIMARY KEY, scope TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_vectors_scope ON vectors(scope)")
+
+        self.evict()
+
+    def _connect(self):
+        """Une connexion par thread (sqlite3 ne partage pas les connexions entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        """Retourne la valeur en cache (hors entrées expirées) et rafraîchit son accès LRU."""
+        conn = self._connect()
+        row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+
+        now = time.time()
+        if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return default
+
+        if self.max_entries is not None:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        """Ajoute ou remplace une entrée."""
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def set_vector(self, key, scope, vector):
+        """Indexe le vecteur (normalisé, float32) de l'entrée key dans la portée scope."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO vectors (key, scope, vector) VALUES (?, ?, ?)",
+            (key, scope, np.asarray(vector, dtype=np.float32).tobytes())
+        )
+
+    def nearest_vector(self, scope, vector, min_similarity):
+        """
+        Clé de l'entrée de la portée scope la plus proche de vector (produit
+        scalaire, vecteurs normalisés) si elle atteint min_similarity, sinon None.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        rows = self._connect().execute(
+            "SELECT v.key, v.vector FROM vectors v JOIN entries e ON e.key = v.key WHERE v.scope = ?",
+            (scope,)
+        ).fetchall()
+        # Vecteurs d'un autre modèle (autre dimension) ignorés
+        rows = [(key, blob) for key, blob in rows if len(blob) == vector.nbytes]
+        if not rows:
+            return None
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        return rows[best][0] if similarities[best] >= min_similarity else None
+
+    def evict(self):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entries."""
+        conn = self._connect()
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        # Vecteurs dont la réponse a été évincée
+        conn.execute("DELETE FROM vectors WHERE key NOT IN (SELECT key FROM entries)")
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
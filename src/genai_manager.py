@@ -1,94 +1,398 @@
 import os
 import json
+import time
 import hashlib
-import google.generativeai as genai
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
 from dotenv import load_dotenv
 
+from src.genai_cache import GenAICacheStore
+from src.llm_backends import create_backend
+from src.metrics import METRICS
+from src.referential_bundle import load_or_build_bundle
+
 load_dotenv()
 API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Entre dans toutes les clés de cache : à incrémenter quand un prompt change
+PROMPT_VERSION = 1
+
 class GenAIManager:
-    def __init__(self, cache_file="genai_cache.json"):
+    def __init__(self, cache_file="genai_cache.db", cache_ttl=None, cache_max_entries=None, backend=None,
+                 max_workers=8, timeout=60, max_retries=2, backoff=1.0, data_path="data",
+                 embedder=None, bio_similarity=None, bundle=None):
         """
         Gestionnaire IA optimisé : Modèle Flash, Cache MD5, Prompts professionnels.
         Respecte les contraintes : Pas d'emojis en sortie, Ton corporatif.
+
+        Le cache est une base SQLite (WAL) partagée entre sessions et processus.
+        cache_ttl (secondes) et cache_max_entries (LRU) bornent sa taille ; par
+        défaut AISCA_GENAI_CACHE_TTL (30 jours) et AISCA_GENAI_CACHE_MAX
+        (100 000 entrées), 0 désactivant la borne.
+
+        Concurrence : les appels au modèle tournent dans un pool de max_workers
+        threads, avec un délai max par tentative (timeout, secondes) et max_retries
+        nouvelles tentatives espacées de backoff * 2^n secondes ; le demandeur
+        attend toutes les tentatives et leurs pauses (voir _deadline). Deux
+        demandes identiques en cours partagent le même appel (single-flight).
+        backend : LLMBackend à utiliser (ex: LocalBackend pour les tests) ; par
+        défaut create_backend() lit la configuration (AISCA_LLM_BACKEND, débit,
+        concurrence) et place un limiteur de débit devant Gemini.
+        data_path : dossier du référentiel compilé (noms des blocs pour les prompts).
+        bundle : référentiel déjà chargé (ex: celui du moteur SBERT), pour ne pas
+        relire ni revérifier le fichier une seconde fois au démarrage.
+
+        Les clés de cache sont construites sur les entrées canoniques de chaque
+        prompt (métier, ensemble trié des blocs faibles, texte normalisé) et non
+        sur le texte du prompt : ordre des blocs, casse et espaces ne changent
+        pas la clé.
+        embedder : fonction textes -> matrice d'embeddings (ex: SBERTEngine.encode).
+        Avec bio_similarity (cosinus, ex: 0.95 ; défaut AISCA_BIO_SIMILARITY),
+        une bio absente du cache réutilise celle d'un profil quasi identique
+        (même métier, mêmes compétences) au-delà de ce seuil.
         """
         self.cache_file = cache_file
-        self.cache = self._load_cache()
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv("AISCA_GENAI_CACHE_TTL", 30 * 86400)) or None
+        if cache_max_entries is None:
+            cache_max_entries = int(os.getenv("AISCA_GENAI_CACHE_MAX", 100000)) or None
+        self.cache = GenAICacheStore(
+            cache_file,
+            ttl_seconds=cache_ttl,
+            max_entries=cache_max_entries
+        )
         
         # Permet de traduire les IDs techniques en noms métiers pour le prompt
-        self.referentiel_map = {
-            "bloc_1": "Architecture Data & Modélisation",
-            "bloc_2": "Ingénierie Big Data & DevOps",
-            "bloc_3": "Analyse BI & Visualisation",
-            "bloc_4": "Data Science & IA Avancée",
-            "bloc_5": "Gouvernance & Qualité des Données"
-        }
-        
-        if not API_KEY:
-            print("[ERREUR] Pas de clé API trouvée dans le fichier .env")
-            self.model = None
-            return
+        self.data_path = data_path
+        self.reload_referential(bundle)
 
-        # Configuration de l'API Google
-        genai.configure(api_key=API_KEY)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Pool des appels au modèle, pool des tâches de haut niveau (séparés pour
+        # qu'une tâche en attente d'un appel ne bloque jamais un worker d'appel)
+        self._calls_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="genai-call")
+        self._tasks_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="genai-task")
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        self.backend = backend if backend is not None else create_backend(api_key=API_KEY)
+
+        self.embedder = embedder
+        similarity = bio_similarity if bio_similarity is not None else os.getenv("AISCA_BIO_SIMILARITY")
+        self.bio_similarity = float(similarity) if similarity else None
+        # Vecteurs des bios en cours de génération, indexés une fois la réponse en cache
+        self._pending_vectors = {}
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def reload_referential(self, bundle=None):
+        """Noms des blocs depuis le référentiel compilé (bundle fourni par le rechargement du moteur)."""
+        bundle = bundle or load_or_build_bundle(self.data_path)
+        self.referentiel_map = bundle.block_names if bundle is not None else {}
+
+    def warm_up(self):
+        """Prépare le backend (SDK, client) en arrière-plan ; retourne le Future."""
+        if not self.backend:
+            return None
+        return self._calls_executor.submit(self.backend.warm_up)
+
+    def _generate(self, prompt, key_prefix, cache_key=None, semantic=None):
+        """
+        Fonction centrale de génération avec gestion du cache MD5.
+        cache_key : clé canonique (voir _cache_key) ; par défaut MD5 du prompt.
+        semantic : (portée, texte) pour la recherche par similarité (voir _cache_lookup).
+        """
+        if not self.backend: return "Service IA indisponible (Clé API manquante)."
+
+        # 1. Clé construite sur les entrées du prompt
+        # Si elles ne changent pas, on ne rappelle pas Google 
+        cache_key = cache_key or self._cache_key(key_prefix, prompt=prompt)
         
-        # On utilise gemini-2.5-flash qui est le standard actuel pour la rapidité
+        # 2. Vérification Cache
+        cached = self._cache_lookup(cache_key, semantic)
+        if cached is not None:
+            return cached
+
+        # 3. Appel API, partagé avec les demandes identiques déjà en cours
+        return self._await_call(cache_key, prompt)
+
+    def _deadline(self):
+        """
+        Attente max d'un demandeur : toutes les tentatives (timeout chacune) et
+        leurs pauses. self.timeout ne borne qu'une tentative côté backend.
+        """
+        return (self.max_retries + 1) * self.timeout + sum(self.backoff * 2 ** n for n in range(self.max_retries))
+
+    def _await_call(self, cache_key, prompt):
+        """Appel au modèle (single-flight), sans lecture comptée du cache : texte ou message d'erreur."""
+        future = self._submit_call(cache_key, prompt)
+        deadline = self._deadline()
         try:
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-            print("[INFO] Modèle IA chargé : gemini-2.5-flash (Mode Rapide)")
+            return future.result(timeout=deadline)
+        except FutureTimeoutError:
+            return f"Erreur de génération : délai de {deadline:g}s dépassé."
         except Exception as e:
-            print(f"[WARN] Erreur chargement Flash ({e}), fallback sur Pro.")
-            self.model = genai.GenerativeModel('gemini-pro')
+            return f"Erreur de génération : {str(e)}"
 
-    def _load_cache(self):
-        """Charge le cache depuis le disque pour économiser les appels API."""
-        if os.path.exists(self.cache_file):
+    def _cache_lookup(self, cache_key, semantic=None):
+        """
+        Lecture du cache comptée dans les métriques, par type de prompt : hit (clé
+        exacte), semantic_hit (profil proche) ou miss.
+        semantic : (portée, texte). Si la clé exacte est absente, le texte est encodé
+        et comparé aux réponses déjà en cache de la même portée ; sans réponse assez
+        proche, son vecteur est indexé dès que la génération est en cache.
+        """
+        kind = cache_key.rsplit("_", 1)[0]
+        cached = self.cache.get(cache_key)
+        result = "hit"
+        if cached is None and semantic is not None and self.embedder is not None and self.bio_similarity:
+            scope, text = semantic
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except: return {}
-        return {}
+                vector = np.asarray(self.embedder([text]), dtype=np.float32)[0]
+                vector /= max(float(np.linalg.norm(vector)), 1e-12)
+                match = self.cache.nearest_vector(scope, vector, self.bio_similarity)
+                cached = self.cache.get(match) if match else None
+                if cached is None:
+                    self._pending_vectors[cache_key] = (scope, vector)
+                result = "semantic_hit"
+            except Exception as e:
+                print(f"[WARN] Recherche sémantique indisponible ({e}).")
+        if cached is None:
+            result = "miss"
 
-    def _save_cache(self):
-        """Sauvegarde les nouvelles réponses dans le fichier JSON."""
+        METRICS.inc("aisca_cache_requests_total", cache="genai", prompt=kind, result=result)
+        with self._stats_lock:
+            self._stats[kind, result] += 1
+        return cached
+
+    def _store(self, cache_key, text):
+        """Mise en cache d'une réponse générée (et de son vecteur, voir _cache_lookup)."""
+        self.cache.set(cache_key, text)
+        pending = self._pending_vectors.pop(cache_key, None)
+        if pending is not None:
+            self.cache.set_vector(cache_key, *pending)
+
+    def cache_stats(self):
+        """Par type de prompt : hits exacts, hits sémantiques, misses et taux de hit."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        report = {}
+        for kind in sorted({kind for kind, _ in stats}):
+            counts = {result: stats.get((kind, result), 0) for result in ("hit", "semantic_hit", "miss")}
+            total = sum(counts.values())
+            counts["hit_rate"] = (counts["hit"] + counts["semantic_hit"]) / total if total else 0.0
+            report[kind] = counts
+        return report
+
+    @staticmethod
+    def _normalize(text):
+        """Forme canonique d'un texte pour les clés : casse et espaces ignorés."""
+        return " ".join(str(text).casefold().split())
+
+    @staticmethod
+    def _cache_key(key_prefix, **entrees):
+        """Clé de cache : préfixe + MD5 des entrées canoniques (JSON trié) et de PROMPT_VERSION."""
+        payload = json.dumps({"version": PROMPT_VERSION, **entrees}, sort_keys=True, ensure_ascii=False)
+        return f"{key_prefix}_{hashlib.md5(payload.encode('utf-8')).hexdigest()}"
+
+    def _submit_call(self, cache_key, prompt, store=True):
+        """
+        Single-flight : un seul appel au modèle par clé de cache à un instant donné.
+        Les demandeurs suivants récupèrent le Future de l'appel déjà lancé.
+        store=False : la réponse brute n'est pas mise en cache (ex: lots d'enrichissement).
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            if future is not None:
+                return future
+
+            # L'appel concurrent a pu se terminer entre la lecture du cache et ici
+            cached = self.cache.get(cache_key) if store else None
+            if cached is not None:
+                self._pending_vectors.pop(cache_key, None)
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._calls_executor.submit(self._call_with_retry, cache_key, prompt, store)
+            self._inflight[cache_key] = future
+
+        # Hors du verrou : si l'appel est déjà fini, le callback s'exécute tout de suite ici
+        future.add_done_callback(lambda f: self._release_inflight(cache_key, f))
+        return future
+
+    def _release_inflight(self, cache_key, future):
+        with self._inflight_lock:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+
+    def _call_with_retry(self, cache_key, prompt, store=True):
+        """Appel au modèle avec nouvelles tentatives (backoff exponentiel) puis mise en cache."""
+        # Type de prompt (BIO, PLAN, ENRICH...) : préfixe de la clé de cache
+        kind = cache_key.rsplit("_", 1)[0]
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de sauvegarder le cache : {e}")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    # Temperature 0.3 = Créativité faible pour rester factuel et pro
+                    with METRICS.span("aisca_genai_call_seconds", prompt=kind):
+                        response = self.backend.generate(prompt, temperature=0.3, timeout=self.timeout)
+                    clean_text = response.strip()
+                    METRICS.inc("aisca_genai_calls_total", prompt=kind, outcome="ok")
+
+                    # Mise en cache (une seule ligne insérée)
+                    if store:
+                        self._store(cache_key, clean_text)
+                    return clean_text
+                except Exception:
+                    METRICS.inc("aisca_genai_calls_total", prompt=kind, outcome="error")
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self.backoff * (2 ** attempt))
+        finally:
+            # Génération échouée : son vecteur en attente ne sera jamais indexé
+            self._pending_vectors.pop(cache_key, None)
 
-    def _generate(self, prompt, key_prefix):
+    def _generate_stream(self, prompt, key_prefix, cache_key=None, semantic=None):
         """
-        Fonction centrale de génération avec gestion du cache MD5.
+        Version streamée de _generate. L'appel part tout de suite (dans le pool
+        d'appels) et la méthode retourne un générateur des morceaux de texte au fil
+        de leur arrivée ; le texte complet est mis en cache à la fin du flux.
+        Un hit de cache, ou un appel identique déjà en cours, donne le texte
+        complet en un seul morceau.
         """
-        if not self.model: return "Service IA indisponible (Clé API manquante)."
+        if not self.backend:
+            return iter(["Service IA indisponible (Clé API manquante)."])
 
-        # 1. Création d'une clé unique basée sur le contenu du prompt (MD5)
-        # Si le prompt ne change pas, on ne rappelle pas Google 
-        prompt_hash = hashlib.md5(prompt.encode('utf-8')).hexdigest()
-        cache_key = f"{key_prefix}_{prompt_hash}"
-        
-        # 2. Vérification Cache
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cache_key = cache_key or self._cache_key(key_prefix, prompt=prompt)
+        cached = self._cache_lookup(cache_key, semantic)
+        if cached is not None:
+            return iter([cached])
 
-        # 3. Appel API
+        chunks = queue.Queue()
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            if future is None:
+                # Comme _submit_call : le flux concurrent a pu finir entre la lecture du cache et ici
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self._pending_vectors.pop(cache_key, None)
+                    return iter([cached])
+                future = self._calls_executor.submit(self._stream_with_retry, cache_key, prompt, chunks)
+                self._inflight[cache_key] = future
+            else:
+                chunks = None
+        future.add_done_callback(lambda f: self._release_inflight(cache_key, f))
+
+        if chunks is None:
+            return self._iter_result(future)
+        return self._iter_chunks(future, chunks)
+
+    def _iter_result(self, future):
+        """Texte d'un appel déjà en cours, en un morceau (ou le message d'erreur)."""
+        deadline = self._deadline()
         try:
-            # Temperature 0.3 = Créativité faible pour rester factuel et pro
-            response = self.model.generate_content(prompt, generation_config={"temperature": 0.3})
-            clean_text = response.text.strip()
-            
-            # Mise en cache
-            self.cache[cache_key] = clean_text
-            self._save_cache()
-            return clean_text
+            yield future.result(timeout=deadline)
+        except FutureTimeoutError:
+            yield f"Erreur de génération : délai de {deadline:g}s dépassé."
         except Exception as e:
-            return f"Erreur de génération : {str(e)}"
+            yield f"Erreur de génération : {str(e)}"
+
+    def _iter_chunks(self, future, chunks):
+        """Morceaux publiés par _stream_with_retry, jusqu'au marqueur de fin (None)."""
+        # Une erreur en cours de flux s'affiche à la suite du texte déjà reçu
+        separator = ""
+        # Premier morceau : les nouvelles tentatives ont lieu avant lui
+        wait = self._deadline()
+        while True:
+            try:
+                chunk = chunks.get(timeout=wait)
+            except queue.Empty:
+                yield f"{separator}Erreur de génération : délai de {wait:g}s dépassé."
+                return
+            if chunk is None:
+                break
+            separator = "\n\n"
+            wait = self.timeout
+            yield chunk
+
+        error = future.exception(timeout=self.timeout)
+        if error is not None:
+            yield f"{separator}Erreur de génération : {str(error)}"
+
+    def _stream_with_retry(self, cache_key, prompt, chunks):
+        """
+        Appel streamé au modèle : chaque morceau est publié dans chunks dès son
+        arrivée, le texte complet est mis en cache à la fin. Nouvelle tentative
+        (backoff exponentiel) seulement si l'échec survient avant le premier morceau.
+        """
+        kind = cache_key.rsplit("_", 1)[0]
+        try:
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                parts = []
+                try:
+                    with METRICS.span("aisca_genai_call_seconds", prompt=kind):
+                        for chunk in self.backend.generate_stream(prompt, temperature=0.3, timeout=self.timeout):
+                            if not parts:
+                                METRICS.observe("aisca_genai_first_chunk_seconds", time.perf_counter() - start,
+                                                prompt=kind)
+                            parts.append(chunk)
+                            chunks.put(chunk)
+                    METRICS.inc("aisca_genai_calls_total", prompt=kind, outcome="ok")
+                    clean_text = "".join(parts).strip()
+                    self._store(cache_key, clean_text)
+                    return clean_text
+                except Exception:
+                    METRICS.inc("aisca_genai_calls_total", prompt=kind, outcome="error")
+                    if parts or attempt == self.max_retries:
+                        raise
+                    time.sleep(self.backoff * (2 ** attempt))
+        finally:
+            self._pending_vectors.pop(cache_key, None)
+            chunks.put(None)
+
+    def generer_en_parallele(self, appels):
+        """
+        Lance plusieurs générations indépendantes en même temps.
+        appels : dict nom -> (méthode, arg1, arg2, ...), par exemple
+            {"bio": (self.generer_bio, inputs, metier, comps),
+             "plan": (self.generer_plan_progression, metier, scores)}
+        Retourne un dict nom -> texte, dans le même ordre.
+        """
+        futures = {
+            nom: self._tasks_executor.submit(appel[0], *appel[1:])
+            for nom, appel in appels.items()
+        }
+        return {nom: future.result() for nom, future in futures.items()}
 
     def generer_bio(self, user_inputs, top_metier, top_competences):
         """Génère un résumé exécutif du profil."""
-        prompt = f"""
+        return self._generate(*self._requete_bio(user_inputs, top_metier, top_competences))
+
+    def generer_bio_stream(self, user_inputs, top_metier, top_competences):
+        """Version streamée de generer_bio : générateur des morceaux de texte (voir _generate_stream)."""
+        return self._generate_stream(*self._requete_bio(user_inputs, top_metier, top_competences))
+
+    def _requete_bio(self, user_inputs, top_metier, top_competences):
+        """
+        (prompt, préfixe, clé, recherche sémantique) du résumé exécutif. La clé porte
+        sur le métier, l'ensemble des compétences et le profil normalisés ; la
+        recherche sémantique compare les profils à métier et compétences égaux.
+        """
+        metier = self._normalize(top_metier)
+        competences = sorted({self._normalize(c) for c in top_competences})
+        profil = self._normalize(" ".join(user_inputs))
+        cache_key = self._cache_key("BIO", metier=metier, competences=competences, profil=profil)
+        scope = self._cache_key("BIO", metier=metier, competences=competences)
+        prompt = self._prompt_bio(user_inputs, top_metier, top_competences)
+        return prompt, "BIO", cache_key, (scope, profil)
+
+    def _prompt_bio(self, user_inputs, top_metier, top_competences):
+        """Prompt du résumé exécutif."""
+        return f"""
         Rôle : Expert RH spécialisé en Data.
         Tâche : Rédige une bio professionnelle courte (3 phrases max) à la 3ème personne.
         Cible Métier : {top_metier}
@@ -101,24 +405,42 @@ class GenAIManager:
         - Pas de phrases introductives type "Voici la bio".
         - Mets en valeur l'expertise technique.
         """
-        return self._generate(prompt, "BIO")
 
     def generer_plan_progression(self, metier_vise, scores_blocs):
         """Génère un plan d'action pour les blocs faibles (< 60%)."""
-        
+        return self._generate(*self._requete_plan(metier_vise, scores_blocs))
+
+    def generer_plan_progression_stream(self, metier_vise, scores_blocs):
+        """Version streamée de generer_plan_progression (voir _generate_stream)."""
+        return self._generate_stream(*self._requete_plan(metier_vise, scores_blocs))
+
+    def _requete_plan(self, metier_vise, scores_blocs):
+        """
+        (prompt, préfixe, clé) du plan : il ne dépend que du métier et de l'ensemble
+        des blocs faibles, quel que soit l'ordre ou la valeur exacte des scores.
+        """
+        points_faibles = self._points_faibles(scores_blocs)
+        cache_key = self._cache_key("PLAN", metier=self._normalize(metier_vise), lacunes=points_faibles)
+        return self._prompt_plan(metier_vise, points_faibles), "PLAN", cache_key
+
+    def _points_faibles(self, scores_blocs):
+        """Noms triés et dédoublonnés des blocs sous 60 %."""
         # Identification des lacunes via le mapping
-        points_faibles = []
+        points_faibles = set()
         for bloc_id, score in scores_blocs.items():
             if score < 0.6:
                 # On utilise le dictionnaire interne pour avoir un beau nom
-                nom_reel = self.referentiel_map.get(bloc_id, "Compétences Techniques Générales")
-                points_faibles.append(nom_reel)
+                points_faibles.add(self.referentiel_map.get(bloc_id, "Compétences Techniques Générales"))
+        return sorted(points_faibles)
+
+    def _prompt_plan(self, metier_vise, points_faibles):
+        """Prompt du plan de progression."""
 
         # Si le candidat est parfait partout, on propose du leadership
         if not points_faibles:
             points_faibles = ["Leadership Technique", "Architecture d'Entreprise"]
 
-        prompt = f"""
+        return f"""
         Rôle : Mentor Tech Senior (CTO).
         Objectif : Préparer le candidat pour le poste de {metier_vise}.
         Lacunes identifiées à combler : {', '.join(points_faibles)}.
@@ -131,7 +453,22 @@ class GenAIManager:
         - Pas de jargon marketing, uniquement des conseils techniques ou méthodologiques.
         - Format liste à puces.
         """
-        return self._generate(prompt, "PLAN")
+
+    def _prompt_enrichissement(self, phrase):
+        """Prompt d'enrichissement d'une expression courte."""
+        return f"""
+        Tâche : Transforme ce mot-clé ou cette expression courte en une phrase de compétence professionnelle pour un CV.
+        Entrée : "{phrase}"
+        
+        RÈGLES STRICTES :
+        1. N'ajoute AUCUNE technologie ou compétence qui n'est pas implicite dans le mot d'origine.
+        2. La phrase doit être grammaticalement complète (Sujet/Verbe ou Action).
+        3. PAS d'emojis.
+        4. Restez factuel.
+        
+        Exemple : "Python" -> "Développement de scripts et applications en langage Python."
+        Exemple : "Gestion projet" -> "Pilotage et suivi de projets techniques."
+        """
 
     def enrichir_phrase_courte(self, phrase):
         """Reformule les mots-clés isolés pour donner du contexte à SBERT."""
@@ -139,17 +476,94 @@ class GenAIManager:
         if len(phrase.split()) > 6: 
             return phrase
 
+        return self._generate(self._prompt_enrichissement(phrase), "ENRICH", self._cle_enrichissement(phrase))
+
+    def _cle_enrichissement(self, phrase):
+        """Clé ENRICH_ : expression normalisée (casse et espaces ignorés)."""
+        return self._cache_key("ENRICH", phrase=self._normalize(phrase))
+
+    def enrichir_phrases(self, phrases, taille_lot=50):
+        """
+        Version groupée de enrichir_phrase_courte : les expressions courtes absentes
+        du cache partent par paquets de taille_lot dans un seul prompt JSON.
+        Chaque réponse est rangée sous la même clé ENRICH_ que l'appel unitaire.
+        En cas de réponse illisible ou incomplète, repli sur les appels unitaires.
+        Retourne la liste des phrases enrichies, dans l'ordre d'entrée.
+        """
+        resultats = list(phrases)
+        a_traiter = {}
+        for i, phrase in enumerate(phrases):
+            if len(phrase.split()) > 6:
+                continue
+            cached = self._cache_lookup(self._cle_enrichissement(phrase))
+            if cached is not None:
+                resultats[i] = cached
+            else:
+                # Une seule demande par forme normalisée (la première écriture rencontrée)
+                a_traiter.setdefault(self._normalize(phrase), (phrase, []))[1].append(i)
+
+        if a_traiter and not self.backend:
+            return [self.enrichir_phrase_courte(p) for p in phrases]
+
+        uniques = list(a_traiter.values())
+        for debut in range(0, len(uniques), taille_lot):
+            lot = uniques[debut:debut + taille_lot]
+            for (_, indices), enrichie in zip(lot, self._enrichir_lot([phrase for phrase, _ in lot])):
+                for i in indices:
+                    resultats[i] = enrichie
+
+        return resultats
+
+    def _enrichir_lot(self, lot):
+        """Un aller-retour pour tout le lot, puis repli unitaire sur les éléments manquants."""
+        entrees = json.dumps([{"id": i, "entree": p} for i, p in enumerate(lot)], ensure_ascii=False)
         prompt = f"""
-        Tâche : Transforme ce mot-clé ou cette expression courte en une phrase de compétence professionnelle pour un CV.
-        Entrée : "{phrase}"
+        Tâche : Transforme chacun des mots-clés ou expressions courtes ci-dessous en une phrase de compétence professionnelle pour un CV.
+        Entrées (JSON) : {entrees}
         
         RÈGLES STRICTES :
         1. N'ajoute AUCUNE technologie ou compétence qui n'est pas implicite dans le mot d'origine.
-        2. La phrase doit être grammaticalement complète (Sujet/Verbe ou Action).
+        2. Chaque phrase doit être grammaticalement complète (Sujet/Verbe ou Action).
         3. PAS d'emojis.
         4. Restez factuel.
+        5. Réponds UNIQUEMENT par un tableau JSON de la forme [{{"id": 0, "phrase": "..."}}], un objet par entrée, sans texte autour.
         
         Exemple : "Python" -> "Développement de scripts et applications en langage Python."
         Exemple : "Gestion projet" -> "Pilotage et suivi de projets techniques."
         """
-        return self._generate(prompt, "ENRICH")
\ No newline at end of file
+
+        try:
+            future = self._submit_call(self._cache_key("ENRICH_LOT", prompt=prompt), prompt, store=False)
+            phrases = self._parse_lot(future.result(timeout=self._deadline()), len(lot))
+        except Exception as e:
+            print(f"[WARN] Enrichissement groupé indisponible ({e}), repli unitaire.")
+            phrases = {}
+
+        resultats = []
+        manquants = {}
+        for i, phrase in enumerate(lot):
+            if i in phrases:
+                self.cache.set(self._cle_enrichissement(phrase), phrases[i])
+                resultats.append(phrases[i])
+            else:
+                # Déjà compté comme miss par enrichir_phrases : pas de seconde lecture du cache
+                prompt_unitaire = self._prompt_enrichissement(phrase)
+                manquants[i] = (self._await_call, self._cle_enrichissement(phrase), prompt_unitaire)
+                resultats.append(None)
+
+        for i, enrichie in self.generer_en_parallele(manquants).items():
+            resultats[i] = enrichie
+        return resultats
+
+    @staticmethod
+    def _parse_lot(texte, taille):
+        """Extrait {id: phrase} d'une réponse JSON (éventuellement entourée de ```json)."""
+        debut, fin = texte.find("["), texte.rfind("]")
+        items = json.loads(texte[debut:fin + 1])
+
+        phrases = {}
+        for item in items:
+            i, phrase = item.get("id"), item.get("phrase")
+            if isinstance(i, int) and 0 <= i < taille and isinstance(phrase, str) and phrase.strip():
+                phrases[i] = phrase.strip()
+        return phrases
@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+
+
+class LLMBackend:
+    """
+    Interface d'un modèle de génération de texte.
+    Une implémentation n'a qu'une méthode à fournir : generate().
+    """
+
+    name = "base"
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        """Retourne le texte généré pour prompt (lève une exception en cas d'échec)."""
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, temperature=0.3, timeout=None):
+        """
+        Générateur des morceaux de texte au fil de leur production. Par défaut,
+        un seul morceau : la réponse complète de generate().
+        """
+        yield self.generate(prompt, temperature=temperature, timeout=timeout)
+
+    def warm_up(self):
+        """Prépare le backend (imports, client) avant la première requête. Optionnel."""
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google.generativeai (gemini-2.5-flash, repli sur gemini-pro)."""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model_name="gemini-2.5-flash", fallback_model="gemini-pro"):
+        # Le SDK Google (import lourd) n'est chargé qu'au premier appel ou au warm-up
+        self.api_key = api_key
+        self.model_name = model_name
+        self.fallback_model = fallback_model
+        self.model = None
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        if self.model is not None:
+            return
+        with self._lock:
+            if self.model is not None:
+                return
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+
+            # On utilise gemini-2.5-flash qui est le standard actuel pour la rapidité
+            try:
+                self.model = genai.GenerativeModel(self.model_name)
+                print(f"[INFO] Modèle IA chargé : {self.model_name} (Mode Rapide)")
+            except Exception as e:
+                print(f"[WARN] Erreur chargement Flash ({e}), fallback sur Pro.")
+                self.model = genai.GenerativeModel(self.fallback_model)
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        self.warm_up()
+        request_options = {"timeout": timeout} if timeout else None
+        response = self.model.generate_content(
+            prompt,
+            generation_config={"temperature": temperature},
+            request_options=request_options
+        )
+        return response.text
+
+    def generate_stream(self, prompt, temperature=0.3, timeout=None):
+        self.warm_up()
+        request_options = {"timeout": timeout} if timeout else None
+        response = self.model.generate_content(
+            prompt,
+            generation_config={"temperature": temperature},
+            request_options=request_options,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+# Ligne des entrées d'un prompt d'enrichissement groupé (GenAIManager._enrichir_lot)
+_BATCH_INPUTS = re.compile(r"Entrées \(JSON\) : (\[.*\])")
+
+
+class LocalBackend(LLMBackend):
+    """
+    Modèle local déterministe pour les tests et benchmarks hors ligne.
+    - latency / jitter : temps de réponse simulé (secondes),
+    - error_rate : proportion d'appels qui lèvent une erreur,
+    - seed : graine des tirages (latence et erreurs) pour des runs reproductibles.
+    La réponse ne dépend que du prompt ; un prompt groupé reçoit un tableau
+    JSON [{"id": ..., "phrase": ...}], un objet par entrée.
+    """
+
+    name = "local"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Backend local : délai de {timeout}s dépassé")
+        time.sleep(delay)
+
+        if fail:
+            raise RuntimeError("Backend local : erreur injectée")
+
+        return self._answer(prompt)
+
+    def generate_stream(self, prompt, temperature=0.3, timeout=None):
+        """Même réponse que generate(), mot par mot, la latence étant répartie entre les mots."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Backend local : délai de {timeout}s dépassé")
+        if fail:
+            raise RuntimeError("Backend local : erreur injectée")
+
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(delay / len(words))
+            yield word if i == 0 else " " + word
+
+    @staticmethod
+    def _answer(prompt):
+        batch = _BATCH_INPUTS.search(prompt)
+        if batch:
+            items = json.loads(batch.group(1))
+            return json.dumps([{"id": item["id"], "phrase": LocalBackend._answer(item["entree"])} for item in items],
+                              ensure_ascii=False)
+        digest = hashlib.md5(prompt.encode('utf-8')).hexdigest()[:12]
+        return f"Réponse locale déterministe ({digest})."
+
+
+class TokenBucket:
+    """Seau à jetons : rate jetons par seconde, au plus capacity en réserve."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, timeout=None):
+        """Attend qu'un jeton soit disponible. Retourne False si timeout est dépassé."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class RateLimitedBackend(LLMBackend):
+    """
+    Place un limiteur de débit (seau à jetons) et un plafond de requêtes
+    simultanées devant n'importe quel backend.
+    """
+
+    def __init__(self, backend, rate=None, burst=None, max_concurrency=None):
+        self.backend = backend
+        self.name = backend.name
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def warm_up(self):
+        self.backend.warm_up()
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        if self.bucket and not self.bucket.acquire(timeout=timeout):
+            raise TimeoutError("Quota de requêtes atteint (limiteur de débit)")
+
+        if self.semaphore is None:
+            return self.backend.generate(prompt, temperature=temperature, timeout=timeout)
+        if not self.semaphore.acquire(timeout=timeout):
+            raise TimeoutError("Trop de requêtes simultanées vers le modèle")
+        try:
+            return self.backend.generate(prompt, temperature=temperature, timeout=timeout)
+        finally:
+            self.semaphore.release()
+
+    def generate_stream(self, prompt, temperature=0.3, timeout=None):
+        # Le créneau de concurrence est tenu jusqu'au dernier morceau
+        if self.bucket and not self.bucket.acquire(timeout=timeout):
+            raise TimeoutError("Quota de requêtes atteint (limiteur de débit)")
+
+        if self.semaphore is None:
+            yield from self.backend.generate_stream(prompt, temperature=temperature, timeout=timeout)
+            return
+        if not self.semaphore.acquire(timeout=timeout):
+            raise TimeoutError("Trop de requêtes simultanées vers le modèle")
+        try:
+            yield from self.backend.generate_stream(prompt, temperature=temperature, timeout=timeout)
+        finally:
+            self.semaphore.release()
+
+
+def create_backend(name=None, api_key=None, rate=None, burst=None, max_concurrency=None, **options):
+    """
+    Construit le backend configuré (variables d'environnement par défaut) :
+    - AISCA_LLM_BACKEND : "gemini" (défaut) ou "local",
+    - AISCA_LLM_RATE : requêtes par seconde autorisées (défaut 5, 0 = illimité),
+    - AISCA_LLM_BURST : rafale max (défaut 10),
+    - AISCA_LLM_CONCURRENCY : requêtes simultanées max (défaut 4, 0 = illimité).
+    options est transmis au constructeur du backend (ex: latency pour "local").
+    Retourne None si Gemini est demandé sans clé API.
+    """
+    name = name or os.getenv("AISCA_LLM_BACKEND", "gemini")
+    rate = float(os.getenv("AISCA_LLM_RATE", 5)) if rate is None else rate
+    burst = float(os.getenv("AISCA_LLM_BURST", 10)) if burst is None else burst
+    max_concurrency = int(os.getenv("AISCA_LLM_CONCURRENCY", 4)) if max_concurrency is None else max_concurrency
+
+    if name == "local":
+        backend = LocalBackend(**options)
+    elif name == "gemini":
+        if not api_key:
+            print("[ERREUR] Pas de clé API trouvée dans le fichier .env")
+            return None
+        backend = GeminiBackend(api_key, **options)
+    else:
+        raise ValueError(f"Backend IA inconnu : {name}")
+
+    return RateLimitedBackend(backend, rate=rate, burst=burst, max_concurrency=max_concurrency)
@@ -0,0 +1,211 @@
+"""
+Mesures de performance : registre de métriques, spans de durée et traces.
+
+- METRICS est le registre partagé par tout le processus. Histogrammes (durées)
+  et compteurs sont indexés par nom + étiquettes ; une mesure coûte un
+  perf_counter et une mise à jour sous verrou, sans allocation notable.
+- export_prometheus() produit le format texte Prometheus (route /metrics du
+  service de scoring).
+- trace() enregistre en plus tous les spans d'une requête ; si elle dépasse
+  AISCA_SLOW_REQUEST_MS, la trace est journalisée (niveau WARNING) et gardée
+  dans slow_traces.
+- get_logger() : loggers "aisca.*" dont le niveau suit AISCA_LOG_LEVEL
+  (WARNING par défaut) ; les affichages de debug passent par là.
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "aisca_scoring_stage_seconds": "Durée des étapes du scoring (nettoyage, encodage, similarités, blocs, métiers, résultat).",
+    "aisca_scoring_request_seconds": "Durée totale d'un appel de scoring.",
+    "aisca_scoring_candidates_total": "Candidats scorés.",
+    "aisca_scoring_inputs_total": "Entrées (phrases) encodées pour le scoring.",
+    "aisca_cache_requests_total": "Consultations des caches (query, embeddings, genai) par résultat hit / semantic_hit / miss.",
+    "aisca_genai_call_seconds": "Durée des appels au modèle de génération, par type de prompt.",
+    "aisca_genai_first_chunk_seconds": "Délai avant le premier morceau des générations streamées.",
+    "aisca_genai_calls_total": "Appels au modèle de génération par type de prompt et issue.",
+    "aisca_candidate_search_seconds": "Durée des recherches de candidats par fiche de poste.",
+    "aisca_referential_reload_seconds": "Durée des rechargements à chaud du référentiel (hors attente).",
+}
+
+_CURRENT_TRACE = ContextVar("aisca_trace", default=None)
+
+
+def get_logger(name):
+    """Logger "aisca.<name>" au niveau AISCA_LOG_LEVEL (WARNING par défaut)."""
+    logger = logging.getLogger(f"aisca.{name}")
+    logger.setLevel(os.getenv("AISCA_LOG_LEVEL", "WARNING").upper())
+    return logger
+
+
+logger = get_logger("metrics")
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Trace:
+    """Spans d'une requête : (nom, étiquettes, début relatif, durée) en secondes."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def add(self, name, labels, start, duration):
+        self.spans.append((name, labels, start - self.started, duration))
+
+    def to_dict(self, duration):
+        return {
+            "name": self.name,
+            "duration_ms": round(duration * 1e3, 3),
+            "spans": [
+                {"name": name, **labels, "start_ms": round(start * 1e3, 3), "duration_ms": round(d * 1e3, 3)}
+                for name, labels, start, d in self.spans
+            ],
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, slow_request_ms=None, max_traces=50):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        threshold = slow_request_ms if slow_request_ms is not None else os.getenv("AISCA_SLOW_REQUEST_MS")
+        self.slow_request_s = float(threshold) / 1000 if threshold else None
+        self.slow_traces = deque(maxlen=max_traces)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, seconds, **labels):
+        """Ajoute une durée à l'histogramme name{labels} et à la trace en cours."""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            trace.add(name, labels, time.perf_counter() - seconds, seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Mesure la durée du bloc dans l'histogramme name{labels}."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def trace(self, name):
+        """
+        Trace de requête : si le seuil de lenteur est configuré, tous les spans du
+        bloc (même thread / tâche) sont gardés et publiés quand il est dépassé.
+        """
+        if self.slow_request_s is None or _CURRENT_TRACE.get() is not None:
+            yield None
+            return
+
+        trace = Trace(name)
+        token = _CURRENT_TRACE.set(trace)
+        try:
+            yield trace
+        finally:
+            _CURRENT_TRACE.reset(token)
+            duration = time.perf_counter() - trace.started
+            if duration >= self.slow_request_s:
+                report = trace.to_dict(duration)
+                self.slow_traces.append(report)
+                logger.warning("Requête lente : %s", json.dumps(report, ensure_ascii=False))
+
+    def snapshot(self):
+        """Copie des compteurs et histogrammes (nombre, somme) pour les rapports."""
+        with self._lock:
+            return {
+                "counters": {self._format(n, l): v for (n, l), v in self._counters.items()},
+                "histograms": {self._format(n, l): {"count": h.count, "sum": h.sum}
+                               for (n, l), h in self._histograms.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+        self.slow_traces.clear()
+
+    @staticmethod
+    def _escape(value):
+        """Valeur d'étiquette au format d'exposition : \\, " et retours à la ligne échappés."""
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @classmethod
+    def _format(cls, name, labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return name
+        return name + "{" + ",".join(f'{k}="{cls._escape(v)}"' for k, v in pairs) + "}"
+
+    def export_prometheus(self):
+        """Toutes les métriques au format texte d'exposition Prometheus."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, (list(h.counts), h.sum, h.count, h.buckets)) for key, h in self._histograms.items()),
+                key=lambda item: item[0]
+            )
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{self._format(name, labels)} {value}")
+
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{self._format(name + '_bucket', labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self._format(name + '_sum', labels)} {total}")
+            lines.append(f"{self._format(name + '_count', labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,308 @@
+"""
+Référentiel compilé : compétences, blocs, sous-blocs, métiers et embeddings
+dans un seul fichier binaire versionné (data/referentiel.bundle).
+
+Sources fusionnées à la compilation :
+- competences.csv : liste des compétences (libellé "[Sous-bloc] texte", bloc),
+- metiers.csv : métiers et blocs requis,
+- referentiel.json : noms et descriptions des blocs, description et seuil des
+  métiers ; ses compétences et métiers ne servent que si les CSV sont absents.
+
+Format : MAGIC, version (uint32), taille de l'en-tête (uint64), en-tête JSON
+(métadonnées, colonnes texte, description des tableaux), puis les tableaux
+NumPy bruts alignés sur 64 octets. Le fichier est lu en un seul read() et les
+tableaux sont des vues sur ce buffer. content_hash (SHA-256 des métadonnées et
+des tableaux) est vérifié au chargement ; sources garde la signature (taille,
+date, SHA-256) des fichiers sources pour recompiler quand ils changent.
+
+Usage :
+    python -m src.referential_bundle build --encoder onnx-int8
+    python -m src.referential_bundle info
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_clean_data, clean_text_value, file_signature, is_fresh
+
+MAGIC = b"AISCAREF"
+FORMAT_VERSION = 1
+ALIGN = 64
+BUNDLE_NAME = "referentiel.bundle"
+SOURCES = ("competences.csv", "metiers.csv", "referentiel.json")
+SUB_BLOCK = re.compile(r"^\[([^\]]+)\]")
+_PREFIX = struct.Struct("<8sIQ")
+
+
+def source_signatures(data_path):
+    """Signature (taille, date, SHA-256) des fichiers sources présents dans data_path."""
+    return {name: file_signature(os.path.join(data_path, name))
+            for name in SOURCES if os.path.exists(os.path.join(data_path, name))}
+
+
+def sources_changed(data_path, signatures):
+    """True si un fichier source a été ajouté, supprimé ou modifié depuis signatures."""
+    present = {name for name in SOURCES if os.path.exists(os.path.join(data_path, name))}
+    return present != set(signatures) or not all(
+        is_fresh(os.path.join(data_path, name), signature) for name, signature in signatures.items()
+    )
+
+
+def _read_json_referential(data_path):
+    path = os.path.join(data_path, "referentiel.json")
+    if not os.path.exists(path):
+        return {"blocs_competences": [], "profils_metiers": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compile_referential(data_path="data"):
+    """
+    Compile les sources de data_path. Retourne (meta, arrays) prêts pour
+    write_bundle (ou ReferentialBundle(meta, arrays, None) sans passer par le disque).
+    """
+    referentiel = _read_json_referential(data_path)
+    json_blocks = {b["id_bloc"]: b for b in referentiel.get("blocs_competences", [])}
+    json_jobs = {j["id_metier"]: j for j in referentiel.get("profils_metiers", [])}
+
+    # 1. Compétences : CSV, sinon les sous-blocs du JSON
+    competences_csv = os.path.join(data_path, "competences.csv")
+    if os.path.exists(competences_csv):
+        df = load_clean_data(competences_csv)
+        competence_ids = df['CompetencyID'].astype(str).tolist()
+        labels = df['Competency'].astype(str).tolist()
+        competence_blocks = df['BlockID'].astype(str).tolist()
+        csv_block_names = dict(zip(competence_blocks, df['BlockName'].astype(str)))
+    else:
+        competence_ids, labels, competence_blocks, csv_block_names = [], [], [], {}
+        for bloc in json_blocks.values():
+            for sous_bloc in bloc.get("sous_blocs", []):
+                for competence in sous_bloc.get("competences", []):
+                    competence_ids.append(f"C{len(competence_ids) + 1:03d}")
+                    labels.append(clean_text_value(f"[{sous_bloc['nom']}] {competence}"))
+                    competence_blocks.append(bloc["id_bloc"])
+
+    # 2. Blocs (triés comme ScoreIndex) et sous-blocs, depuis le préfixe "[...]" des libellés
+    block_ids = sorted(set(competence_blocks))
+    block_pos = {bloc: i for i, bloc in enumerate(block_ids)}
+    unused = sorted(set(json_blocks) - set(block_ids))
+    if unused:
+        print(f"[WARN] Blocs sans compétence ignorés : {', '.join(unused)}")
+
+    sub_block_names, sub_block_block, sub_block_pos = [], [], {}
+    sub_block_of = np.full(len(labels), -1, dtype=np.int32)
+    for position, (label, bloc) in enumerate(zip(labels, competence_blocks)):
+        match = SUB_BLOCK.match(label)
+        if not match:
+            continue
+        key = (bloc, match.group(1).strip())
+        if key not in sub_block_pos:
+            sub_block_pos[key] = len(sub_block_names)
+            sub_block_names.append(key[1])
+            sub_block_block.append(block_pos[bloc])
+        sub_block_of[position] = sub_block_pos[key]
+
+    # 3. Métiers : CSV complété par le JSON (description, seuil, métiers absents du CSV)
+    jobs = []
+    metiers_csv = os.path.join(data_path, "metiers.csv")
+    if os.path.exists(metiers_csv):
+        for _, job in load_clean_data(metiers_csv).iterrows():
+            jobs.append((str(job.get('JobID', '')), str(job.get('Job Title', 'Inconnu')),
+                         [b.strip() for b in str(job.get('Required Competencies', '')).split(';')]))
+    known = {job_id for job_id, _, _ in jobs}
+    for job_id, job in json_jobs.items():
+        if job_id not in known:
+            jobs.append((job_id, job.get("titre", "Inconnu"), list(job.get("blocs_requis", []))))
+
+    job_matrix = np.zeros((len(jobs), len(block_ids)), dtype=np.float64)
+    for j, (_, _, required) in enumerate(jobs):
+        for bloc in required:
+            if bloc in block_pos:
+                job_matrix[j, block_pos[bloc]] += 1
+
+    meta = {
+        "sources": source_signatures(data_path),
+        "competence_ids": competence_ids,
+        "competence_labels": labels,
+        "block_ids": block_ids,
+        "block_names": [json_blocks.get(b, {}).get("nom") or csv_block_names.get(b, b) for b in block_ids],
+        "block_descriptions": [json_blocks.get(b, {}).get("description", "") for b in block_ids],
+        "sub_block_names": sub_block_names,
+        "job_ids": [job_id for job_id, _, _ in jobs],
+        "job_titles": [title for _, title, _ in jobs],
+        "job_descriptions": [json_jobs.get(job_id, {}).get("description", "") for job_id, _, _ in jobs],
+        "embeddings": None,
+    }
+    arrays = {
+        "block_of": np.array([block_pos[b] for b in competence_blocks], dtype=np.int32),
+        "sub_block_of": sub_block_of,
+        "sub_block_block": np.array(sub_block_block, dtype=np.int32),
+        "job_matrix": job_matrix,
+        "job_thresholds": np.array([json_jobs.get(job_id, {}).get("seuil_minimum", np.nan)
+                                    for job_id, _, _ in jobs], dtype=np.float64),
+    }
+    return meta, arrays
+
+
+def _content_hash(meta, arrays):
+    digest = hashlib.sha256(json.dumps(meta, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    for name in sorted(arrays):
+        digest.update(name.encode("utf-8"))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+def write_bundle(path, meta, arrays):
+    """Écriture atomique du bundle. Retourne son content_hash."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    content_hash = _content_hash(meta, arrays)
+    header = json.dumps({"meta": meta, "arrays": layout, "content_hash": content_hash},
+                        ensure_ascii=False).encode("utf-8")
+    start = -(-(_PREFIX.size + len(header)) // ALIGN) * ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp_path, path)
+    return content_hash
+
+
+def read_bundle(path, verify=True):
+    """Charge un bundle en un seul read(). ValueError si le fichier est invalide ou altéré."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _PREFIX.size:
+        raise ValueError(f"Référentiel compilé tronqué : {path}")
+    magic, version, header_size = _PREFIX.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Référentiel compilé incompatible : {path}")
+
+    header = json.loads(data[_PREFIX.size:_PREFIX.size + header_size].decode("utf-8"))
+    start = -(-(_PREFIX.size + header_size) // ALIGN) * ALIGN
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count,
+                                     offset=start + spec["offset"]).reshape(spec["shape"])
+
+    if verify and _content_hash(header["meta"], arrays) != header["content_hash"]:
+        raise ValueError(f"Empreinte du référentiel compilé invalide : {path}")
+    return ReferentialBundle(header["meta"], arrays, header["content_hash"])
+
+
+def load_or_build_bundle(data_path="data"):
+    """
+    Bundle de data_path, recompilé (sans embeddings) s'il est absent, illisible
+    ou si un fichier source a changé. None si aucune source n'est disponible.
+    """
+    path = os.path.join(data_path, BUNDLE_NAME)
+    has_sources = any(os.path.exists(os.path.join(data_path, name)) for name in SOURCES)
+    if os.path.exists(path):
+        try:
+            bundle = read_bundle(path)
+            # Sans sources (bundle déployé seul), le bundle fait foi
+            if not has_sources or not sources_changed(data_path, bundle.meta["sources"]):
+                return bundle
+            print("[INFO] Sources du référentiel modifiées, recompilation...")
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[ATTENTION] Référentiel compilé illisible ({e}), il sera recompilé.")
+
+    if not has_sources:
+        return None
+    meta, arrays = compile_referential(data_path)
+    try:
+        content_hash = write_bundle(path, meta, arrays)
+    except OSError as e:
+        print(f"[ATTENTION] Référentiel compilé non sauvegardé ({e}).")
+        content_hash = _content_hash(meta, arrays)
+    print(f"[INFO] Référentiel compilé ({len(meta['competence_labels'])} compétences) -> {path}")
+    return ReferentialBundle(meta, arrays, content_hash)
+
+
+class ReferentialBundle:
+    """Vue d'un référentiel compilé : colonnes texte (meta) et tableaux NumPy (arrays)."""
+
+    def __init__(self, meta, arrays, content_hash):
+        self.meta = meta
+        self.arrays = arrays
+        self.content_hash = content_hash
+
+    def __len__(self):
+        return len(self.meta["competence_labels"])
+
+    @property
+    def block_names(self):
+        """Dictionnaire id de bloc -> nom affiché."""
+        return dict(zip(self.meta["block_ids"], self.meta["block_names"]))
+
+    def df_competences(self):
+        """DataFrame (CompetencyID, Competency, BlockID, BlockName), dans l'ordre des sources."""
+        block_of = self.arrays["block_of"]
+        return pd.DataFrame({
+            'CompetencyID': self.meta["competence_ids"],
+            'Competency': self.meta["competence_labels"],
+            'BlockID': np.array(self.meta["block_ids"], dtype=object)[block_of] if len(block_of) else [],
+            'BlockName': np.array(self.meta["block_names"], dtype=object)[block_of] if len(block_of) else [],
+        })
+
+    def embeddings(self, model, version):
+        """Vecteurs des compétences s'ils ont été calculés par ce modèle / cette version, sinon None."""
+        info = self.meta.get("embeddings")
+        if info and info["model"] == model and info["version"] == version:
+            return self.arrays["embeddings"]
+        return None
+
+    def with_embeddings(self, vectors, model, version):
+        """Copie du bundle avec les embeddings de ce modèle (à écrire avec save)."""
+        meta = dict(self.meta, embeddings={"model": model, "version": version, "dim": int(vectors.shape[1])})
+        arrays = dict(self.arrays, embeddings=np.asarray(vectors, dtype=np.float32))
+        return ReferentialBundle(meta, arrays, None)
+
+    def save(self, path):
+        self.content_hash = write_bundle(path, self.meta, self.arrays)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compilation du référentiel en bundle binaire.")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--data-path", default="data", help="Dossier des sources et du bundle")
+    parser.add_argument("--encoder", default=None, help="Encodeur des embeddings (torch, onnx-int8)")
+    parser.add_argument("--no-embeddings", action="store_true", help="Compiler sans calculer les embeddings")
+    args = parser.parse_args(argv)
+    path = os.path.join(args.data_path, BUNDLE_NAME)
+
+    if args.command == "build":
+        meta, arrays = compile_referential(args.data_path)
+        write_bundle(path, meta, arrays)
+        if not args.no_embeddings:
+            # Le moteur complète le bundle avec les embeddings de son encodeur
+            from src.sbert_engine import SBERTEngine
+            SBERTEngine(data_path=args.data_path, encoder=args.encoder)
+
+    bundle = read_bundle(path)
+    embeddings = bundle.meta.get("embeddings")
+    print(f"[SUCCES] {path} : {len(bundle)} compétences, {len(bundle.meta['block_ids'])} blocs, "
+          f"{len(bundle.meta['sub_block_names'])} sous-blocs, {len(bundle.meta['job_ids'])} métiers, "
+          f"embeddings {embeddings['model'] + ' ' + embeddings['version'] if embeddings else 'absents'}, "
+          f"empreinte {bundle.content_hash[:12]}")
+
+
+if __name__ == "__main__":
+    main()
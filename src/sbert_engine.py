@@ -1,173 +1,505 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 import os
-import torch
+import logging
+import threading
+import time
+from itertools import islice
+from importlib.metadata import version, PackageNotFoundError
+
+# torch et sentence_transformers sont importés à la demande (chargement de
+# l'encodeur) : importer ce module reste quasi instantané, et le calcul des
+# similarités se fait en NumPy (aucun besoin de torch avec l'encodeur ONNX).
+
+# Référentiel compilé (compétences, blocs, métiers, embeddings)
+from src.referential_bundle import BUNDLE_NAME, SOURCES, load_or_build_bundle, sources_changed
+from src.scoring import ScoreIndex, accumulate_max_scores, empty_result, normalize_rows
+from src.embedding_store import EmbeddingStore, QueryEmbeddingCache
+from src.encoders import create_encoder
+from src.ann_index import FlatIndex, load_or_build_index
+from src.segmentation import iter_segments, dedupe
+from src.metrics import METRICS, get_logger
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+STAGE_METRIC = "aisca_scoring_stage_seconds"
+# Écart max entre le score d'un candidat seul et le même candidat dans un lot :
+# l'encodeur et le produit matriciel float32 dépendent de la taille des lots
+BATCH_TOLERANCE = 1e-6
+# Mémoire par défaut du max courant (candidats x compétences, float32) d'une passe de scoring
+MEMORY_BUDGET_MB = 256
+
+logger = get_logger("sbert")
+
+try:
+    MODEL_VERSION = version("sentence-transformers")
+except PackageNotFoundError:
+    MODEL_VERSION = "inconnue"
+
+class ReferentialState:
+    """
+    Référentiel chargé : tout ce qu'une requête lit. Remplacé d'un bloc au
+    rechargement ; une requête en cours garde l'état qu'elle a lu au départ.
+    """
+
+    def __init__(self, bundle=None, df_competences=None, score_index=None,
+                 vectors=None, unit=None, index=None):
+        self.bundle = bundle
+        self.df_competences = df_competences
+        self.score_index = score_index
+        self.competence_vectors = vectors
+        self.competence_unit = unit
+        self.competence_index = index
 
-# Importation de notre gestionnaire de données
-from src.data_loader import get_or_create_clean_data
 
 class SBERTEngine:
-    def __init__(self, data_path="data"):
+    def __init__(self, data_path="data", query_cache_size=4096, query_cache_path=None,
+                 encoder=None, encoder_threads=None, index=None, index_probes=None,
+                 input_tile=256, vector_tile=4096, memory_budget_mb=None):
+        """
+        query_cache_size : nombre max d'embeddings de saisies utilisateur gardés en mémoire (LRU).
+        query_cache_path : fichier .npz pour persister ce cache entre deux démarrages (optionnel).
+        encoder : "torch" (SentenceTransformer fp32) ou "onnx-int8" (onnxruntime CPU quantifié) ;
+        par défaut la variable AISCA_ENCODER, sinon "torch". Un encodeur déjà construit
+        (objet avec encode() et un attribut name) est aussi accepté, ex: benchmarks et tests.
+        encoder_threads : nombre de threads d'inférence CPU (AISCA_ENCODER_THREADS).
+        index : recherche dans le référentiel, "dense" (matrice complète), "flat" (exacte
+        par tuiles), "ivf" (approchée) ou "auto" (IVF pour les gros référentiels) ;
+        par défaut AISCA_INDEX, sinon "auto". index_probes : listes visitées par l'IVF
+        (AISCA_INDEX_PROBES, compromis rappel / latence).
+        input_tile / vector_tile : taille des tuiles (saisies x compétences) du calcul
+        des similarités. La mémoire de travail ne dépend pas du nombre de saisies :
+        un max courant float32 (candidats x compétences), ces tuiles, et le Top-K
+        par bloc calculé par tuiles de candidats (voir ScoreIndex.block_scores).
+        memory_budget_mb : plafond de ce max courant (AISCA_SCORING_MEMORY_MB, défaut
+        256 Mo) ; un lot plus grand est scoré en plusieurs passes (voir max_batch_candidates).
+
+        Le modèle n'est chargé qu'au premier besoin (embeddings à recalculer,
+        première requête) ou par warm_up(), qui peut tourner en arrière-plan.
+        """
         print("[INFO] Initialisation du moteur SBERT...")
         
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+        self._configure(data_path, encoder, encoder_threads, input_tile, vector_tile, memory_budget_mb)
+        self.index_kind = index or os.getenv("AISCA_INDEX", "auto")
+        self.index_probes = int(index_probes or os.getenv("AISCA_INDEX_PROBES", 16))
         
-        self.raw_competences = os.path.join(data_path, "competences.csv")
-        self.clean_competences = os.path.join(data_path, "competences_clean.csv")
+        self.bundle_path = os.path.join(data_path, BUNDLE_NAME)
         
-        self.raw_metiers = os.path.join(data_path, "metiers.csv")
-        self.clean_metiers = os.path.join(data_path, "metiers_clean.csv")
-        
-        self.cache_path = os.path.join(data_path, "embeddings_cache.pt")
-        
-        # Chargement et nettoyage des données
-        self.df_competences = get_or_create_clean_data(self.raw_competences, self.clean_competences)
-        self.df_metiers = get_or_create_clean_data(self.raw_metiers, self.clean_metiers)
+        # La version de l'encodeur fait partie de la clé : changer d'encodeur recalcule le référentiel
+        store_version = MODEL_VERSION if self.encoder_name == "torch" else f"{MODEL_VERSION}+{self.encoder_name}"
+        self.embedding_store = EmbeddingStore(data_path, MODEL_NAME, store_version)
+
+        # Cache LRU des saisies utilisateur, partagé entre les sessions
+        self.query_cache = QueryEmbeddingCache(max_entries=query_cache_size, persist_path=query_cache_path)
         
-        # Vérification critique
-        if self.df_competences.empty:
-            print("[ERREUR] Aucune compétence chargée. Vérifiez les fichiers CSV.")
-            self.competence_embeddings = None
+        # Référentiel compilé, lu en une fois (recompilé si les sources ont changé)
+        self.state = self._build_state(load_or_build_bundle(data_path))
+        if self.competence_vectors is None:
             return
 
-        # Gestion du Cache (pour la rapidité)
-        if os.path.exists(self.cache_path):
-            print("[INFO] Chargement des embeddings depuis le cache disque...")
+        print("[INFO] Moteur SBERT prêt et opérationnel.")
+
+    def _configure(self, data_path, encoder, encoder_threads, input_tile, vector_tile, memory_budget_mb=None):
+        """Réglages de l'encodeur et du calcul, communs à __init__ et from_shared."""
+        self.data_path = data_path
+        if encoder is None or isinstance(encoder, str):
+            self.encoder_name = encoder or os.getenv("AISCA_ENCODER", "torch")
+            self.encoder = self.encoder_name
+        else:
+            self.encoder_name = encoder.name
+            self.encoder = encoder
+        threads = encoder_threads or os.getenv("AISCA_ENCODER_THREADS")
+        self.encoder_threads = int(threads) if threads else None
+        self.input_tile = input_tile
+        self.vector_tile = vector_tile
+        budget = memory_budget_mb or os.getenv("AISCA_SCORING_MEMORY_MB", MEMORY_BUDGET_MB)
+        self.memory_budget = int(float(budget) * 2 ** 20)
+
+        self._model = None if isinstance(self.encoder, str) else self.encoder
+        self._device = None
+        self._model_lock = threading.Lock()
+        self._warm_up_thread = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+
+    @classmethod
+    def from_shared(cls, shared, data_path="data", encoder=None, encoder_threads=None,
+                    input_tile=256, vector_tile=4096, memory_budget_mb=None):
+        """
+        Moteur de scoring attaché à un référentiel partagé (SharedReferential) :
+        vecteurs et index de scoring sont lus en mémoire mappée, sans CSV ni copie.
+        Seul l'encodeur est propre à ce moteur (processus de scoring en masse).
+        """
+        engine = cls.__new__(cls)
+        engine._configure(data_path, encoder, encoder_threads, input_tile, vector_tile, memory_budget_mb)
+        engine.query_cache = QueryEmbeddingCache(max_entries=0)
+        engine.state = ReferentialState(
+            score_index=shared.score_index(), vectors=shared.vectors, unit=shared.vectors
+        )
+        return engine
+
+    # Accès direct à l'état courant (lecture seule) ; les requêtes lisent
+    # self.state une seule fois pour rester cohérentes pendant un rechargement
+    bundle = property(lambda self: self.state.bundle)
+    df_competences = property(lambda self: self.state.df_competences)
+    score_index = property(lambda self: self.state.score_index)
+    competence_vectors = property(lambda self: self.state.competence_vectors)
+    competence_unit = property(lambda self: self.state.competence_unit)
+    competence_index = property(lambda self: self.state.competence_index)
+
+    @property
+    def device(self):
+        if self._device is None:
+            import torch
+            self._device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        return self._device
+
+    @property
+    def model(self):
+        """Encodeur configuré, chargé une seule fois au premier accès (thread-safe)."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if self.encoder_name == "torch" and self.encoder_threads:
+                        import torch
+                        torch.set_num_threads(self.encoder_threads)
+                    self._model = create_encoder(
+                        self.encoder_name, MODEL_NAME, data_path=self.data_path,
+                        device=self.device if self.encoder_name == "torch" else "cpu",
+                        num_threads=self.encoder_threads
+                    )
+                    print(f"[INFO] Modèle {MODEL_NAME} chargé (encodeur {self.encoder_name}).")
+        return self._model
+
+    @property
+    def model_loaded(self):
+        """True une fois l'encodeur chargé (warm-up terminé ou première requête servie)."""
+        return self._model is not None
+
+    def warm_up(self, background=True):
+        """
+        Charge le modèle et fait un encodage à blanc. En arrière-plan par défaut : l'interface peut s'afficher pendant
+        ce temps, une requête arrivant avant la fin attend simplement le modèle.
+        """
+        def _run():
+            self.model.encode(["warm-up"], convert_to_numpy=True)
+            print("[INFO] Warm-up SBERT terminé.")
+
+        if not background:
+            _run()
+            return None
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=_run, name="sbert-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _build_state(self, bundle):
+        """
+        Construit l'état complet d'un référentiel compilé : DataFrame, index de
+        scoring, vecteurs et index de recherche. Ne touche pas à l'état courant.
+        """
+        # Vérification critique
+        if bundle is None or len(bundle) == 0:
+            print("[ERREUR] Aucune compétence chargée. Vérifiez les fichiers du référentiel.")
+            return ReferentialState(
+                bundle=bundle, df_competences=pd.DataFrame(columns=['CompetencyID', 'Competency', 'BlockID', 'BlockName'])
+            )
+        df_competences = bundle.df_competences()
+
+        # Index blocs / métiers pré-calculé une fois pour toutes les requêtes
+        score_index = ScoreIndex.from_arrays(
+            df_competences, bundle.meta["block_ids"], bundle.arrays["block_of"],
+            bundle.meta["job_titles"], bundle.arrays["job_matrix"]
+        )
+
+        bundle, vectors = self._load_embeddings(bundle, df_competences)
+        unit = normalize_rows(vectors)
+
+        # Index persisté à côté du cache d'embeddings (None = matrice dense)
+        index = load_or_build_index(
+            self.index_kind, unit,
+            os.path.join(self.data_path, "embeddings_cache.ivf.npz"),
+            n_probe=self.index_probes
+        )
+        return ReferentialState(bundle, df_competences, score_index, vectors, unit, index)
+
+    def _load_embeddings(self, bundle, df_competences):
+        """
+        Vecteurs du référentiel : ceux du bundle s'il a été compilé avec le même
+        modèle, sinon le cache disque, adressé par contenu, qui n'encode que les
+        lignes absentes (nouvelles ou reformulées) ; le bundle est alors complété.
+        Retourne (bundle, vecteurs).
+        """
+        model_version = self.embedding_store.model_version
+        vectors = bundle.embeddings(MODEL_NAME, model_version)
+        if vectors is not None:
+            METRICS.inc("aisca_cache_requests_total", len(vectors), cache="embeddings", result="hit")
+            print("[SUCCES] Embeddings chargés depuis le référentiel compilé.")
+            return bundle, vectors
+
+        raw_texts = df_competences['Competency'].astype(str).tolist()
+        vectors, hits, misses = self.embedding_store.get_or_encode(
+            raw_texts,
+            lambda texts: self.model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+        )
+        METRICS.inc("aisca_cache_requests_total", hits, cache="embeddings", result="hit")
+        METRICS.inc("aisca_cache_requests_total", misses, cache="embeddings", result="miss")
+        if misses:
+            print(f"[INFO] Embeddings : {hits} en cache, {misses} recalculés -> {self.embedding_store.vectors_path}")
+        else:
+            print("[SUCCES] Embeddings chargés depuis le cache disque.")
+
+        try:
+            bundle = bundle.with_embeddings(vectors, MODEL_NAME, model_version)
+            bundle.save(self.bundle_path)
+        except OSError as e:
+            print(f"[ATTENTION] Embeddings non ajoutés au référentiel compilé ({e}).")
+        return bundle, vectors
+
+    def reload(self, force=False):
+        """
+        Recharge le référentiel si ses sources ont changé (ou force=True) :
+        recompilation, encodage des seules compétences nouvelles ou modifiées,
+        puis remplacement atomique de l'état. Les requêtes en cours terminent
+        sur l'ancien état. Retourne True si l'état a été remplacé.
+        """
+        with self._reload_lock:
+            current = self.state.bundle
+            if not force and current is not None and not sources_changed(self.data_path, current.meta["sources"]):
+                return False
+
+            start = time.perf_counter()
             try:
-                self.competence_embeddings = torch.load(self.cache_path, map_location=device)
-                
-                # Vérification de la correspondance Cache vs CSV
-                if len(self.competence_embeddings) != len(self.df_competences):
-                    print("[ATTENTION] Le cache ne correspond plus aux données. Recalcul nécessaire.")
-                    self._compute_and_save_embeddings()
-                else:
-                    print("[SUCCES] Embeddings chargés.")
+                state = self._build_state(load_or_build_bundle(self.data_path))
             except Exception as e:
-                print(f"[ERREUR] Echec lecture cache : {e}. Recalcul nécessaire.")
-                self._compute_and_save_embeddings()
-        else:
-            print("[INFO] Premier lancement : Calcul des embeddings en cours...")
-            self._compute_and_save_embeddings()
+                print(f"[ERREUR] Rechargement du référentiel échoué, l'ancien reste actif : {e}")
+                return False
+            if state.competence_vectors is None:
+                print("[ERREUR] Référentiel rechargé vide, l'ancien reste actif.")
+                return False
 
-        print("[INFO] Moteur SBERT prêt et opérationnel.")
+            self.state = state
+            METRICS.observe("aisca_referential_reload_seconds", time.perf_counter() - start)
+            print(f"[SUCCES] Référentiel rechargé : {len(state.df_competences)} compétences, "
+                  f"empreinte {state.bundle.content_hash[:12]}.")
+            return True
 
-    def _compute_and_save_embeddings(self):
+    def start_watching(self, interval=None, on_reload=None):
         """
-        Calcule les vecteurs et sauvegarde le résultat pour les prochains démarrages.
+        Surveille les sources du référentiel (toutes les interval secondes, par
+        défaut AISCA_RELOAD_INTERVAL, sinon 30 ; 0 = désactivé) et recharge en
+        arrière-plan quand elles changent. on_reload(bundle) est appelé après
+        chaque remplacement (ex: GenAIManager.reload_referential).
         """
-        raw_texts = self.df_competences['Competency'].astype(str).tolist()
-        
-        self.competence_embeddings = self.model.encode(
-            raw_texts, 
-            convert_to_tensor=True,
-            show_progress_bar=True
+        interval = float(interval if interval is not None else os.getenv("AISCA_RELOAD_INTERVAL", 30))
+        if interval <= 0 or self._watcher is not None:
+            return self._watcher
+
+        self._watcher_stop = threading.Event()
+
+        def _settled():
+            # Une source en cours d'écriture (modifiée depuis moins d'un intervalle) attend le tour suivant
+            mtimes = [os.path.getmtime(os.path.join(self.data_path, name)) for name in SOURCES
+                      if os.path.exists(os.path.join(self.data_path, name))]
+            return not mtimes or time.time() - max(mtimes) >= interval
+
+        def _watch():
+            while not self._watcher_stop.wait(interval):
+                if _settled() and self.reload() and on_reload is not None:
+                    on_reload(self.state.bundle)
+
+        self._watcher = threading.Thread(target=_watch, name="referential-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        self._watcher_stop.set()
+        self._watcher = None
+
+    def _encode_inputs(self, texts, batch_size=256):
+        """Encode les saisies utilisateur ; les textes déjà vus sortent du cache LRU."""
+        return self.query_cache.encode(
+            texts,
+            lambda missing: self.model.encode(missing, convert_to_numpy=True, batch_size=batch_size)
         )
-        
-        torch.save(self.competence_embeddings, self.cache_path)
-        print(f"[SUCCES] Embeddings sauvegardés : {self.cache_path}")
 
-    def calculate_scores(self, user_inputs):
+    def encode(self, texts):
+        """Embeddings normalisés de textes libres (cache sémantique des bios de GenAIManager)."""
+        return normalize_rows(self._encode_inputs([str(t) for t in texts]))
+
+    def input_vectors(self, user_inputs, segment=False):
+        """
+        Embeddings normalisés des entrées d'un candidat telles que scorées
+        (segmentées, dédoublonnées) ; juste après calculate_scores, ils sortent
+        du cache des saisies (base de candidats, src/candidate_store.py).
+        """
+        texts = [text for _, text in self._iter_inputs([user_inputs], segment=segment)]
+        if not texts:
+            return np.zeros((0, self.competence_unit.shape[1]), dtype=np.float32)
+        return self.encode(texts)
+
+    def calculate_scores(self, user_inputs, segment=False):
         """
         Analyse les entrées utilisateur et retourne les scores et recommandations.
+        segment : découpe chaque entrée en phrases / puces (CV complets), voir calculate_scores_batch.
         """
-        print("\n" + "="*60)
-        print("[ANALYSE] Traitement en cours...")
-        
-        # 1. Nettoyage des entrées
-        clean_inputs = [str(i) for i in user_inputs if str(i).strip() != ""]
-        
-        if not clean_inputs or self.competence_embeddings is None:
-            return {
-                "scores_par_bloc": {},
-                "recommandations_metiers": [],
-                "top_competences_details": pd.DataFrame()
-            }
-
-        # 2. Vectorisation et Calcul de Similarité
-        user_embeddings = self.model.encode(clean_inputs, convert_to_tensor=True)
-        cosine_scores = util.cos_sim(user_embeddings, self.competence_embeddings)
-        
-        # Meilleur score par compétence
-        max_scores_per_competency, _ = cosine_scores.max(dim=0)
-        
-        # Copie de travail
-        df_res = self.df_competences.copy()
-        df_res['score'] = max_scores_per_competency.cpu().tolist()
-        
-        # 3. Agrégation par Bloc (Top-K Mean)
-        def get_top_k_mean(scores, k=5):
-            top_scores = scores.nlargest(k)
-            if len(top_scores) == 0: return 0.0
-            return top_scores.mean()
-
-        scores_par_bloc = df_res.groupby('BlockID')['score'].apply(
-            lambda x: get_top_k_mean(x, k=5)
-        ).to_dict()
-        
-        # 4. Matching Métiers
-        recommandations = []
-        for index, job in self.df_metiers.iterrows():
-            job_title = job.get('Job Title', 'Inconnu')
-            required_blocks_str = str(job.get('Required Competencies', ''))
-            required_blocks = required_blocks_str.split(';')
-            
-            total_score = 0
-            valid_blocks_count = 0
-            
-            for bloc in required_blocks:
-                bloc = bloc.strip() 
-                if bloc in scores_par_bloc:
-                    score_du_bloc = scores_par_bloc[bloc]
-                    
-                    # Bonus Expert (>0.6)
-                    if score_du_bloc > 0.6:
-                        score_du_bloc *= 1.1
-                        
-                    total_score += score_du_bloc
-                    valid_blocks_count += 1
-            
-            # Moyenne pondérée et normalisation
-            raw_average = total_score / valid_blocks_count if valid_blocks_count > 0 else 0
-            normalized_score = min(raw_average * 1.5, 1.0)
-            
-            recommandations.append({
-                "metier": job_title,
-                "score": round(normalized_score, 4),    
-                "score_percent": f"{int(normalized_score * 100)}%"
-            })
-            
-        # Tri décroissant
-        recommandations = sorted(recommandations, key=lambda x: x['score'], reverse=True)
-        
-        # 5. Extraction des détails (Top 10)
-        top_details = df_res.nlargest(10, 'score')[['Competency', 'score', 'BlockName']].copy()
-        
-        # --- AFFICHAGE DEBUG DANS LA CONSOLE (TEXTE SIMPLE) ---
-        print("-" * 60)
-        print("RESULTATS DE L'ANALYSE")
-        print("-" * 60)
-        
-        print("SCORES PAR DOMAINE (BLOCS) :")
-        for bloc, score in scores_par_bloc.items():
-            print(f" - {bloc:<40} : {score:.4f}")
-
-        print("\nTOP 3 RECOMMANDATIONS METIERS :")
-        for i, job in enumerate(recommandations[:3]):
-            print(f" {i+1}. {job['metier']:<40} : {job['score_percent']}")
-
-        print("\nTOP 5 CORRESPONDANCES SEMANTIQUES (PREUVE) :")
-        for i, (idx, row) in enumerate(top_details.head(5).iterrows()):
-            print(f" {i+1}. Score: {row['score']:.4f} | {row['Competency'][:80]}...")
-            
-        print("="*60 + "\n")
-
-        return {
-            "scores_par_bloc": scores_par_bloc,
-            "recommandations_metiers": recommandations,
-            "top_competences_details": top_details
-        }
+        resultat = self.calculate_scores_batch([user_inputs], segment=segment)[0]
+        if resultat["scores_par_bloc"] and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self._format_report(resultat))
+        return resultat
+
+    @staticmethod
+    def _format_report(resultat):
+        """Résumé texte d'un résultat (blocs, Top 3 métiers, Top 5 preuves) pour le log de debug."""
+        lines = ["=" * 60, "RESULTATS DE L'ANALYSE", "-" * 60, "SCORES PAR DOMAINE (BLOCS) :"]
+        for bloc, score in resultat["scores_par_bloc"].items():
+            lines.append(f" - {bloc:<40} : {score:.4f}")
+
+        lines.append("\nTOP 3 RECOMMANDATIONS METIERS :")
+        for i, job in enumerate(resultat["recommandations_metiers"][:3]):
+            lines.append(f" {i+1}. {job['metier']:<40} : {job['score_percent']}")
+
+        lines.append("\nTOP 5 CORRESPONDANCES SEMANTIQUES (PREUVE) :")
+        for i, (idx, row) in enumerate(resultat["top_competences_details"].head(5).iterrows()):
+            lines.append(f" {i+1}. Score: {row['score']:.4f} | {row['Competency'][:80]}...")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _iter_inputs(candidates, segment=False):
+        """
+        Générateur (position du candidat, texte) des entrées à encoder, candidat
+        par candidat. Avec segment=True, chaque entrée (texte ou fichier ouvert)
+        est lue au fil de l'eau et découpée en phrases / puces ; les doublons d'un
+        même candidat sont écartés (ils ne changent pas le max).
+        """
+        for position, user_inputs in enumerate(candidates):
+            if segment:
+                texts = (chunk for source in user_inputs for chunk in iter_segments(source))
+            else:
+                texts = (str(i) for i in user_inputs if str(i).strip() != "")
+            for text in dedupe(texts):
+                yield position, text
+
+    def calculate_scores_batch(self, candidates, batch_size=256, segment=False):
+        """
+        Score plusieurs candidats en une seule passe.
+        candidates : liste de listes d'entrées (une liste par candidat).
+        segment : découpe les entrées longues en segments plus courts que la
+        fenêtre du modèle (sinon tout ce qui la dépasse est ignoré).
+        Retourne une liste de résultats au même format que calculate_scores,
+        sans affichage console.
+
+        calculate_scores passe par ici avec un lot d'un candidat : mêmes étapes,
+        mais les scores d'un candidat peuvent varier de BATCH_TOLERANCE selon
+        la composition du lot. Les ex-aequo sont départagés par ordre du
+        référentiel (Top 10 des compétences) et des métiers ; deux compétences
+        à moins de BATCH_TOLERANCE l'une de l'autre peuvent donc s'inverser.
+        """
+        # Un seul état pour toute la requête, même si un rechargement a lieu pendant
+        state = self.state
+        if state.competence_vectors is None:
+            return [empty_result() for _ in candidates]
+
+        with METRICS.trace("calculate_scores_batch"), METRICS.span("aisca_scoring_request_seconds"):
+            # Passes de max_batch_candidates candidats : le max courant reste dans le budget mémoire
+            step = self.max_batch_candidates(state)
+            results = []
+            for start in range(0, len(candidates), step):
+                results.extend(self._score_candidates(state, candidates[start:start + step], batch_size, segment))
+            return results
+
+    def max_batch_candidates(self, state=None):
+        """
+        Candidats par passe de scoring : memory_budget // (4 * compétences), pour
+        que le max courant float32 (candidats x compétences) tienne dans le budget.
+        """
+        state = state or self.state
+        n_competences = len(state.competence_unit) if state.competence_unit is not None else 0
+        return max(1, self.memory_budget // (4 * max(1, n_competences)))
+
+    def _score_candidates(self, state, candidates, batch_size, segment):
+        """Corps de calculate_scores_batch ; chaque étape alimente STAGE_METRIC."""
+        # Les étapes entrelacées par tuile (nettoyage, encodage, similarités)
+        # sont cumulées puis enregistrées une seule fois par appel
+        stages = {"clean": 0.0, "encode": 0.0, "similarity": 0.0}
+        n_inputs = 0
+
+        # 1. Entrées rattachées à leur candidat, produites à la demande
+        pairs = self._iter_inputs(candidates, segment=segment)
+
+        # 2. Encodage et similarités par tuiles de saisies : on ne garde que le
+        # max courant de chaque compétence par candidat (les entrées d'un même
+        # candidat sont contiguës), jamais la matrice (entrées x compétences)
+        max_scores = np.full((len(candidates), len(state.competence_unit)), -np.inf, dtype=np.float32)
+        has_inputs = np.zeros(len(candidates), dtype=bool)
+        while True:
+            t0 = time.perf_counter()
+            tile = list(islice(pairs, self.input_tile))
+            t1 = time.perf_counter()
+            stages["clean"] += t1 - t0
+            if not tile:
+                break
+            n_inputs += len(tile)
+            tile_owners = np.array([owner for owner, _ in tile])
+            has_inputs[tile_owners] = True
+            queries = normalize_rows(self._encode_inputs([text for _, text in tile], batch_size=batch_size))
+            t2 = time.perf_counter()
+            stages["encode"] += t2 - t1
+
+            if state.competence_index is None:
+                accumulate_max_scores(max_scores, queries, tile_owners, state.competence_unit, self.vector_tile)
+            else:
+                # Via l'index : avec l'IVF, les compétences non visitées restent à -inf
+                bounds = np.flatnonzero(np.r_[True, tile_owners[1:] != tile_owners[:-1], True])
+                for begin, end in zip(bounds[:-1], bounds[1:]):
+                    row = tile_owners[begin]
+                    np.maximum(max_scores[row], state.competence_index.max_scores(queries[begin:end]),
+                               out=max_scores[row])
+            stages["similarity"] += time.perf_counter() - t2
+
+        for stage, seconds in stages.items():
+            METRICS.observe(STAGE_METRIC, seconds, stage=stage)
+        METRICS.inc("aisca_scoring_candidates_total", len(candidates))
+        METRICS.inc("aisca_scoring_inputs_total", n_inputs)
+
+        if not has_inputs.any():
+            return [empty_result() for _ in candidates]
+
+        # 3. Blocs, métiers et Top 10 pour tous les candidats scorables
+        index = state.score_index
+        # Pas de copie quand tous les candidats ont des entrées (cas courant)
+        scorable = max_scores if has_inputs.all() else max_scores[has_inputs]
+        # IVF : hors du Top 10, et au plus bas score visité du candidat dans les blocs
+        approximate = getattr(state.competence_index, "kind", None) == "ivf"
+        with METRICS.span(STAGE_METRIC, stage="blocks"):
+            block_scores = index.block_scores(scorable, fill_unvisited=approximate)
+        with METRICS.span(STAGE_METRIC, stage="jobs"):
+            job_scores = index.job_scores(block_scores)
+        with METRICS.span(STAGE_METRIC, stage="result"):
+            scored = iter([index.build_result(scorable[c], block_scores[c], job_scores[c])
+                           for c in range(len(scorable))])
+        return [next(scored) if ok else empty_result() for ok in has_inputs]
+
+    def nearest_competences(self, texts, n=10):
+        """
+        Top-N compétences du référentiel pour chaque texte.
+        Retourne une liste de DataFrames (Competency, score, BlockName).
+        """
+        state = self.state
+        if state.competence_vectors is None:
+            return [pd.DataFrame() for _ in texts]
+        queries = normalize_rows(self._encode_inputs([str(t) for t in texts]))
+        index = state.competence_index or FlatIndex(state.competence_unit)
+        scores, ids = index.search(queries, n=n)
+
+        results = []
+        for row_scores, row_ids in zip(scores, ids):
+            found = row_ids >= 0
+            details = state.df_competences.iloc[row_ids[found]][['Competency', 'BlockName']].copy()
+            details.insert(1, 'score', row_scores[found])
+            results.append(details)
+        return results
 
 if __name__ == "__main__":
     engine = SBERTEngine()
\ No newline at end of file
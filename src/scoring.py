@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+
+class ScoreIndex:
+    """
+    Structures du référentiel pré-calculées une seule fois au démarrage :
+    - block_ids : blocs triés (même ordre que l'ancien groupby pandas),
+    - block_members : matrice (blocs x membres) des positions de compétences, -1 = padding,
+    - job_matrix : matrice (métiers x blocs) comptant les blocs requis par métier.
+
+    Toutes les étapes du scoring (Top-K Mean, bonus expert, normalisation,
+    classement des métiers) deviennent des opérations NumPy sur des matrices
+    (candidats x compétences), quel que soit le nombre de candidats.
+    """
+
+    def __init__(self, df_competences, df_metiers, top_k=5, expert_threshold=0.6):
+        self.df_competences = df_competences
+        self.top_k = top_k
+        self.expert_threshold = expert_threshold
+
+        # 1. Appartenance des compétences aux blocs
+        block_col = df_competences['BlockID'].tolist()
+        self.block_ids = sorted(set(block_col))
+        block_pos = {bloc: i for i, bloc in enumerate(self.block_ids)}
+        self._set_members([block_pos[bloc] for bloc in block_col])
+
+        # 2. Matrice métiers x blocs requis (les blocs inconnus sont ignorés)
+        self.job_titles = []
+        self.job_matrix = np.zeros((len(df_metiers), len(self.block_ids)), dtype=np.float64)
+        for j, (_, job) in enumerate(df_metiers.iterrows()):
+            self.job_titles.append(job.get('Job Title', 'Inconnu'))
+            for bloc in str(job.get('Required Competencies', '')).split(';'):
+                bloc = bloc.strip()
+                if bloc in block_pos:
+                    self.job_matrix[j, block_pos[bloc]] += 1
+
+    @classmethod
+    def from_arrays(cls, df_competences, block_ids, block_of, job_titles, job_matrix,
+                    top_k=5, expert_threshold=0.6):
+        """
+        Index construit depuis un référentiel compilé : block_of (bloc de chaque
+        compétence, indice dans block_ids triés) et job_matrix (métiers x blocs).
+        """
+        index = cls.__new__(cls)
+        index.df_competences = df_competences
+        index.top_k = top_k
+        index.expert_threshold = expert_threshold
+        index.block_ids = list(block_ids)
+        index._set_members(block_of)
+        index.job_titles = list(job_titles)
+        index.job_matrix = np.asarray(job_matrix, dtype=np.float64)
+        return index
+
+    def _set_members(self, block_of):
+        """block_members (blocs x membres, -1 = padding) et block_sizes depuis le bloc de chaque compétence."""
+        members = [[] for _ in self.block_ids]
+        for position, block in enumerate(block_of):
+            members[block].append(position)
+
+        self.block_sizes = np.array([len(m) for m in members], dtype=np.int64)
+        width = int(self.block_sizes.max()) if len(members) else 0
+        self.block_members = np.full((len(self.block_ids), width), -1, dtype=np.int64)
+        for i, m in enumerate(members):
+            self.block_members[i, :len(m)] = m
+
+    def block_scores(self, max_scores, max_elements=1 << 20, fill_unvisited=False):
+        """
+        Top-K Mean par bloc.
+        max_scores : tableau (candidats x compétences), float32 ou float64.
+        Retourne un tableau float64 (candidats x blocs).
+
+        Les candidats sont traités par tuiles : la matrice intermédiaire
+        (tuile x blocs x membres) ne dépasse pas max_elements valeurs, quel
+        que soit le nombre de candidats du lot.
+        fill_unvisited : les compétences à -inf (non visitées par un index
+        approché) prennent le plus bas score visité du candidat, au lieu de 0.
+        """
+        tile = max(1, max_elements // max(1, self.block_members.size))
+        scores = np.empty((len(max_scores), len(self.block_ids)), dtype=np.float64)
+        for start in range(0, len(max_scores), tile):
+            chunk = max_scores[start:start + tile]
+            floor = unvisited_floor(chunk) if fill_unvisited else None
+            scores[start:start + tile] = self._block_scores_tile(chunk, floor)
+        return scores
+
+    def _block_scores_tile(self, max_scores, floor=None):
+        """Top-K Mean d'une tuile de candidats (voir block_scores)."""
+        members = self.block_members
+        k = min(self.top_k, members.shape[1])
+
+        # (candidats x blocs x membres) dans le type d'entrée, le padding vaut -inf
+        values = max_scores[:, members]
+        if floor is not None:
+            values = np.where(np.isfinite(values), values, floor[:, None, None])
+        grouped = np.where(members >= 0, values, -np.inf)
+        if k < members.shape[1]:
+            grouped = -np.partition(-grouped, k - 1, axis=2)[:, :, :k]
+
+        # Tri décroissant des K meilleurs, sommés en float64 : même ordre de sommation que nlargest().mean()
+        top_k = -np.sort(-grouped.astype(np.float64), axis=2)
+        top_k = np.where(np.isfinite(top_k), top_k, 0.0)
+
+        return top_k.sum(axis=2) / np.minimum(self.block_sizes, k)
+
+    def job_scores(self, block_scores):
+        """
+        Matching métiers : bonus expert (x1.1 au-dessus du seuil), moyenne sur
+        les blocs requis puis normalisation x1.5 plafonnée à 1.
+        Retourne un tableau (candidats x métiers).
+        """
+        boosted = np.where(block_scores > self.expert_threshold, block_scores * 1.1, block_scores)
+        total = (boosted[:, None, :] * self.job_matrix[None, :, :]).sum(axis=2)
+        valid = self.job_matrix.sum(axis=1)
+
+        raw_average = np.divide(total, valid, out=np.zeros_like(total), where=valid > 0)
+        return np.minimum(raw_average * 1.5, 1.0)
+
+    def top_positions(self, scores, n=10):
+        """
+        Positions des n meilleures compétences, ex-aequo départagés par ordre
+        d'apparition (comme DataFrame.nlargest). Les compétences à -inf (non
+        visitées par un index approché) n'y figurent jamais.
+        """
+        candidates = np.flatnonzero(np.isfinite(scores))
+        values = scores[candidates]
+        if len(values) > n:
+            threshold = np.partition(values, len(values) - n)[len(values) - n]
+            candidates = candidates[values >= threshold]
+        return candidates[np.argsort(-scores[candidates], kind="stable")][:n]
+
+    def competence_details(self, positions, scores):
+        """DataFrame (Competency, score, BlockName) des compétences aux positions données."""
+        details = self.df_competences.iloc[positions][['Competency', 'BlockName']].copy()
+        details.insert(1, 'score', scores)
+        return details
+
+    def build_result(self, max_scores, block_scores, job_scores):
+        """Assemble le dictionnaire de résultat d'un candidat (format de calculate_scores)."""
+        scores_par_bloc = dict(zip(self.block_ids, block_scores.tolist()))
+
+        recommandations = []
+        for title, score in zip(self.job_titles, job_scores.tolist()):
+            recommandations.append({
+                "metier": title,
+                "score": round(score, 4),
+                "score_percent": f"{int(score * 100)}%"
+            })
+        recommandations = sorted(recommandations, key=lambda x: x['score'], reverse=True)
+
+        positions = self.top_positions(max_scores)
+        top_details = self.competence_details(positions, max_scores[positions].astype(np.float64))
+
+        return {
+            "scores_par_bloc": scores_par_bloc,
+            "recommandations_metiers": recommandations,
+            "top_competences_details": top_details
+        }
+
+    def score(self, max_scores):
+        """Scoring complet d'un lot : max_scores (candidats x compétences) -> liste de résultats."""
+        block_scores = self.block_scores(max_scores)
+        job_scores = self.job_scores(block_scores)
+        return [
+            self.build_result(max_scores[c], block_scores[c], job_scores[c])
+            for c in range(len(max_scores))
+        ]
+
+
+def normalize_rows(vectors):
+    """Normalisation L2 ligne à ligne (comme sentence_transformers.util.cos_sim)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def unvisited_floor(max_scores):
+    """Plus bas score fini de chaque ligne (0 si aucun) : valeur des compétences non visitées."""
+    finite = np.isfinite(max_scores)
+    floor = np.where(finite, max_scores, np.inf).min(axis=1)
+    return np.where(finite.any(axis=1), floor, 0.0).astype(max_scores.dtype)
+
+
+def accumulate_max_scores(max_scores, queries, owners, vectors, vector_tile=4096):
+    """
+    Met à jour en place max_scores (candidats x compétences) avec un lot de
+    saisies normalisées : queries (saisies x dim), owners (ligne de max_scores
+    de chaque saisie, les saisies d'un même candidat étant contiguës).
+
+    Les compétences sont parcourues par tuiles de vector_tile lignes : la plus
+    grosse matrice intermédiaire fait len(queries) x vector_tile, quelle que
+    soit la taille du référentiel.
+    """
+    owners = np.asarray(owners)
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    rows = owners[starts]
+
+    for start in range(0, len(vectors), vector_tile):
+        stop = min(start + vector_tile, len(vectors))
+        tile_max = np.maximum.reduceat(queries @ vectors[start:stop].T, starts, axis=0)
+        max_scores[rows, start:stop] = np.maximum(max_scores[rows, start:stop], tile_max)
+    return max_scores
+
+
+def empty_result():
+    """Résultat renvoyé quand il n'y a rien à scorer."""
+    return {
+        "scores_par_bloc": {},
+        "recommandations_metiers": [],
+        "top_competences_details": pd.DataFrame()
+    }
@@ -0,0 +1,45 @@
+"""
+Client du service de scoring (src/scoring_service.py).
+
+Expose la même méthode calculate_scores que SBERTEngine et renvoie le même
+format de résultat : l'application Streamlit peut utiliser l'un ou l'autre
+sans changer de code (variable AISCA_SCORING_URL).
+"""
+import json
+import urllib.request
+
+import pandas as pd
+
+
+class ScoringClient:
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path, data=data,
+            headers={"Content-Type": "application/json"},
+            method="GET" if data is None else "POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def health(self):
+        return self._request("/health")
+
+    def latency(self):
+        return self._request("/latency")
+
+    def warm_up(self, background=True):
+        """Le modèle est chargé côté service : rien à préparer ici."""
+
+    def start_watching(self, interval=None, on_reload=None):
+        """Le référentiel est surveillé et rechargé côté service."""
+
+    def calculate_scores(self, user_inputs, segment=False):
+        """Score un candidat via le service (même format de retour que SBERTEngine.calculate_scores)."""
+        result = self._request("/score", {"inputs": list(user_inputs), "segment": segment})
+        result["top_competences_details"] = pd.DataFrame(result["top_competences_details"])
+        return result
@@ -0,0 +1,257 @@
+"""
+Service HTTP de scoring autour de SBERTEngine, avec micro-batching.
+
+Les requêtes simultanées sont regroupées (au plus max_batch candidats, ou
+max_wait secondes après la première) et scorées en un seul appel à
+calculate_scores_batch : un seul encodage pour tout le lot, sans réplique
+supplémentaire du modèle. Pendant qu'un lot est calculé, les requêtes
+suivantes s'accumulent et forment le lot d'après.
+
+Serveur asyncio de la bibliothèque standard (aucune dépendance ajoutée) :
+- POST /score   {"inputs": [...], "segment": false} -> résultat JSON,
+- GET  /health  état du moteur et de la file,
+- GET  /latency percentiles de latence et taille moyenne des lots,
+- GET  /metrics métriques au format Prometheus (étapes du scoring, caches, GenAI),
+- GET  /traces  dernières traces de requêtes lentes (AISCA_SLOW_REQUEST_MS).
+
+Usage :
+    python -m src.scoring_service --port 8765 --max-batch 32 --max-wait-ms 8
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.sbert_engine import SBERTEngine
+from src.batch_scoring import result_to_dict
+from src.metrics import METRICS
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class MicroBatcher:
+    """File d'attente asyncio qui regroupe les candidats avant de les scorer ensemble."""
+
+    def __init__(self, engine, max_batch=32, max_wait=0.008, history=2048):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        # Un seul thread de calcul : le modèle n'est jamais appelé en parallèle
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self.latencies = deque(maxlen=history)
+        self.batch_sizes = deque(maxlen=history)
+        self.requests = 0
+        self.errors = 0
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def score(self, user_inputs, segment=False):
+        """Place un candidat dans la file et attend son résultat."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((user_inputs, segment, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Attend une première requête puis complète le lot jusqu'à max_batch ou max_wait."""
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _prepare(user_inputs, segment):
+        """Entrées d'un candidat, découpées source par source comme dans SBERTEngine."""
+        return [text for _, text in SBERTEngine._iter_inputs([user_inputs], segment=segment)]
+
+    def _score_batch(self, items):
+        """
+        Exécuté dans le thread de calcul : découpage puis scoring du lot en un
+        appel. Si le lot échoue, chaque candidat est rescoré seul, pour que
+        l'erreur ne touche que le sien. Retourne (résultat, exception) par candidat.
+        """
+        try:
+            candidates = [self._prepare(inputs, segment) for inputs, segment in items]
+            return [(result, None) for result in self.engine.calculate_scores_batch(candidates)]
+        except Exception:
+            outcomes = []
+            for inputs, segment in items:
+                try:
+                    outcomes.append((self.engine.calculate_scores_batch([self._prepare(inputs, segment)])[0], None))
+                except Exception as e:
+                    outcomes.append((None, e))
+            return outcomes
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [(inputs, segment) for inputs, segment, _, _ in batch]
+            try:
+                outcomes = await loop.run_in_executor(self.executor, self._score_batch, items)
+            except Exception as e:
+                outcomes = [(None, e)] * len(batch)
+
+            now = time.perf_counter()
+            self.batch_sizes.append(len(batch))
+            for (_, _, future, started), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is not None:
+                    self.errors += 1
+                    future.set_exception(error)
+                    continue
+                self.requests += 1
+                self.latencies.append(now - started)
+                future.set_result(result)
+
+    def latency_report(self):
+        """Percentiles de latence (ms) sur les dernières requêtes."""
+        latencies = np.array(self.latencies) * 1e3
+        report = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "window": len(latencies),
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+        }
+        if len(latencies):
+            report.update({f"p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+            report["max_ms"] = float(latencies.max())
+        return report
+
+
+class ScoringService:
+    """Serveur HTTP/1.1 minimal (une requête par connexion) devant un MicroBatcher."""
+
+    def __init__(self, engine, max_batch=32, max_wait=0.008):
+        self.engine = engine
+        self.batcher = MicroBatcher(engine, max_batch=max_batch, max_wait=max_wait)
+        self.started = time.time()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return None
+        method, path, _ = request_line.split(" ", 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], body
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return 200, {
+                "status": "ok" if self.engine.competence_vectors is not None else "degraded",
+                "model_loaded": self.engine.model_loaded,
+                "competences": len(self.engine.df_competences),
+                "referential": self.engine.bundle.content_hash[:12] if self.engine.bundle else None,
+                "queue": self.batcher.queue.qsize(),
+                "uptime_s": round(time.time() - self.started, 1),
+            }
+        if path == "/latency":
+            return 200, self.batcher.latency_report()
+        if path == "/metrics":
+            return 200, METRICS.export_prometheus()
+        if path == "/traces":
+            return 200, {"slow_request_ms": METRICS.slow_request_s and METRICS.slow_request_s * 1000,
+                         "traces": list(METRICS.slow_traces)}
+        if path != "/score":
+            return 404, {"error": f"Route inconnue : {path}"}
+        if method != "POST":
+            return 405, {"error": "POST attendu"}
+
+        try:
+            payload = json.loads(body or b"{}")
+            inputs = payload["inputs"]
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": 'Corps JSON attendu : {"inputs": [...]}'}
+        # Validé avant la file : une entrée invalide n'atteint jamais un lot
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        segment = payload.get("segment", False)
+        if not isinstance(inputs, list) or not all(isinstance(i, str) for i in inputs):
+            return 400, {"error": '"inputs" doit être une liste de textes'}
+        if not isinstance(segment, bool):
+            return 400, {"error": '"segment" doit être un booléen'}
+        result = await self.batcher.score(inputs, segment=segment)
+        return 200, result_to_dict(result)
+
+    async def handle(self, reader, writer):
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+            try:
+                status, payload = await self._route(*request)
+            except Exception as e:
+                print(f"[ERREUR] Requête de scoring échouée : {e}")
+                status, payload = 500, {"error": str(e)}
+
+            # Texte brut pour /metrics, JSON pour le reste
+            if isinstance(payload, str):
+                body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """Démarre le serveur ; ready (threading.Event optionnel) est levé une fois à l'écoute."""
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"[INFO] Service de scoring à l'écoute sur http://{host}:{port}")
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP de scoring SBERT avec micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-path", default="data")
+    parser.add_argument("--max-batch", type=int, default=32, help="Candidats max par lot")
+    parser.add_argument("--max-wait-ms", type=float, default=8.0, help="Attente max pour compléter un lot")
+    args = parser.parse_args(argv)
+
+    engine = SBERTEngine(data_path=args.data_path)
+    engine.warm_up(background=False)
+    engine.start_watching()
+    service = ScoringService(engine, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("[INFO] Service de scoring arrêté.")
+
+
+if __name__ == "__main__":
+    main()
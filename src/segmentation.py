@@ -0,0 +1,100 @@
+"""
+Découpage des CV en segments encodables par SBERT.
+
+MiniLM tronque au-delà de sa fenêtre de tokens : un CV collé d'un bloc n'est
+donc encodé que sur ses premières lignes. Ce module transforme un texte (ou
+un fichier / flux de lignes, lu au fil de l'eau) en phrases et puces de
+taille bornée, sans jamais charger tout le document :
+
+    lignes -> blocs (puces, paragraphes, lignes coupées recollées)
+           -> phrases -> fenêtres de max_words mots -> dédoublonnage
+"""
+import io
+import re
+
+# all-MiniLM-L6-v2 lit 256 tokens ; ~100 mots de français restent en dessous
+MAX_WORDS = 100
+
+BULLET = re.compile(r"^(?:[-*•·▪‣►✓➢]|\d{1,2}[.)])\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+STACK_SEPARATOR = re.compile(r"[,\n]")
+
+
+def iter_lines(source):
+    """
+    Lignes d'une source : texte, fichier ouvert ou itérable de textes
+    (chaque élément pouvant lui-même contenir plusieurs lignes).
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    if hasattr(source, "read"):
+        yield from source
+        return
+    for item in source:
+        yield from iter_lines(item)
+
+
+def iter_blocks(lines):
+    """
+    Regroupe les lignes en blocs logiques. Une ligne vide ou une puce ouvre
+    un nouveau bloc ; une ligne qui commence par une minuscule après une
+    ligne sans ponctuation finale est une ligne coupée (copie de PDF) et est
+    recollée à la précédente.
+    """
+    pending = ""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if pending:
+                yield pending
+                pending = ""
+            continue
+
+        bullet = BULLET.match(line)
+        if bullet:
+            line = line[bullet.end():]
+        if pending and not bullet and pending[-1] not in ".!?;:" and line[:1].islower():
+            pending = f"{pending} {line}"
+            continue
+
+        if pending:
+            yield pending
+        pending = line
+
+    if pending:
+        yield pending
+
+
+def iter_segments(source, max_words=MAX_WORDS):
+    """Générateur des segments (phrases ou puces de max_words mots au plus) d'une source."""
+    for block in iter_blocks(iter_lines(source)):
+        for sentence in SENTENCE_END.split(block):
+            words = sentence.split()
+            for start in range(0, len(words), max_words):
+                chunk = " ".join(words[start:start + max_words])
+                if any(c.isalnum() for c in chunk):
+                    yield chunk
+
+
+def dedupe(texts):
+    """Ne laisse passer que la première occurrence de chaque texte (espaces normalisés)."""
+    seen = set()
+    for text in texts:
+        key = " ".join(text.split())
+        if key and key not in seen:
+            seen.add(key)
+            yield text
+
+
+def split_stack(text):
+    """
+    Expressions d'un champ "stack technique" ("Python, Spark\\n- dbt") : une par
+    virgule ou par ligne, puces retirées. Partagé par l'application et le
+    pré-remplissage du cache (src/cache_warmup.py), pour des clés ENRICH_ identiques.
+    """
+    phrases = []
+    for part in STACK_SEPARATOR.split(text or ""):
+        part = " ".join(BULLET.sub("", part.strip()).split())
+        if any(c.isalnum() for c in part):
+            phrases.append(part)
+    return phrases
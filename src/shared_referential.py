@@ -0,0 +1,106 @@
+"""
+Référentiel de scoring partagé entre processus, en mémoire mappée.
+
+export_referential() écrit dans un dossier tout ce dont le scoring a besoin
+hors modèle : vecteurs normalisés des compétences, index blocs / métiers de
+ScoreIndex et libellés des compétences (un blob UTF-8 + offsets, pour ne pas
+passer par un DataFrame). SharedReferential relit ces fichiers avec
+np.load(mmap_mode='r') : chaque processus s'y attache sans copie et le
+système ne garde qu'un exemplaire des pages en mémoire.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from src.scoring import ScoreIndex
+
+FORMAT_VERSION = 1
+ARRAYS = ("vectors", "block_members", "block_sizes", "job_matrix", "label_offsets", "block_of")
+
+
+def _save_array(directory, name, array):
+    np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+
+def export_referential(engine, directory):
+    """Écrit le référentiel d'un SBERTEngine chargé dans directory. Retourne directory."""
+    os.makedirs(directory, exist_ok=True)
+    state = engine.state
+    index = state.score_index
+    df = state.df_competences
+
+    labels = [text.encode("utf-8") for text in df['Competency'].astype(str)]
+    offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in labels])
+    with open(os.path.join(directory, "labels.bin"), "wb") as f:
+        f.write(b"".join(labels))
+
+    # Nom de bloc par compétence : indice dans block_names
+    block_names = sorted(set(df['BlockName'].astype(str)))
+    name_pos = {name: i for i, name in enumerate(block_names)}
+
+    _save_array(directory, "vectors", state.competence_unit.astype(np.float32))
+    _save_array(directory, "block_members", index.block_members)
+    _save_array(directory, "block_sizes", index.block_sizes)
+    _save_array(directory, "job_matrix", index.job_matrix)
+    _save_array(directory, "label_offsets", offsets)
+    _save_array(directory, "block_of", np.array([name_pos[n] for n in df['BlockName'].astype(str)], dtype=np.int32))
+
+    with open(os.path.join(directory, "referential.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "format": FORMAT_VERSION,
+            "block_ids": index.block_ids,
+            "block_names": block_names,
+            "job_titles": index.job_titles,
+            "top_k": index.top_k,
+            "expert_threshold": index.expert_threshold,
+            "encoder": engine.encoder_name,
+        }, f, ensure_ascii=False)
+    return directory
+
+
+class SharedScoreIndex(ScoreIndex):
+    """ScoreIndex reconstruit depuis les tableaux partagés (pas de DataFrame)."""
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.df_competences = None
+        self.top_k = shared.meta["top_k"]
+        self.expert_threshold = shared.meta["expert_threshold"]
+        self.block_ids = shared.meta["block_ids"]
+        self.job_titles = shared.meta["job_titles"]
+        self.block_members = shared.block_members
+        self.block_sizes = shared.block_sizes
+        self.job_matrix = shared.job_matrix
+
+    def competence_details(self, positions, scores):
+        return pd.DataFrame({
+            'Competency': [self.shared.label(p) for p in positions],
+            'score': scores,
+            'BlockName': [self.shared.meta["block_names"][self.shared.block_of[p]] for p in positions],
+        }, index=positions)
+
+
+class SharedReferential:
+    """Vue en lecture seule (mémoire mappée) d'un référentiel exporté."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "referential.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Référentiel partagé incompatible : {directory}")
+
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r', allow_pickle=False))
+        labels_path = os.path.join(directory, "labels.bin")
+        self.labels = np.memmap(labels_path, dtype=np.uint8, mode='r') if os.path.getsize(labels_path) else b""
+
+    def label(self, position):
+        """Libellé de la compétence à cette position."""
+        start, end = self.label_offsets[position], self.label_offsets[position + 1]
+        return bytes(self.labels[start:end]).decode("utf-8")
+
+    def score_index(self):
+        return SharedScoreIndex(self)
@@ -0,0 +1,20 @@
+import contextlib
+import io
+
+import pytest
+
+from src.sbert_engine import SBERTEngine
+from tests.support import HashEncoder, write_raw_referential
+
+
+@pytest.fixture
+def hash_engine(tmp_path):
+    """
+    Fabrique de SBERTEngine hors ligne (HashEncoder) sur un référentiel
+    synthétique de n_competences écrit dans tmp_path ; options passées au moteur.
+    """
+    def build(n_competences=600, **options):
+        write_raw_referential(str(tmp_path), n_competences)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return SBERTEngine(data_path=str(tmp_path), encoder=HashEncoder(), **options)
+    return build
@@ -0,0 +1,178 @@
+"""
+Outils partagés des tests et des benchmarks, sans modèle ni réseau :
+- HashEncoder : encodeur déterministe hors ligne (trigrammes de caractères
+  hachés), injecté dans le moteur : SBERTEngine(encoder=HashEncoder()).
+  Il ne mesure pas la qualité sémantique, seulement le coût du code.
+- make_referential / write_raw_referential : référentiels synthétiques,
+- make_cv : CV synthétiques (puces, lignes coupées, répétitions),
+- reference_scores / check_equivalence : ancienne implémentation pandas du
+  scoring, référence des tests d'équivalence de ScoreIndex.
+
+Les benchmarks l'importent (from tests.support import ...) ; les tests
+l'utilisent aussi via les fixtures de tests/conftest.py.
+"""
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+
+class HashEncoder:
+    """
+    Embeddings de trigrammes de caractères hachés dans dim dimensions, normalisés.
+    Même interface encode() que SentenceTransformer, coût proportionnel à la
+    longueur du texte, aucun modèle à charger.
+    """
+
+    name = "hash"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            codes = np.frombuffer(f"  {sentence.lower()}  ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+            hashes = (codes[:-2] * 961 + codes[1:-1] * 31 + codes[2:]) * np.uint64(2654435761) % np.uint64(2 ** 32)
+            signs = np.where(hashes & np.uint64(1 << 31), -1.0, 1.0)
+            embeddings[row] = np.bincount((hashes % np.uint64(self.dim)).astype(np.int64), weights=signs,
+                                          minlength=self.dim)
+
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+VERBS = ["Conception", "Mise en place", "Industrialisation", "Optimisation", "Migration", "Analyse", "Pilotage"]
+OBJECTS = ["d'un pipeline ETL", "de modèles de scoring", "de tableaux de bord", "d'une API REST",
+           "d'un entrepôt de données", "de campagnes A/B", "d'un moteur de recommandation"]
+TOOLS = ["Python", "Spark", "SQL", "Airflow", "Docker", "Kubernetes", "Power BI", "scikit-learn", "PyTorch", "dbt"]
+
+
+def make_cv(n_lines, seed=0):
+    """CV synthétique : paragraphes à lignes coupées, puces et répétitions (comme un copier-coller de PDF)."""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < n_lines:
+        tools = ", ".join(rng.sample(TOOLS, 3))
+        sentence = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} avec {tools} pour le client {rng.randint(1, 10**6)}."
+        kind = rng.random()
+        if kind < 0.4:
+            lines.append(f"- {sentence}")
+        elif kind < 0.8:
+            middle = len(sentence) // 2
+            cut = sentence.index(" ", middle) if " " in sentence[middle:] else middle
+            lines.extend([sentence[:cut], sentence[cut + 1:].lower(), ""])
+        else:
+            lines.append(f"- {tools}")
+    return "\n".join(lines[:n_lines]) + "\n"
+
+
+def make_referential(n_competences, n_blocks, n_jobs, seed=0):
+    """Référentiel synthétique au format des CSV nettoyés."""
+    rng = np.random.default_rng(seed)
+    blocks = [f"bloc_{i + 1}" for i in range(n_blocks)]
+    block_of = rng.integers(0, n_blocks, size=n_competences)
+
+    df_competences = pd.DataFrame({
+        "CompetencyID": [f"C{i:06d}" for i in range(n_competences)],
+        "Competency": [f"competence synthetique {i}" for i in range(n_competences)],
+        "BlockID": [blocks[b] for b in block_of],
+        "BlockName": [f"Nom {blocks[b]}" for b in block_of],
+    })
+
+    jobs = []
+    for j in range(n_jobs):
+        required = rng.choice(blocks, size=min(len(blocks), int(rng.integers(2, 4))), replace=False)
+        jobs.append({
+            "JobID": f"job_{j + 1}",
+            "Job Title": f"Metier {j + 1}",
+            "Required Competencies": "; ".join(sorted(required)),
+        })
+    return df_competences, pd.DataFrame(jobs)
+
+
+def write_raw_referential(directory, n_competences):
+    """Écrit competences.csv et metiers.csv bruts (espaces à nettoyer) pour n_competences."""
+    os.makedirs(directory, exist_ok=True)
+    n_blocks = max(5, min(50, n_competences // 200))
+    df_competences, df_metiers = make_referential(n_competences, n_blocks, max(7, n_blocks * 2))
+    df_competences["Competency"] = "  " + df_competences["Competency"] + "   avec  espaces  "
+    df_competences.to_csv(os.path.join(directory, "competences.csv"), index=False)
+    df_metiers.to_csv(os.path.join(directory, "metiers.csv"), index=False)
+
+
+def reference_scores(df_competences, df_metiers, max_scores):
+    """Ancienne implémentation de calculate_scores (étapes 3 à 5), à l'identique."""
+    df_res = df_competences.copy()
+    df_res['score'] = max_scores.tolist()
+
+    def get_top_k_mean(scores, k=5):
+        top_scores = scores.nlargest(k)
+        if len(top_scores) == 0: return 0.0
+        return top_scores.mean()
+
+    scores_par_bloc = df_res.groupby('BlockID')['score'].apply(
+        lambda x: get_top_k_mean(x, k=5)
+    ).to_dict()
+
+    recommandations = []
+    for index, job in df_metiers.iterrows():
+        job_title = job.get('Job Title', 'Inconnu')
+        required_blocks = str(job.get('Required Competencies', '')).split(';')
+
+        total_score = 0
+        valid_blocks_count = 0
+        for bloc in required_blocks:
+            bloc = bloc.strip()
+            if bloc in scores_par_bloc:
+                score_du_bloc = scores_par_bloc[bloc]
+                if score_du_bloc > 0.6:
+                    score_du_bloc *= 1.1
+                total_score += score_du_bloc
+                valid_blocks_count += 1
+
+        raw_average = total_score / valid_blocks_count if valid_blocks_count > 0 else 0
+        normalized_score = min(raw_average * 1.5, 1.0)
+        recommandations.append({
+            "metier": job_title,
+            "score": round(normalized_score, 4),
+            "score_percent": f"{int(normalized_score * 100)}%"
+        })
+
+    recommandations = sorted(recommandations, key=lambda x: x['score'], reverse=True)
+    top_details = df_res.nlargest(10, 'score')[['Competency', 'score', 'BlockName']].copy()
+
+    return {
+        "scores_par_bloc": scores_par_bloc,
+        "recommandations_metiers": recommandations,
+        "top_competences_details": top_details
+    }
+
+
+def check_equivalence(expected, actual):
+    """Lève une AssertionError si les deux résultats diffèrent."""
+    assert list(expected["scores_par_bloc"]) == list(actual["scores_par_bloc"])
+    np.testing.assert_allclose(
+        list(expected["scores_par_bloc"].values()),
+        list(actual["scores_par_bloc"].values()),
+        rtol=0, atol=1e-12
+    )
+    assert expected["recommandations_metiers"] == actual["recommandations_metiers"]
+    pd.testing.assert_frame_equal(expected["top_competences_details"], actual["top_competences_details"])
+
+
+def random_max_scores(n_candidates, n_competences, seed=1):
+    """Scores float32 convertis en float64, comme en sortie de cos_sim."""
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-0.1, 0.95, size=(n_candidates, n_competences)).astype(np.float32)
+    # Quelques ex-aequo pour vérifier le départage du Top 10
+    scores[:, 1::7] = scores[:, :1]
+    return scores.astype(np.float64)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.ann_index import FlatIndex, IVFIndex
+from src.scoring import ScoreIndex, normalize_rows
+
+
+def _clustered(rng, n, dim=32, clusters=50):
+    centers = rng.normal(size=(clusters, dim))
+    return normalize_rows((centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)))
+                          .astype(np.float32))
+
+
+def test_ivf_recall_against_the_flat_index():
+    rng = np.random.default_rng(0)
+    vectors = _clustered(rng, 5000)
+    queries = normalize_rows((vectors[rng.choice(5000, 200)] + 0.2 * rng.normal(size=(200, 32)))
+                             .astype(np.float32))
+    ivf = IVFIndex.build(vectors, n_probe=16)
+    _, exact = FlatIndex(vectors).search(queries, n=10)
+    _, approx = ivf.search(queries, n=10)
+
+    recall = np.mean([len(set(e) & set(a)) / 10 for e, a in zip(exact, approx)])
+    assert recall >= 0.9
+
+    # Compétences visitées : jamais au-dessus du score exact ; les autres à -inf
+    approx_max, exact_max = ivf.max_scores(queries[:3]), FlatIndex(vectors).max_scores(queries[:3])
+    visited = np.isfinite(approx_max)
+    assert 0 < visited.sum() < len(vectors)
+    assert (approx_max[visited] <= exact_max[visited] + 1e-5).all()
+
+
+def test_unvisited_competences_stay_out_of_the_result():
+    df = pd.DataFrame({"Competency": [f"c{i}" for i in range(6)], "BlockName": ["A"] * 3 + ["B"] * 3})
+    index = ScoreIndex.from_arrays(df, ["bloc_a", "bloc_b"], [0, 0, 0, 1, 1, 1], ["Metier"], [[1, 1]], top_k=2)
+    # Seules c0, c1 et c3 ont été visitées par l'index
+    max_scores = np.array([[0.9, 0.5, -np.inf, 0.7, -np.inf, -np.inf]], dtype=np.float32)
+
+    block_scores = index.block_scores(max_scores, fill_unvisited=True)
+    np.testing.assert_allclose(block_scores, [[0.7, 0.6]], rtol=1e-6)
+
+    result = index.build_result(max_scores[0], block_scores[0], index.job_scores(block_scores)[0])
+    assert result["top_competences_details"]["Competency"].tolist() == ["c0", "c3", "c1"]
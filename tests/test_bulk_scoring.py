@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from src.bulk_scoring import bulk_score, plan_units
+from tests.support import make_cv
+
+
+def write_candidates(path, n, blank_every=4):
+    """JSONL de n candidats (CV synthétiques), avec des lignes vides intercalées."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"cand-{i}", "cv": make_cv(8, seed=i)}, ensure_ascii=False) + "\n")
+            if i % blank_every == 0:
+                f.write("\n")
+
+
+def test_plan_units_splits_jsonl_on_candidate_boundaries(tmp_path):
+    path = str(tmp_path / "candidats.jsonl")
+    write_candidates(path, 7)
+    csv_path = str(tmp_path / "candidats.csv")
+    open(csv_path, "w").close()
+
+    units = plan_units([path, csv_path], unit_size=3)
+
+    assert [(u["file"], u["part"], u["first_position"]) for u in units] == [(0, 0, 0), (0, 1, 3), (0, 2, 6), (1, 0, 0)]
+    # Plages contiguës qui couvrent tout le fichier
+    assert units[0]["start"] == 0 and units[0]["end"] == units[1]["start"] and units[2]["end"] is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_score_matches_in_process_batch_scoring(tmp_path, hash_engine, workers):
+    engine = hash_engine(n_competences=300, index="dense")
+    paths = [str(tmp_path / "lot_a.jsonl"), str(tmp_path / "lot_b.jsonl")]
+    write_candidates(paths[0], 7)
+    write_candidates(paths[1], 2)
+
+    report = bulk_score(paths, str(tmp_path / "sortie"), workers=workers, data_path=str(tmp_path),
+                        unit_size=3, batch_size=2, segment=True, engine=engine)
+
+    assert report["candidates"] == 9 and len(report["per_worker"]) <= workers
+    for path, output in zip(paths, report["outputs"]):
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        expected = engine.calculate_scores_batch([[r["cv"]] for r in records], segment=True)
+        with open(output, encoding="utf-8") as f:
+            scored = [json.loads(line) for line in f]
+
+        # Ordre des candidats conservé malgré les lots traités dans le désordre
+        assert [s["id"] for s in scored] == [r["id"] for r in records]
+        for result, reference in zip(scored, expected):
+            assert result["scores_par_bloc"] == pytest.approx(reference["scores_par_bloc"], abs=1e-5)
+            jobs = {j["metier"]: j["score"] for j in result["recommandations_metiers"]}
+            assert jobs == pytest.approx({j["metier"]: j["score"] for j in reference["recommandations_metiers"]},
+                                         abs=2e-4)
@@ -0,0 +1,27 @@
+import shutil
+
+from src.cache_warmup import prewarm, stack_keywords
+from src.genai_manager import GenAIManager
+from src.llm_backends import LocalBackend
+from src.referential_bundle import SOURCES, load_or_build_bundle
+from src.segmentation import split_stack
+
+
+def test_prewarmed_keywords_are_hit_by_the_app_stack(tmp_path):
+    for name in SOURCES:
+        shutil.copy(f"data/{name}", tmp_path / name)
+    bundle = load_or_build_bundle(str(tmp_path))
+    backend = LocalBackend()
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=backend, data_path=str(tmp_path))
+
+    report = prewarm(manager, bundle, keywords=20, concurrency=4)
+    assert report["ENRICH"]["total"] == 20 and report["ENRICH"]["echecs"] == 0
+    assert report["PLAN"]["echecs"] == 0
+
+    # Stack saisie dans l'application : casse et espaces libres, découpée par split_stack
+    mots = stack_keywords(bundle, 3)
+    stack = f" {mots[0].upper()},{mots[1]}\n-  {mots[2].title()} "
+    calls = backend.calls
+    manager.enrichir_phrases(split_stack(stack))
+    assert backend.calls == calls
+    assert manager.cache_stats()["ENRICH"]["hit"] == 3
@@ -0,0 +1,88 @@
+import os
+import threading
+
+import numpy as np
+
+from src.candidate_store import CandidateStore
+
+BLOCKS = ["bloc_1", "bloc_2"]
+
+
+def _unit(rng, rows, dim=8):
+    vectors = rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _records(rng, ids):
+    return [(cid, _unit(rng, 1 + i % 3), {"bloc_1": 0.2 + 0.1 * (i % 5), "bloc_2": 0.5}, {"metier": f"m{i}"})
+            for i, cid in enumerate(ids)]
+
+
+def test_round_trip_and_reverse_search(tmp_path):
+    rng = np.random.default_rng(0)
+    store = CandidateStore(str(tmp_path))
+    records = _records(rng, [f"c{i}" for i in range(20)])
+    assert store.add_batch(records[:12], "model v1", BLOCKS) == 12
+    assert store.add_batch(records[8:], "model v1", BLOCKS) == 8
+
+    reopened = CandidateStore(str(tmp_path))
+    assert len(reopened) == 20 and "c19" in reopened
+    assert reopened.meta["infos_bytes"] == os.path.getsize(tmp_path / "candidates.jsonl")
+
+    # La fiche reprend une entrée de c7 : c7 arrive en tête
+    found = reopened.search(records[7][1][:1], n=3)
+    assert found[0]["id"] == "c7" and found[0]["metier"] == "m7"
+    assert found[0]["similarite"] == 1.0
+    assert found[0]["scores_par_bloc"] == {"bloc_1": 0.4, "bloc_2": 0.5}
+
+    filtered = reopened.search(records[7][1][:1], n=20, min_blocks={"bloc_1": 0.55})
+    assert {f["id"] for f in filtered} == {f"c{i}" for i in range(20) if i % 5 == 4}
+
+
+def test_interrupted_append_is_ignored_then_truncated(tmp_path):
+    rng = np.random.default_rng(1)
+    store = CandidateStore(str(tmp_path))
+    records = _records(rng, ["a", "b", "c"])
+    store.add_batch(records[:2], "model v1", BLOCKS)
+    sizes = {name: os.path.getsize(path) for name, path in store.paths.items()}
+
+    # Ajout interrompu avant la mise à jour de meta.json
+    for path in store.paths.values():
+        with open(path, "ab") as f:
+            f.write(b'{"id": "fantome"}\n' * 3)
+
+    reopened = CandidateStore(str(tmp_path))
+    assert len(reopened) == 2 and "fantome" not in reopened
+    assert reopened.add_batch(records[2:], "model v1", BLOCKS) == 1
+
+    final = CandidateStore(str(tmp_path))
+    assert [info["id"] for info in final.infos] == ["a", "b", "c"]
+    assert os.path.getsize(store.paths["offsets.i64"]) == sizes["offsets.i64"] + 8
+    assert final.search(records[2][1][:1], n=1)[0]["id"] == "c"
+
+
+def test_search_during_appends_sees_a_consistent_store(tmp_path):
+    rng = np.random.default_rng(2)
+    store = CandidateStore(str(tmp_path))
+    store.add_batch(_records(rng, ["seed"]), "model v1", BLOCKS)
+    batches = [_records(rng, [f"c{b}_{i}" for i in range(5)]) for b in range(40)]
+    query = _unit(rng, 2)
+    errors = []
+
+    def search():
+        while not done.is_set():
+            try:
+                store.search(query, n=5)
+            except Exception as e:
+                errors.append(e)
+
+    done = threading.Event()
+    reader = threading.Thread(target=search)
+    reader.start()
+    for batch in batches:
+        store.add_batch(batch, "model v1", BLOCKS)
+    done.set()
+    reader.join()
+
+    assert errors == []
+    assert len(store.search(query, n=500)) == 201
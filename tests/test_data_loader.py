@@ -0,0 +1,58 @@
+import json
+import os
+
+import pandas as pd
+
+from src.data_loader import get_or_create_clean_data, is_fresh, read_clean_data
+
+RAW = (
+    'CompetencyID,Competency,BlockID,BlockName\n'
+    'C1,"  Modélisation   ""SQL""  avancée ",bloc_1,Données\n'
+    'C2,,bloc_1,Données\n'
+    'C3,Déploiement Docker,,Ops\n'
+    'C4,Ligne malformée,bloc_2,Ops,colonne en trop\n'
+    'C5,Orchestration Airflow,bloc_2,Ops\n'
+)
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_read_clean_data_cleans_text_and_reports_dropped_rows(tmp_path):
+    path = str(tmp_path / "competences.csv")
+    write(path, RAW)
+
+    # Blocs de 2 lignes : le nettoyage et le comptage traversent les blocs
+    df, report = read_clean_data(path, chunksize=2)
+
+    assert report["schema"] == "competences"
+    assert df["Competency"].tolist() == ['Modélisation "SQL" avancée', "Orchestration Airflow"]
+    assert report["dropped"] == {"malformed": 1, "empty_required": 2}
+    assert (report["rows_read"], report["rows_kept"]) == (4, 2)
+
+
+def test_clean_copy_is_reused_only_while_the_source_is_unchanged(tmp_path):
+    raw_path, clean_path = str(tmp_path / "competences.csv"), str(tmp_path / "competences_clean.csv")
+    write(raw_path, RAW)
+
+    first = get_or_create_clean_data(raw_path, clean_path)
+    with open(clean_path + ".meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    assert is_fresh(raw_path, meta["source"]) and meta["report"]["rows_kept"] == 2
+
+    # Copie propre marquée : elle est relue telle quelle tant que la source est identique
+    pd.DataFrame({"Competency": ["copie propre"], "BlockID": ["bloc_1"]}).to_csv(clean_path, index=False)
+    assert get_or_create_clean_data(raw_path, clean_path)["Competency"].tolist() == ["copie propre"]
+
+    # Date modifiée, contenu identique (checkout) : toujours à jour
+    stat = os.stat(raw_path)
+    os.utime(raw_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert get_or_create_clean_data(raw_path, clean_path)["Competency"].tolist() == ["copie propre"]
+
+    # Source modifiée : nettoyage relancé et copie réécrite
+    write(raw_path, RAW + "C6,Tableaux de bord Power BI,bloc_3,BI\n")
+    rebuilt = get_or_create_clean_data(raw_path, clean_path)
+    assert rebuilt["Competency"].tolist() == first["Competency"].tolist() + ["Tableaux de bord Power BI"]
+    assert len(pd.read_csv(clean_path)) == 3
@@ -0,0 +1,102 @@
+import numpy as np
+
+from src.embedding_store import EmbeddingStore, QueryEmbeddingCache
+from tests.support import HashEncoder
+
+
+class CountingEncoder:
+    """Encodeur hors ligne qui garde la trace des textes réellement encodés."""
+
+    def __init__(self):
+        self.encoded = []
+        self.hash = HashEncoder(dim=16)
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return self.hash.encode(texts)
+
+
+def test_only_new_or_reworded_competences_are_encoded(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "modele", "v1")
+    encoder = CountingEncoder()
+    texts = [f"competence {i}" for i in range(20)]
+
+    vectors, hits, misses = store.get_or_encode(texts, encoder)
+    assert (hits, misses) == (0, 20) and len(encoder.encoded) == 20
+
+    # Référentiel inchangé : fichier mappé servi tel quel, aucun encodage
+    encoder.encoded.clear()
+    same, hits, misses = store.get_or_encode(texts, encoder)
+    assert (hits, misses) == (20, 0) and encoder.encoded == []
+    np.testing.assert_array_equal(same, vectors)
+
+    # Une ligne reformulée, une ajoutée, une supprimée, ordre changé
+    edited = ["competence 3 reformulee"] + texts[:3] + texts[4:19] + ["competence 20"]
+    updated, hits, misses = store.get_or_encode(edited, encoder)
+    assert (hits, misses) == (18, 2)
+    assert encoder.encoded == ["competence 3 reformulee", "competence 20"]
+    np.testing.assert_allclose(updated, encoder.hash.encode(edited), atol=1e-6)
+
+    # Le cache ne garde que les lignes courantes, dans l'ordre du référentiel
+    keys, stored = store.load()
+    assert keys == [store.key(t) for t in edited]
+    np.testing.assert_array_equal(stored, updated)
+
+
+def test_model_version_and_corruption_invalidate_the_cache(tmp_path):
+    texts = ["Python", "SQL", "Docker"]
+    EmbeddingStore(str(tmp_path), "modele", "v1").get_or_encode(texts, CountingEncoder())
+
+    encoder = CountingEncoder()
+    _, hits, misses = EmbeddingStore(str(tmp_path), "modele", "v2").get_or_encode(texts, encoder)
+    assert (hits, misses) == (0, 3) and encoder.encoded == texts
+
+    store = EmbeddingStore(str(tmp_path), "modele", "v2")
+    with open(store.index_path, "w", encoding="utf-8") as f:
+        f.write("{tronqué")
+    assert store.load() == ([], None)
+    _, hits, misses = store.get_or_encode(texts, CountingEncoder())
+    assert (hits, misses) == (0, 3)
+
+
+def test_query_cache_encodes_each_normalized_text_once():
+    cache = QueryEmbeddingCache(max_entries=10)
+    encoder = CountingEncoder()
+
+    first = cache.encode(["Python  et SQL", "Docker", "Python et SQL "], encoder)
+    assert encoder.encoded == ["Python et SQL", "Docker"]
+    np.testing.assert_array_equal(first[0], first[2])
+
+    again = cache.encode(["Docker", " Python et SQL"], encoder)
+    assert len(encoder.encoded) == 2
+    np.testing.assert_array_equal(again, first[[1, 0]])
+    assert cache.stats()["hits"] == 2
+
+
+def test_query_cache_evicts_the_least_recently_used_entries():
+    cache = QueryEmbeddingCache(max_entries=3)
+    encoder = CountingEncoder()
+    cache.encode(["a1", "a2", "a3"], encoder)
+    cache.encode(["a1"], encoder)          # a1 redevient le plus récent
+    cache.encode(["a4"], encoder)          # a2 est évincé
+
+    assert cache.get("a2") is None and cache.get("a1") is not None
+    assert cache.stats()["entries"] == 3
+
+    # Borne en octets : vecteurs de 16 float32 = 64 octets
+    small = QueryEmbeddingCache(max_entries=100, max_bytes=128)
+    small.encode(["b1", "b2", "b3"], encoder)
+    assert small.stats()["entries"] == 2 and small.stats()["bytes"] == 128
+    assert QueryEmbeddingCache(max_entries=0).encode(["c1"], encoder).shape == (1, 16)
+
+
+def test_query_cache_persists_between_restarts(tmp_path):
+    path = str(tmp_path / "queries.npz")
+    cache = QueryEmbeddingCache(max_entries=10, persist_path=path)
+    vectors = cache.encode(["Python", "Spark"], CountingEncoder())
+    cache.save()
+
+    encoder = CountingEncoder()
+    restored = QueryEmbeddingCache(max_entries=10, persist_path=path)
+    np.testing.assert_array_equal(restored.encode(["Spark", "Python"], encoder), vectors[[1, 0]])
+    assert encoder.encoded == []
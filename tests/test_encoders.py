@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from src.encoders import OnnxInt8Encoder, create_encoder
+
+VOCAB = ["[PAD]", "[UNK]", "python", "spark", "sql", "docker", "airflow"]
+
+
+def write_tiny_model(model_dir, dim=4):
+    """
+    Modèle exporté factice au format de export_onnx_int8 : "Transformer" réduit
+    à une table d'embeddings (Gather) et tokenizer par mots. Retourne la table.
+    """
+    table = np.random.default_rng(0).normal(size=(len(VOCAB), dim)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "tiny",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", dim])],
+        initializer=[numpy_helper.from_array(table, "table")],
+    )
+    # IR 9 : lisible par toutes les versions récentes d'onnxruntime
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=9)
+    onnx.save(model, str(model_dir / "model_int8.onnx"))
+
+    tokenizer = Tokenizer(WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(model_dir / "tokenizer.json"))
+    with open(model_dir / "encoder.json", "w", encoding="utf-8") as f:
+        json.dump({"model": "tiny", "max_seq_length": 3, "input_names": ["input_ids"],
+                   "pad_id": 0, "pad_token": "[PAD]", "normalize": True}, f)
+    return table
+
+
+def test_onnx_encoder_mean_pools_real_tokens_in_input_order(tmp_path):
+    table = write_tiny_model(tmp_path)
+    encoder = OnnxInt8Encoder("tiny", str(tmp_path), num_threads=1)
+    sentences = ["python", "spark sql docker airflow", "sql inconnu", "docker airflow"]
+
+    embeddings = encoder.encode(sentences, batch_size=2)
+
+    # Padding ignoré, troncature à max_seq_length, ordre d'origine rendu malgré le tri par longueur
+    ids = [[2], [3, 4, 5], [4, 1], [5, 6]]
+    expected = np.stack([table[i].mean(axis=0) for i in ids])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert encoder.get_sentence_embedding_dimension() == 4
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings, expected, atol=1e-6)
+    np.testing.assert_allclose(encoder.encode("python"), expected[0], atol=1e-6)
+
+
+def test_create_encoder_reads_the_export_directory_and_rejects_unknown_names(tmp_path):
+    model_dir = tmp_path / "onnx" / "tiny"
+    model_dir.mkdir(parents=True)
+    write_tiny_model(model_dir)
+
+    assert isinstance(create_encoder("onnx-int8", "tiny", data_path=str(tmp_path)), OnnxInt8Encoder)
+    with pytest.raises(ValueError, match="onnx-int8"):
+        create_encoder("tensorrt", "tiny")
@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src import genai_cache
+from src.genai_cache import GenAICacheStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge du cache pilotée par le test."""
+    now = [1000.0]
+    monkeypatch.setattr(genai_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_expired_entries_are_not_returned(tmp_path, clock):
+    store = GenAICacheStore(str(tmp_path / "cache.db"), ttl_seconds=60)
+    store.set("ancienne", "a")
+    clock[0] += 30
+    store.set("recente", "r")
+    clock[0] += 45
+
+    assert store.get("ancienne") is None and store.get("recente") == "r"
+    clock[0] += 30
+    store.evict()
+    assert len(store) == 0
+
+
+def test_least_recently_read_entries_are_evicted(tmp_path, clock):
+    store = GenAICacheStore(str(tmp_path / "cache.db"), max_entries=3, evict_every=1)
+    for key in "abc":
+        clock[0] += 1
+        store.set(key, key)
+    clock[0] += 1
+    assert store.get("a") == "a"
+    clock[0] += 1
+    store.set("d", "d")
+
+    assert "b" not in store
+    assert [store.get(k) for k in "acd"] == ["a", "c", "d"]
+    assert len(store) == 3
+
+
+def test_concurrent_writers_share_the_wal_database(tmp_path):
+    path = str(tmp_path / "cache.db")
+    # Deux instances sur le même fichier, comme deux sessions ou processus
+    stores = [GenAICacheStore(path, evict_every=7), GenAICacheStore(path, evict_every=7)]
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(100):
+                stores[worker % 2].set(f"{worker}-{i}", str(i))
+                assert stores[(worker + 1) % 2].get(f"{worker}-{i}") == str(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(stores[0]) == 800 and stores[0]._writes + stores[1]._writes == 800
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
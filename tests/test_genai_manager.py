@@ -0,0 +1,152 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from src.genai_manager import GenAIManager
+from src.llm_backends import LLMBackend, LocalBackend
+
+
+class RecordingBackend(LLMBackend):
+    """Backend de test : répond "ok" et note les paramètres de chaque appel."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        with self.lock:
+            self.calls.append({"prompt": prompt, "timeout": timeout})
+        return "ok"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=RecordingBackend(),
+                        data_path=str(tmp_path), timeout=7)
+
+
+def test_submit_call_with_already_finished_future_does_not_deadlock(manager):
+    # Le pool rend un Future déjà terminé : le callback s'exécute dans l'appelant
+    def submit(fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    manager._calls_executor.submit = submit
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(text=manager._generate("prompt", "BIO")), daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive(), "verrou single-flight repris par le callback"
+    assert result["text"] == "ok"
+    assert manager._inflight == {}
+
+
+def test_backend_receives_the_per_call_timeout(manager):
+    assert manager._generate("prompt", "BIO") == "ok"
+    assert manager.backend.calls == [{"prompt": "prompt", "timeout": 7}]
+
+
+class FailingBackend(LLMBackend):
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        raise RuntimeError("quota dépassé")
+
+
+def test_failed_generation_drops_its_pending_vector(tmp_path):
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=FailingBackend(),
+                           data_path=str(tmp_path), max_retries=0, bio_similarity=0.95,
+                           embedder=lambda texts: np.ones((len(texts), 4), dtype=np.float32))
+    text = manager._generate("prompt", "BIO", semantic=("Data Engineer", "profil"))
+
+    assert text.startswith("Erreur de génération")
+    assert manager._pending_vectors == {}
+
+
+def test_batch_fallback_counts_each_phrase_once(manager):
+    # "ok" n'est pas un tableau JSON : le lot retombe sur les appels unitaires
+    assert manager.enrichir_phrases(["Python", "SQL"]) == ["ok", "ok"]
+    assert manager.cache_stats()["ENRICH"]["miss"] == 2
+
+    assert manager.enrichir_phrases(["python"]) == ["ok"]
+    assert manager.cache_stats()["ENRICH"] == {"hit": 1, "semantic_hit": 0, "miss": 2, "hit_rate": 1 / 3}
+
+
+def test_local_backend_answers_a_batch_in_one_call(tmp_path):
+    backend = LocalBackend()
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=backend, data_path=str(tmp_path))
+    phrases = [f"outil {i}" for i in range(50)]
+
+    enrichies = manager.enrichir_phrases(phrases)
+
+    assert backend.calls == 1
+    assert len(set(enrichies)) == 50 and all(e.startswith("Réponse locale") for e in enrichies)
+    assert manager.enrichir_phrases(phrases) == enrichies and backend.calls == 1
+
+
+class FlakyBackend(LLMBackend):
+    """Première tentative : délai dépassé (après timeout secondes), puis "ok"."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(timeout)
+            raise TimeoutError(f"délai de {timeout}s dépassé")
+        return "ok"
+
+    def generate_stream(self, prompt, temperature=0.3, timeout=None):
+        yield self.generate(prompt, temperature, timeout)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_retry_after_a_timed_out_attempt_reaches_the_caller(tmp_path, stream):
+    backend = FlakyBackend()
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=backend,
+                           data_path=str(tmp_path), timeout=0.2, max_retries=2, backoff=0.05)
+
+    if stream:
+        text = "".join(manager._generate_stream("prompt", "BIO"))
+    else:
+        text = manager._generate("prompt", "BIO")
+
+    assert text == "ok"
+    assert backend.calls == 2
+
+
+def test_cache_bounds_come_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("AISCA_GENAI_CACHE_TTL", "3600")
+    monkeypatch.setenv("AISCA_GENAI_CACHE_MAX", "0")
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=RecordingBackend(),
+                           data_path=str(tmp_path))
+    assert manager.cache.ttl_seconds == 3600 and manager.cache.max_entries is None
+
+    monkeypatch.delenv("AISCA_GENAI_CACHE_MAX")
+    assert GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=RecordingBackend(),
+                        data_path=str(tmp_path)).cache.max_entries == 100000
+
+
+def test_stream_yields_chunks_then_serves_the_cached_text(tmp_path):
+    backend = LocalBackend()
+    manager = GenAIManager(cache_file=str(tmp_path / "genai_cache.db"), backend=backend, data_path=str(tmp_path))
+
+    chunks = list(manager._generate_stream("prompt", "BIO"))
+    assert len(chunks) > 1 and "".join(chunks) == backend.generate("prompt")
+
+    assert list(manager._generate_stream("prompt", "BIO")) == ["".join(chunks)]
+    assert backend.calls == 2 and manager.cache_stats()["BIO"]["hit"] == 1
+
+
+def test_stream_rechecks_the_cache_under_the_single_flight_lock(manager):
+    # Le flux identique s'est terminé entre la lecture du cache et la prise du verrou
+    cache_key = manager._cache_key("BIO", prompt="prompt")
+    manager.cache.set(cache_key, "déjà généré")
+    manager._cache_lookup = lambda *_: None
+
+    assert list(manager._generate_stream("prompt", "BIO")) == ["déjà généré"]
+    assert manager.backend.calls == [] and manager._inflight == {}
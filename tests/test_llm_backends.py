@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.llm_backends import LLMBackend, LocalBackend, RateLimitedBackend, TokenBucket, create_backend
+
+
+def test_local_backend_is_deterministic():
+    answer = LocalBackend().generate("prompt")
+    assert LocalBackend(seed=3).generate("prompt") == answer != LocalBackend().generate("autre prompt")
+    assert "".join(LocalBackend().generate_stream("prompt")) == answer
+
+    with pytest.raises(RuntimeError):
+        LocalBackend(error_rate=1.0).generate("prompt")
+    with pytest.raises(TimeoutError):
+        LocalBackend(latency=0.5).generate("prompt", timeout=0.05)
+
+
+def test_token_bucket_limits_the_rate_after_the_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(6):
+        assert bucket.acquire()
+    # 2 jetons de réserve, puis 4 jetons à 20 par seconde
+    assert time.monotonic() - start >= 0.15
+
+    slow = TokenBucket(rate=1, capacity=1)
+    assert slow.acquire(timeout=0.01)
+    assert not slow.acquire(timeout=0.01)
+
+
+class SlowBackend(LLMBackend):
+    """Backend qui mesure le nombre d'appels simultanés."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, temperature=0.3, timeout=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return prompt
+
+
+def test_rate_limited_backend_caps_concurrent_calls():
+    inner = SlowBackend()
+    backend = RateLimitedBackend(inner, max_concurrency=2)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(backend.generate, [f"p{i}" for i in range(6)]))
+
+    assert results == [f"p{i}" for i in range(6)]
+    assert inner.peak == 2
+
+    # Créneau occupé plus longtemps que le délai accordé : l'appel échoue au lieu d'attendre
+    busy = RateLimitedBackend(SlowBackend(), max_concurrency=1)
+    stream = busy.generate_stream("long")
+    next(stream)
+    with pytest.raises(TimeoutError):
+        busy.generate("p", timeout=0.01)
+    stream.close()
+    assert busy.generate("p", timeout=0.01) == "p"
+
+
+def test_create_backend_reads_its_limits_from_the_environment(monkeypatch):
+    monkeypatch.setenv("AISCA_LLM_BACKEND", "local")
+    monkeypatch.setenv("AISCA_LLM_RATE", "0")
+    monkeypatch.setenv("AISCA_LLM_CONCURRENCY", "3")
+    backend = create_backend()
+
+    assert isinstance(backend.backend, LocalBackend) and backend.bucket is None
+    assert backend.generate("prompt") == LocalBackend().generate("prompt")
+
+    assert create_backend("gemini", api_key=None) is None
+    with pytest.raises(ValueError):
+        create_backend("inconnu")
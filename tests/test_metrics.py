@@ -0,0 +1,25 @@
+from src.metrics import MetricsRegistry
+
+
+def test_prometheus_export_format():
+    registry = MetricsRegistry()
+    registry.inc("aisca_scoring_candidates_total", 3)
+    registry.observe("aisca_genai_call_seconds", 0.002, prompt="BIO")
+    registry.observe("aisca_genai_call_seconds", 0.3, prompt="BIO")
+
+    lines = registry.export_prometheus().splitlines()
+    assert "# TYPE aisca_scoring_candidates_total counter" in lines
+    assert "aisca_scoring_candidates_total 3" in lines
+    assert lines.count("# TYPE aisca_genai_call_seconds histogram") == 1
+    assert 'aisca_genai_call_seconds_bucket{prompt="BIO",le="0.001"} 0' in lines
+    assert 'aisca_genai_call_seconds_bucket{prompt="BIO",le="0.0025"} 1' in lines
+    assert 'aisca_genai_call_seconds_bucket{prompt="BIO",le="+Inf"} 2' in lines
+    assert 'aisca_genai_call_seconds_count{prompt="BIO"} 2' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("aisca_genai_calls_total", prompt='modele "flash"\\v2', outcome="erreur\nquota")
+
+    line = registry.export_prometheus().splitlines()[-1]
+    assert line == 'aisca_genai_calls_total{outcome="erreur\\nquota",prompt="modele \\"flash\\"\\\\v2"} 1'
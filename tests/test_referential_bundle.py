@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pytest
+
+from src import genai_manager, referential_bundle
+from src.genai_manager import GenAIManager
+from src.llm_backends import LocalBackend
+from src.referential_bundle import BUNDLE_NAME, SOURCES, load_or_build_bundle, read_bundle
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    for name in SOURCES:
+        shutil.copy(os.path.join("data", name), tmp_path / name)
+    return tmp_path
+
+
+def test_bundle_is_built_once_then_read_back(data_path, monkeypatch):
+    bundle = load_or_build_bundle(str(data_path))
+    assert len(bundle) > 0 and (data_path / BUNDLE_NAME).exists()
+    assert read_bundle(str(data_path / BUNDLE_NAME)).content_hash == bundle.content_hash
+
+    # Sources inchangées : relu tel quel, sans recompilation
+    monkeypatch.setattr(referential_bundle, "compile_referential", lambda *_: pytest.fail("recompilé"))
+    reread = load_or_build_bundle(str(data_path))
+    assert reread.content_hash == bundle.content_hash
+    assert reread.meta["competence_labels"] == bundle.meta["competence_labels"]
+
+
+def test_changed_source_invalidates_the_bundle(data_path):
+    bundle = load_or_build_bundle(str(data_path))
+    csv = (data_path / "competences.csv").read_text(encoding="utf-8").rstrip("\n")
+    (data_path / "competences.csv").write_text(
+        csv + '\nC999,"[Nouveau] compétence ajoutée pour le test",bloc_1,Architecture Data\n', encoding="utf-8")
+
+    rebuilt = load_or_build_bundle(str(data_path))
+    assert len(rebuilt) == len(bundle) + 1
+    assert rebuilt.content_hash != bundle.content_hash
+
+
+def test_altered_bundle_fails_its_hash_check_and_is_rebuilt(data_path):
+    bundle = load_or_build_bundle(str(data_path))
+    path = data_path / BUNDLE_NAME
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="Empreinte"):
+        read_bundle(str(path))
+    assert load_or_build_bundle(str(data_path)).content_hash == bundle.content_hash
+
+
+def test_genai_manager_reuses_the_loaded_bundle(data_path, monkeypatch):
+    bundle = load_or_build_bundle(str(data_path))
+    monkeypatch.setattr(genai_manager, "load_or_build_bundle", lambda *_: pytest.fail("bundle relu"))
+    manager = GenAIManager(cache_file=str(data_path / "genai_cache.db"), backend=LocalBackend(),
+                           data_path=str(data_path), bundle=bundle)
+    assert manager.referentiel_map == bundle.block_names
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import threading
+
+NEW_COMPETENCE = "Orchestration de pipelines Airflow en temps reel"
+
+
+def add_competence(data_path):
+    with open(os.path.join(data_path, "competences.csv"), "a", encoding="utf-8") as f:
+        f.write(f"C999999,{NEW_COMPETENCE},bloc_1,Nom bloc_1\n")
+
+
+def top_competence(result):
+    return result["top_competences_details"].iloc[0]["Competency"]
+
+
+def test_reload_swaps_the_state_and_encodes_only_new_competences(tmp_path, hash_engine):
+    engine = hash_engine(n_competences=300)
+    encoded = []
+    encode = engine.model.encode
+    engine.model.encode = lambda texts, **kwargs: encoded.extend(texts) or encode(texts, **kwargs)
+    old_state = engine.state
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert engine.reload() is False
+        add_competence(str(tmp_path))
+
+        # Rechargement au milieu d'une requête : elle termine sur l'état lu au départ
+        score_candidates = engine._score_candidates
+
+        def reload_during_request(state, *args):
+            assert engine.reload() is True
+            return score_candidates(state, *args)
+
+        engine._score_candidates = reload_during_request
+        in_flight = engine.calculate_scores([NEW_COMPETENCE])
+        del engine._score_candidates
+
+    assert top_competence(in_flight) != NEW_COMPETENCE
+    assert len(old_state.df_competences) == 300 and len(engine.df_competences) == 301
+    assert engine.state.bundle.content_hash != old_state.bundle.content_hash
+    assert top_competence(engine.calculate_scores([NEW_COMPETENCE])) == NEW_COMPETENCE
+    # Encodeur : la compétence ajoutée (référentiel) et la saisie, une seule fois (cache des saisies)
+    assert encoded == [NEW_COMPETENCE, NEW_COMPETENCE]
+
+
+def test_invalid_referential_keeps_the_current_state(tmp_path, hash_engine):
+    engine = hash_engine(n_competences=300)
+    state = engine.state
+    with open(tmp_path / "competences.csv", "w", encoding="utf-8") as f:
+        f.write("CompetencyID,Competency,BlockID,BlockName\n")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert engine.reload() is False
+    assert engine.state is state
+
+
+def test_watcher_reloads_and_notifies(tmp_path, hash_engine):
+    engine = hash_engine(n_competences=300)
+    reloaded = threading.Event()
+    bundles = []
+
+    def on_reload(bundle):
+        bundles.append(bundle)
+        reloaded.set()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.start_watching(interval=0.05, on_reload=on_reload)
+        try:
+            add_competence(str(tmp_path))
+            assert reloaded.wait(timeout=10)
+        finally:
+            engine.stop_watching()
+
+    assert bundles[0] is engine.state.bundle and len(engine.df_competences) == 301
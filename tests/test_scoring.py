@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.sbert_engine import BATCH_TOLERANCE
+from src.scoring import ScoreIndex
+from tests.support import check_equivalence, make_cv, make_referential, random_max_scores, reference_scores
+
+
+@pytest.mark.parametrize("n_competences, n_blocks, n_jobs", [(120, 5, 4), (1000, 10, 20)])
+def test_score_index_matches_the_pandas_implementation(n_competences, n_blocks, n_jobs):
+    df_competences, df_metiers = make_referential(n_competences, n_blocks, n_jobs)
+    index = ScoreIndex(df_competences, df_metiers)
+    max_scores = random_max_scores(20, n_competences)
+
+    batched = index.score(max_scores)
+    for row, batch_result in zip(max_scores, batched):
+        expected = reference_scores(df_competences, df_metiers, row)
+        check_equivalence(expected, index.score(row[None, :])[0])
+        check_equivalence(expected, batch_result)
+
+
+def test_block_scores_tiles_match_a_single_pass():
+    df_competences, df_metiers = make_referential(500, 7, 10)
+    index = ScoreIndex(df_competences, df_metiers)
+    max_scores = np.random.default_rng(0).random((40, 500), dtype=np.float32)
+
+    single_pass = index.block_scores(max_scores)
+    # Une tuile par candidat
+    tiled = index.block_scores(max_scores, max_elements=1)
+
+    assert single_pass.dtype == np.float64
+    np.testing.assert_array_equal(tiled, single_pass)
+    np.testing.assert_array_equal(single_pass, index.block_scores(max_scores.astype(np.float64)))
+
+
+def assert_equivalent(single, batch, tol=BATCH_TOLERANCE):
+    """Même résultat à tol près ; l'ordre ne peut différer qu'entre scores à moins de tol."""
+    assert list(single["scores_par_bloc"]) == list(batch["scores_par_bloc"])
+    np.testing.assert_allclose(list(single["scores_par_bloc"].values()), list(batch["scores_par_bloc"].values()),
+                               rtol=0, atol=tol)
+
+    # Scores des métiers arrondis à 1e-4 : un écart de tol peut changer l'arrondi d'une unité
+    jobs = {job["metier"]: job["score"] for job in single["recommandations_metiers"]}
+    batch_jobs = {job["metier"]: job["score"] for job in batch["recommandations_metiers"]}
+    assert jobs.keys() == batch_jobs.keys()
+    assert all(abs(jobs[m] - batch_jobs[m]) <= 1e-4 + tol for m in jobs)
+
+    top, batch_top = single["top_competences_details"], batch["top_competences_details"]
+    np.testing.assert_allclose(top["score"].to_numpy(), batch_top["score"].to_numpy(), rtol=0, atol=tol)
+    for (_, a), (_, b) in zip(top.iterrows(), batch_top.iterrows()):
+        assert a["Competency"] == b["Competency"] or abs(a["score"] - b["score"]) <= tol
+
+
+def test_single_and_batch_scoring_agree(hash_engine):
+    engine = hash_engine(600, index="dense", query_cache_size=0, input_tile=64, vector_tile=256)
+    candidates = [[make_cv(5 + c % 40, seed=c), f"Python SQL {c}"] for c in range(30)]
+
+    batch = engine.calculate_scores_batch(candidates, segment=True)
+    for user_inputs, batch_result in zip(candidates, batch):
+        assert_equivalent(engine.calculate_scores(user_inputs, segment=True), batch_result)
+
+
+def test_batch_size_follows_the_memory_budget(hash_engine):
+    # 600 compétences x 4 octets, budget de 0,01 Mo : 4 candidats par passe
+    engine = hash_engine(600, index="dense", query_cache_size=0, memory_budget_mb=0.01)
+    assert engine.max_batch_candidates() == int(0.01 * 2 ** 20) // (4 * 600) == 4
+
+    candidates = [[f"Python SQL {c}", make_cv(3, seed=c)] for c in range(10)]
+    passes = []
+    score = engine._score_candidates
+    engine._score_candidates = lambda state, batch, *args: passes.append(len(batch)) or score(state, batch, *args)
+    results = engine.calculate_scores_batch(candidates)
+
+    assert passes == [4, 4, 2]
+    engine._score_candidates = score
+    for user_inputs, result in zip(candidates, results):
+        assert_equivalent(engine.calculate_scores(user_inputs), result)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pandas as pd
+
+from src.scoring_service import MicroBatcher, ScoringService
+
+
+class FakeEngine:
+    """Moteur minimal : un lot contenant "boom" échoue en entier, comme une erreur d'encodage."""
+
+    competence_vectors = None
+
+    def __init__(self):
+        self.calls = []
+
+    def calculate_scores_batch(self, candidates):
+        self.calls.append(candidates)
+        if any("boom" in inputs for inputs in candidates):
+            raise ValueError("entrée illisible")
+        return [{"scores_par_bloc": {}, "recommandations_metiers": [inputs],
+                 "top_competences_details": pd.DataFrame()} for inputs in candidates]
+
+
+async def _gather_in_one_batch(batcher, requests):
+    batcher.start()
+    return await asyncio.gather(*(batcher.score(inputs, segment=segment) for inputs, segment in requests),
+                                return_exceptions=True)
+
+
+def test_failing_candidate_does_not_fail_its_batch():
+    engine = FakeEngine()
+    batcher = MicroBatcher(engine, max_batch=32, max_wait=0.05)
+    requests = [(["Python"], False)] * 10 + [(["boom"], False)]
+    results = asyncio.run(_gather_in_one_batch(batcher, requests))
+
+    assert [r["recommandations_metiers"] for r in results[:10]] == [[["Python"]]] * 10
+    assert isinstance(results[10], ValueError)
+    assert len(engine.calls[0]) == 11
+    assert batcher.requests == 10 and batcher.errors == 1
+
+
+def test_segmentation_is_per_source():
+    engine = FakeEngine()
+    batcher = MicroBatcher(engine, max_wait=0.01)
+    # Les deux sources ne doivent pas être recollées en une seule phrase
+    results = asyncio.run(_gather_in_one_batch(batcher, [(["Python et", "Docker."], True)]))
+    assert results[0]["recommandations_metiers"] == [["Python et", "Docker."]]
+
+
+def test_invalid_payload_is_rejected_before_the_queue():
+    service = ScoringService(FakeEngine())
+
+    async def run():
+        service.batcher.start()
+        bad = [{"inputs": 5}, {"inputs": ["ok", 3]}, {"inputs": ["ok"], "segment": "yes"}, ["ok"]]
+        statuses = [(await service._route("POST", "/score", json.dumps(p).encode()))[0] for p in bad]
+        valid = await service._route("POST", "/score", b'{"inputs": "Python"}')
+        return statuses, valid
+
+    statuses, valid = asyncio.run(run())
+    assert statuses == [400] * 4
+    assert valid[0] == 200 and valid[1]["recommandations_metiers"] == [["Python"]]
+    assert service.batcher.errors == 0
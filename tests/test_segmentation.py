@@ -0,0 +1,52 @@
+import io
+
+from src.segmentation import dedupe, iter_segments, split_stack
+from tests.support import make_cv
+
+
+def test_split_stack_gives_one_phrase_per_comma_or_line():
+    stack = "Python, Spark,dbt\n- Airflow\n\n  Power   BI , CI/CD\n,\n• scikit-learn"
+    assert split_stack(stack) == ["Python", "Spark", "dbt", "Airflow", "Power BI", "CI/CD", "scikit-learn"]
+    assert split_stack("") == [] and split_stack(None) == []
+
+
+def test_bullets_broken_lines_and_sentences_become_segments():
+    cv = ("- Conception d'un pipeline ETL\n"
+          "* Mise en place d'une API REST\n"
+          "1) Migration vers Spark\n"
+          "Industrialisation de modèles de scoring avec\n"
+          "python et docker. Suivi des campagnes A/B !\n"
+          "\n"
+          "---\n")
+    assert list(iter_segments(cv)) == [
+        "Conception d'un pipeline ETL",
+        "Mise en place d'une API REST",
+        "Migration vers Spark",
+        "Industrialisation de modèles de scoring avec python et docker.",
+        "Suivi des campagnes A/B !",
+    ]
+
+
+def test_long_segments_are_windowed_and_sources_are_streamed():
+    words = [f"mot{i}" for i in range(250)]
+    assert [len(s.split()) for s in iter_segments(" ".join(words), max_words=100)] == [100, 100, 50]
+
+    # Fichier ouvert et liste de textes : mêmes segments que le texte entier
+    cv = make_cv(40)
+    assert list(iter_segments(io.StringIO(cv))) == list(iter_segments(cv))
+    assert list(iter_segments(cv.splitlines(keepends=True))) == list(iter_segments(cv))
+
+
+def test_dedupe_keeps_the_first_occurrence():
+    assert list(dedupe(["Python  SQL", "Python SQL", " ", "Docker", "Python SQL "])) == ["Python  SQL", "Docker"]
+
+
+def test_input_without_segment_gives_an_empty_result(hash_engine):
+    engine = hash_engine(n_competences=50)
+
+    resultat = engine.calculate_scores(["---", "\n  \n", "• "], segment=True)
+
+    # Cas affiché en avertissement par l'application, sans encodage
+    assert resultat["recommandations_metiers"] == [] and resultat["scores_par_bloc"] == {}
+    assert engine.query_cache.stats()["misses"] == 0
+    assert engine.input_vectors(["---"], segment=True).shape == (0, engine.competence_unit.shape[1])